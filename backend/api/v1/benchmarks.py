@@ -0,0 +1,473 @@
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from food_shop.guest_cart import GUEST_CART_HEADER
+from food_shop.models import (
+    CatalogNode,
+    Category,
+    Product,
+    ProductCart,
+    Subcategory,
+)
+from users.models import MyUser
+
+BENCHMARK_PASSWORD = "Benchmark-password-1"
+BENCHMARK_PREFIX = "Бенчмарк"
+
+
+class BenchmarkContext:
+    """
+    Синтетические данные бенчмарка: каталог, пользователи с корзинами
+    и клиенты для запросов.
+    Атрибуты:
+        - product_ids: Идентификаторы синтетических продуктов.
+        - user: Пользователь, от имени которого выполняются запросы корзины.
+        - client: Клиент без аутентификации.
+        - auth_client: Клиент с токеном пользователя.
+    """
+
+    def __init__(self, products, users, cart_items):
+        call_command(
+            "seed_catalog",
+            products=products,
+            prefix=BENCHMARK_PREFIX,
+            stdout=StringIO(),
+        )
+        self.product_ids = list(
+            Product.objects.filter(name__startswith=f"{BENCHMARK_PREFIX} продукт ")
+            .order_by("id")
+            .values_list("id", flat=True)[:products]
+        )
+        self.subcategory_id = (
+            Subcategory.objects.filter(name__startswith=BENCHMARK_PREFIX)
+            .values_list("id", flat=True)
+            .first()
+        )
+        self.category_id = (
+            Category.objects.filter(name__startswith=BENCHMARK_PREFIX)
+            .values_list("id", flat=True)
+            .first()
+        )
+        self.product_path = Product.objects.values_list(
+            "subcategory__category__slug", "subcategory__slug", "slug"
+        ).get(id=self.product_ids[0])
+        self.node_id = (
+            CatalogNode.objects.filter(subcategory_id=self.subcategory_id)
+            .values_list("id", flat=True)
+            .first()
+        )
+        self.users = self.seed_users(users, cart_items)
+        self.user = self.users[0]
+        self.token = Token.objects.get_or_create(user=self.user)[0]
+
+        self.client = APIClient()
+        self.auth_client = APIClient()
+        self.auth_client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.guest_client = APIClient()
+
+    def seed_users(self, total, cart_items):
+        """
+        Создает пользователей с корзинами по cart_items позиций
+        (хэш пароля вычисляется один раз на всех).
+        """
+
+        password = make_password(BENCHMARK_PASSWORD)
+        usernames = [f"benchmark_user_{index}" for index in range(total)]
+        existing = set(
+            MyUser.objects.filter(username__in=usernames).values_list(
+                "username", flat=True
+            )
+        )
+        MyUser.objects.bulk_create(
+            [
+                MyUser(
+                    username=username,
+                    email=f"{username}@example.com",
+                    password=password,
+                )
+                for username in usernames
+                if username not in existing
+            ]
+        )
+        users = list(MyUser.objects.filter(username__in=usernames).order_by("id"))
+        with_cart = set(
+            ProductCart.objects.filter(user__in=users).values_list("user_id", flat=True)
+        )
+        ProductCart.objects.bulk_create(
+            [ProductCart(user=user) for user in users if user.id not in with_cart]
+        )
+        items = {product_id: 1 for product_id in self.product_ids[:cart_items]}
+        for cart in ProductCart.objects.filter(user__in=users):
+            cart.merge_items(items)
+        return users
+
+    @property
+    def product_cart(self):
+        return ProductCart.objects.get(user=self.user)
+
+    def cart_item_id(self, product_index=0, amount=5):
+        """
+        Гарантирует позицию продукта в корзине пользователя.
+        Возвращает: int: Идентификатор позиции.
+        """
+
+        product_id = self.product_ids[product_index]
+        item, _ = self.product_cart.add_product(
+            Product.objects.get(id=product_id), amount
+        )
+        return item.id
+
+    def guest_cart(self):
+        """Гарантирует гостевую корзину у гостевого клиента."""
+
+        response = self.guest_client.post(
+            reverse("guestcart-list"),
+            {"product": self.product_ids[0], "amount": 5},
+            format="json",
+        )
+        if GUEST_CART_HEADER in response:
+            self.guest_client.credentials(
+                HTTP_X_GUEST_CART_ID=response[GUEST_CART_HEADER]
+            )
+
+
+class Route:
+    """
+    Описание замеряемого маршрута.
+    Атрибуты:
+        - name: Имя маршрута в результатах.
+        - method: HTTP-метод.
+        - url: Функция контекста, возвращающая URL.
+        - data: Функция контекста, возвращающая тело запроса.
+        - client: Имя клиента контекста (client, auth_client, guest_client).
+        - setup: Подготовка перед каждым запросом (не входит в замер);
+            возвращает аргумент для url.
+    """
+
+    def __init__(self, name, method, url, data=None, client="client", setup=None):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.data = data
+        self.client = client
+        self.setup = setup
+
+
+def _batch_operations(context):
+    return {
+        "operations": [
+            {"op": "set", "product": product_id, "amount": 2}
+            for product_id in context.product_ids[:30]
+        ]
+    }
+
+
+ROUTES = (
+    Route("category-list", "get", lambda ctx, _: reverse("category-list")),
+    Route(
+        "category-detail",
+        "get",
+        lambda ctx, _: reverse("category-detail", kwargs={"pk": ctx.category_id}),
+    ),
+    Route("subcategory-list", "get", lambda ctx, _: reverse("subcategory-list")),
+    Route(
+        "subcategory-detail",
+        "get",
+        lambda ctx, _: reverse("subcategory-detail", kwargs={"pk": ctx.subcategory_id}),
+    ),
+    Route("product-list", "get", lambda ctx, _: reverse("product-list")),
+    Route(
+        "product-list-cursor",
+        "get",
+        lambda ctx, _: reverse("product-list") + "?pagination=cursor",
+    ),
+    Route(
+        "product-search",
+        "get",
+        lambda ctx, _: reverse("product-list") + "?search=бенчмарк",
+    ),
+    Route(
+        "product-detail",
+        "get",
+        lambda ctx, _: reverse("product-detail", kwargs={"pk": ctx.product_ids[0]}),
+    ),
+    Route(
+        "product-detail-slug",
+        "get",
+        lambda ctx, _: reverse("product-detail", kwargs={"pk": ctx.product_path[2]}),
+    ),
+    Route(
+        "category-product",
+        "get",
+        lambda ctx, _: reverse(
+            "category-product",
+            kwargs=dict(
+                zip(("pk", "subcategory_slug", "product_slug"), ctx.product_path)
+            ),
+        ),
+    ),
+    Route("catalog-list", "get", lambda ctx, _: reverse("catalog-list")),
+    Route(
+        "catalog-detail",
+        "get",
+        lambda ctx, _: reverse("catalog-detail", kwargs={"pk": ctx.node_id}),
+    ),
+    Route(
+        "catalog-products",
+        "get",
+        lambda ctx, _: reverse("catalog-products", kwargs={"pk": ctx.node_id}),
+    ),
+    Route(
+        "catalog-breadcrumbs",
+        "get",
+        lambda ctx, _: reverse("catalog-breadcrumbs", kwargs={"pk": ctx.node_id}),
+    ),
+    Route(
+        "cart-list",
+        "get",
+        lambda ctx, _: reverse("shoppingcartproduct-list"),
+        client="auth_client",
+    ),
+    Route(
+        "cart-create",
+        "post",
+        lambda ctx, _: reverse("shoppingcartproduct-list"),
+        data=lambda ctx: {"product": ctx.product_ids[1], "amount": 1},
+        client="auth_client",
+    ),
+    Route(
+        "cart-retrieve",
+        "get",
+        lambda ctx, item_id: reverse(
+            "shoppingcartproduct-detail", kwargs={"pk": item_id}
+        ),
+        client="auth_client",
+        setup=lambda ctx: ctx.cart_item_id(),
+    ),
+    Route(
+        "cart-update",
+        "patch",
+        lambda ctx, item_id: reverse(
+            "shoppingcartproduct-detail", kwargs={"pk": item_id}
+        ),
+        data=lambda ctx: {"amount": 3},
+        client="auth_client",
+        setup=lambda ctx: ctx.cart_item_id(),
+    ),
+    Route(
+        "cart-destroy",
+        "delete",
+        lambda ctx, item_id: reverse(
+            "shoppingcartproduct-detail", kwargs={"pk": item_id}
+        ),
+        client="auth_client",
+        setup=lambda ctx: ctx.cart_item_id(product_index=2),
+    ),
+    Route(
+        "cart-reduce-product",
+        "post",
+        lambda ctx, _: reverse("shoppingcartproduct-reduce-product"),
+        data=lambda ctx: {"product": ctx.product_ids[0], "amount": 1},
+        client="auth_client",
+        setup=lambda ctx: ctx.cart_item_id(),
+    ),
+    Route(
+        "cart-composition-basket-sum",
+        "get",
+        lambda ctx, _: reverse("shoppingcartproduct-composition-basket-sum"),
+        client="auth_client",
+    ),
+    Route(
+        "cart-batch",
+        "post",
+        lambda ctx, _: reverse("shoppingcartproduct-batch"),
+        data=_batch_operations,
+        client="auth_client",
+    ),
+    Route(
+        "cart-clear",
+        "delete",
+        lambda ctx, _: reverse("shoppingcartproduct-clear-product-cart"),
+        client="auth_client",
+        setup=lambda ctx: ctx.cart_item_id(),
+    ),
+    Route(
+        "guestcart-create",
+        "post",
+        lambda ctx, _: reverse("guestcart-list"),
+        data=lambda ctx: {"product": ctx.product_ids[1], "amount": 1},
+        client="guest_client",
+        setup=lambda ctx: ctx.guest_cart(),
+    ),
+    Route(
+        "guestcart-list",
+        "get",
+        lambda ctx, _: reverse("guestcart-list"),
+        client="guest_client",
+        setup=lambda ctx: ctx.guest_cart(),
+    ),
+    Route(
+        "guestcart-update",
+        "patch",
+        lambda ctx, _: reverse("guestcart-detail", kwargs={"pk": ctx.product_ids[0]}),
+        data=lambda ctx: {"amount": 3},
+        client="guest_client",
+        setup=lambda ctx: ctx.guest_cart(),
+    ),
+    Route(
+        "guestcart-destroy",
+        "delete",
+        lambda ctx, _: reverse("guestcart-detail", kwargs={"pk": ctx.product_ids[0]}),
+        client="guest_client",
+        setup=lambda ctx: ctx.guest_cart(),
+    ),
+    Route(
+        "login",
+        "post",
+        lambda ctx, _: reverse("login"),
+        data=lambda ctx: {
+            "username": ctx.user.username,
+            "password": BENCHMARK_PASSWORD,
+        },
+    ),
+    Route(
+        "login-merge-guestcart",
+        "post",
+        lambda ctx, _: reverse("login"),
+        data=lambda ctx: {
+            "username": ctx.user.username,
+            "password": BENCHMARK_PASSWORD,
+        },
+        client="guest_client",
+        setup=lambda ctx: ctx.guest_cart(),
+    ),
+)
+
+
+@contextmanager
+def isolated_run():
+    """
+    Окружение одного запуска бенчмарка. Все кэши получают собственный
+    префикс ключей: запуск не видит ранее закэшированных ответов, токенов
+    и гостевых корзин, а записанные им (и откатываемые вместе с данными)
+    значения не видны приложению после запуска и истекают по таймауту.
+    Фоновая запись гостевых корзин отключена, и их снимки записываются
+    в транзакции запуска.
+    """
+
+    prefix = f"benchmark-{uuid.uuid4().hex}"
+    caches_config = {
+        alias: {**config, "KEY_PREFIX": f"{prefix}{config.get('KEY_PREFIX', '')}"}
+        for alias, config in settings.CACHES.items()
+    }
+    with override_settings(CACHES=caches_config, GUEST_CART_FLUSH_INTERVAL=0):
+        yield
+
+
+def percentile(values, percent):
+    """
+    Перцентиль по методу ближайшего ранга.
+    :param values: Непустой список значений.
+    :param percent: Перцентиль (0-100).
+    :return: Значение перцентиля.
+    """
+
+    ordered = sorted(values)
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def run_route(context, route, requests):
+    """
+    Выполняет маршрут requests раз.
+    Возвращает: dict: p50/p95 (мс), пропускная способность (запросов/с),
+    медиана числа SQL-запросов и коды ответов.
+    """
+
+    client = getattr(context, route.client)
+    timings, query_counts, statuses = [], [], set()
+    for _ in range(requests):
+        argument = route.setup(context) if route.setup else None
+        url = route.url(context, argument)
+        data = route.data(context) if route.data else None
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, route.method)(url, data, format="json")
+            timings.append(time.perf_counter() - started)
+        query_counts.append(len(queries))
+        statuses.add(response.status_code)
+    return {
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "rps": round(len(timings) / sum(timings), 1),
+        "queries": int(statistics.median(query_counts)),
+        "statuses": sorted(statuses),
+    }
+
+
+def run_benchmarks(products, users, cart_items, requests, routes=None):
+    """
+    Заполняет данные и замеряет маршруты.
+    :param products: Количество синтетических продуктов.
+    :param users: Количество синтетических пользователей.
+    :param cart_items: Количество позиций в корзине каждого пользователя.
+    :param requests: Количество запросов на маршрут.
+    :param routes: Имена маршрутов (по умолчанию все).
+    :return: dict: Параметры запуска и результаты по маршрутам.
+    """
+
+    context = BenchmarkContext(products, users, cart_items)
+    results = {}
+    for route in ROUTES:
+        if routes and route.name not in routes:
+            continue
+        results[route.name] = run_route(context, route, requests)
+    return {
+        "params": {
+            "products": products,
+            "users": users,
+            "cart_items": cart_items,
+            "requests": requests,
+        },
+        "routes": results,
+    }
+
+
+def compare_results(baseline, current, latency_threshold, query_threshold=0):
+    """
+    Сравнивает результаты с базовыми.
+    :param baseline: Базовые результаты (run_benchmarks).
+    :param current: Текущие результаты.
+    :param latency_threshold: Допустимый относительный рост p50/p95.
+    :param query_threshold: Допустимый рост числа SQL-запросов.
+    :return: list: Описания регрессий (пустой, если их нет).
+    """
+
+    regressions = []
+    for name, before in baseline["routes"].items():
+        after = current["routes"].get(name)
+        if after is None:
+            regressions.append(f"{name}: маршрут отсутствует в результатах")
+            continue
+        if after["queries"] > before["queries"] + query_threshold:
+            regressions.append(
+                f"{name}: SQL-запросов {before['queries']} -> {after['queries']}"
+            )
+        for metric in ("p50_ms", "p95_ms"):
+            if after[metric] > before[metric] * (1 + latency_threshold):
+                regressions.append(
+                    f"{name}: {metric} {before[metric]} -> {after[metric]}"
+                )
+    return regressions
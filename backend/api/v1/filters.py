@@ -0,0 +1,99 @@
+from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
+
+from food_shop.models import Product, Subcategory
+
+
+class ProductFilter(filters.FilterSet):
+    """
+    Фильтры списка продуктов. Сортировка от новых к старым
+    (-date_add, -id) одна для всех фильтров, а каждый фильтр опирается
+    на составной индекс (поле фильтра, -date_add, -id) модели Product
+    (см. Product.Meta.indexes).
+    Attributes:
+        - price_min: Минимальная стоимость.
+        - price_max: Максимальная стоимость.
+        - subcategory: Идентификатор подкатегории.
+        - category: Идентификатор категории (через подкатегорию).
+        - measurement_unit: Единица измерения.
+        - added_since: Продукты, добавленные не раньше даты.
+    """
+
+    price_min = filters.NumberFilter(field_name="price", lookup_expr="gte")
+    price_max = filters.NumberFilter(field_name="price", lookup_expr="lte")
+    subcategory = filters.NumberFilter(field_name="subcategory_id")
+    category = filters.NumberFilter(field_name="subcategory__category_id")
+    measurement_unit = filters.ChoiceFilter(choices=Product.UNIT_CHOICES)
+    added_since = filters.IsoDateTimeFilter(field_name="date_add", lookup_expr="gte")
+
+    class Meta:
+        model = Product
+        fields = (
+            "price_min",
+            "price_max",
+            "subcategory",
+            "category",
+            "measurement_unit",
+            "added_since",
+        )
+
+
+class SubcategoryFilter(filters.FilterSet):
+    """
+    Фильтры списка подкатегорий.
+    Attributes:
+        - category: Идентификатор категории.
+    """
+
+    category = filters.NumberFilter(field_name="category_id")
+
+    class Meta:
+        model = Subcategory
+        fields = ("category",)
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск продуктов по параметру ?search=.
+    Использует индексированный Product.objects.search() и сортирует
+    результаты по релевантности.
+    Attributes:
+        - search_param: Имя параметра запроса с поисковой строкой.
+    """
+
+    search_param = "search"
+
+    def get_search_term(self, request):
+        """
+        Получить поисковую строку из запроса.
+        :param request: Запрос.
+        :return: Поисковая строка без пробелов по краям.
+        """
+
+        return request.query_params.get(self.search_param, "").strip()
+
+    def filter_queryset(self, request, queryset, view):
+        """
+        Отфильтровать продукты по поисковой строке.
+        :param request: Запрос.
+        :param queryset: QuerySet продуктов.
+        :param view: ViewSet.
+        :return: Найденные продукты, самые релевантные первыми.
+        """
+
+        search_term = self.get_search_term(request)
+        if not search_term:
+            return queryset
+        return queryset.search(search_term).order_by("-search_rank", "-id")
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Поиск по названию продукта (кириллицей"
+                " или латиницей).",
+                "schema": {"type": "string"},
+            },
+        ]
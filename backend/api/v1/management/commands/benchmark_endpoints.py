@@ -0,0 +1,78 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.v1.benchmarks import ROUTES, isolated_run, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет синтетический каталог, пользователей и корзины, затем"
+        " замеряет p50/p95, пропускную способность и число SQL-запросов"
+        " для маршрутов api/v1 и сохраняет результаты в JSON (базовую линию"
+        " для compare_benchmarks). Данные откатываются после замеров, а кэши"
+        " запуска изолированы префиксом ключей (см. isolated_run)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument(
+            "--cart-items",
+            type=int,
+            default=20,
+            help="Сколько позиций в корзине каждого пользователя.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Сколько запросов выполнить на каждый маршрут.",
+        )
+        parser.add_argument(
+            "--routes",
+            nargs="+",
+            choices=[route.name for route in ROUTES],
+            help="Замерить только указанные маршруты.",
+        )
+        parser.add_argument("--output", help="Файл для сохранения результатов.")
+        parser.add_argument(
+            "--keep-data",
+            action="store_true",
+            help="Не откатывать созданные синтетические данные.",
+        )
+
+    def handle(self, *args, **options):
+        for option in ("products", "users", "requests"):
+            if options[option] < 1:
+                raise CommandError(f"--{option} должен быть положительным.")
+        if options["cart_items"] < 0:
+            raise CommandError("--cart-items не может быть отрицательным.")
+
+        with isolated_run(), transaction.atomic():
+            results = run_benchmarks(
+                options["products"],
+                options["users"],
+                options["cart_items"],
+                options["requests"],
+                options["routes"],
+            )
+            if not options["keep_data"]:
+                transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{'маршрут':<28} {'p50, мс':>9} {'p95, мс':>9}"
+            f" {'запросов/с':>11} {'SQL':>4}"
+        )
+        for name, result in results["routes"].items():
+            self.stdout.write(
+                f"{name:<28} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}"
+                f" {result['rps']:>11.1f} {result['queries']:>4}"
+            )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f"Результаты сохранены в {options['output']}.")
+            )
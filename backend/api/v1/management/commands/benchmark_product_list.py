@@ -0,0 +1,84 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+
+from api.v1.views import ProductViewSet
+from food_shop.models import Product
+
+PAGE_SIZES = (10, 100, 1000)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время ответа списка продуктов через ProductSerializer"
+        " и через быстрый путь values() на страницах 10, 100 и 1000"
+        " продуктов и проверяет, что JSON совпадает байт в байт."
+        " Данные можно подготовить командой seed_catalog."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Сколько раз выполнить каждый запрос.",
+        )
+        parser.add_argument(
+            "--page-sizes",
+            type=int,
+            nargs="+",
+            default=list(PAGE_SIZES),
+        )
+
+    def measure(self, view, page_size, repeat):
+        """
+        Выполняет запрос списка repeat раз.
+        Возвращает кортеж (медиана в мс, тело последнего ответа).
+        """
+
+        factory = APIRequestFactory()
+        timings = []
+        content = b""
+        for _ in range(repeat):
+            request = factory.get(
+                "/api/v1/product/", {"limit": page_size}, SERVER_NAME="localhost"
+            )
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append((time.perf_counter() - started) * 1000)
+            content = response.content
+        return statistics.median(timings), content
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        if repeat < 1:
+            raise CommandError("--repeat должен быть положительным.")
+        total = Product.objects.count()
+        if total < max(options["page_sizes"]):
+            self.stderr.write(
+                f"В каталоге {total} продуктов: страницы будут неполными"
+                " (см. manage.py seed_catalog)."
+            )
+
+        slow_view = ProductViewSet.as_view(
+            {"get": "list"}, values_serializer_class=None
+        )
+        fast_view = ProductViewSet.as_view({"get": "list"})
+        self.stdout.write(
+            f"{'limit':>6} {'serializer, мс':>15} {'values(), мс':>13}"
+            f" {'ускорение':>10}"
+        )
+        for page_size in options["page_sizes"]:
+            slow, slow_content = self.measure(slow_view, page_size, repeat)
+            fast, fast_content = self.measure(fast_view, page_size, repeat)
+            if slow_content != fast_content:
+                raise CommandError(
+                    f"limit={page_size}: ответы быстрого пути отличаются."
+                )
+            self.stdout.write(
+                f"{page_size:>6} {slow:>15.2f} {fast:>13.2f}"
+                f" {slow / fast:>9.1f}x"
+            )
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.v1.benchmarks import compare_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает результаты benchmark_endpoints с базовой линией и"
+        " завершается ошибкой, если выросло число SQL-запросов или"
+        " p50/p95 превысили допустимый порог."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("baseline", help="JSON с базовыми результатами.")
+        parser.add_argument("current", help="JSON с текущими результатами.")
+        parser.add_argument(
+            "--latency-threshold",
+            type=float,
+            default=0.2,
+            help="Допустимый относительный рост p50/p95 (0.2 = +20%%).",
+        )
+        parser.add_argument(
+            "--query-threshold",
+            type=int,
+            default=0,
+            help="Допустимый рост числа SQL-запросов на маршрут.",
+        )
+
+    def load(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"{path}: {error}")
+
+    def handle(self, *args, **options):
+        baseline = self.load(options["baseline"])
+        current = self.load(options["current"])
+        if baseline.get("params") != current.get("params"):
+            self.stderr.write(
+                "Параметры запусков различаются: сравнение может быть неточным."
+            )
+        regressions = compare_results(
+            baseline,
+            current,
+            options["latency_threshold"],
+            options["query_threshold"],
+        )
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(f"Обнаружено регрессий: {len(regressions)}.")
+        self.stdout.write(self.style.SUCCESS("Регрессий не обнаружено."))
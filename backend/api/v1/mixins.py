@@ -0,0 +1,235 @@
+import hashlib
+
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from core.cache import get_cache_version, make_cache_key
+from food_shop.slugs import forget_slug, resolve_slug
+
+
+class CachedResponseMixin:
+    """
+    Миксин ReadOnly ViewSet'а, кэширующий сериализованные ответы
+    list и retrieve. При попадании в кэш не выполняется ни одного
+    запроса к БД. Записи инвалидируются сменой версии пространства имен
+    (см. core.cache.bump_cache_version), которую выполняют сигналы.
+    Attributes:
+        - cache_namespace: Пространство имен кэша.
+        - cache_timeout: Время жизни записи в секундах.
+    """
+
+    cache_namespace = None
+    cache_timeout = None
+
+    def get_response_cache_key(self, request):
+        """
+        Ключ кэша ответа: действие и полный URL запроса
+        (хост нужен для абсолютных ссылок пагинации и изображений).
+        """
+
+        return make_cache_key(
+            self.cache_namespace, self.action, request.build_absolute_uri()
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        """
+        Возвращает ответ из кэша или вызывает обработчик и кэширует
+        успешный ответ.
+        :param handler: Обработчик действия (list или retrieve).
+        :param request: Запрос.
+        :return: Ответ.
+        """
+
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.cache_timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalResponseMixin:
+    """
+    Миксин ReadOnly ViewSet'а, добавляющий к ответам list и retrieve
+    строгий ETag и Last-Modified, вычисленные из версии пространства
+    имен кэша. Условный запрос (If-None-Match/If-Modified-Since)
+    получает 304 до выполнения запросов к БД и сериализации.
+    Attributes:
+        - etag_namespace: Пространство имен, версия которого меняется
+            сигналами при любом изменении данных ответа.
+    """
+
+    etag_namespace = None
+
+    def get_etag(self, request, version):
+        """
+        Строгий ETag: версия данных, действие, полный URL и формат ответа.
+        :param request: Запрос.
+        :param version: Версия пространства имен.
+        :return: ETag в кавычках (str).
+        """
+
+        digest = hashlib.md5(
+            ":".join(
+                (
+                    str(version),
+                    self.action,
+                    request.build_absolute_uri(),
+                    request.accepted_media_type or "",
+                )
+            ).encode()
+        ).hexdigest()
+        return f'"{digest}"'
+
+    def get_conditional(self, handler, request, *args, **kwargs):
+        """
+        Отвечает 304, если у клиента актуальная версия, иначе вызывает
+        обработчик и добавляет валидаторы к успешному ответу.
+        Версия - время изменения в микросекундах, поэтому она же
+        служит датой Last-Modified (с точностью до секунды).
+        :param handler: Обработчик действия (list или retrieve).
+        :param request: Запрос.
+        :return: Ответ.
+        """
+
+        version = get_cache_version(self.etag_namespace)
+        etag = self.get_etag(request, version)
+        last_modified = version // 1_000_000
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional(super().retrieve, request, *args, **kwargs)
+
+
+class ValuesResponseMixin:
+    """
+    Миксин ReadOnly ViewSet'а с быстрым путем list и retrieve:
+    строки берутся одним запросом values() и сериализуются
+    values_serializer_class без создания экземпляров моделей.
+    Фильтры и пагинация применяются как обычно.
+    Attributes:
+        - values_serializer_class: Сериализатор строк values()
+            с атрибутом values_fields. Если не задан, используется
+            обычный путь через serializer_class.
+    """
+
+    values_serializer_class = None
+
+    def get_values_queryset(self):
+        """
+        QuerySet строк values() с примененными фильтрами.
+        """
+
+        return self.filter_queryset(self.get_queryset()).values(
+            *self.values_serializer_class.values_fields
+        )
+
+    def get_values_serializer(self, *args, **kwargs):
+        kwargs["context"] = self.get_serializer_context()
+        return self.values_serializer_class(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.get_values_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_values_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_values_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.values_serializer_class is None:
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_values_queryset(),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+        return Response(self.get_values_serializer(row).data)
+
+
+class SlugLookupMixin:
+    """
+    Миксин ReadOnly ViewSet'а: retrieve принимает в URL как числовой
+    идентификатор, так и слаг. Слаг переводится в идентификатор через
+    кэш slug -> id (food_shop.slugs.resolve_slug), а объект выбирается
+    по паре (id, slug), поэтому запрос по слагу стоит столько же, сколько
+    запрос по идентификатору. Если кэш устарел (объект переименован или
+    удален), запись кэша сбрасывается и слаг перечитывается из БД.
+    Attributes:
+        - lookup_slug: Слаг текущего запроса (None для запроса по id).
+    """
+
+    lookup_slug = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.lookup_slug is not None:
+            queryset = queryset.filter(slug=self.lookup_slug)
+        return queryset
+
+    def fetch_by_slug(self, model, slug, fetch):
+        """
+        Выполняет fetch(pk) для идентификатора, найденного по слагу.
+        Если fetch не нашел объект по устаревшей записи кэша,
+        слаг перечитывается из БД и fetch повторяется один раз.
+        :param model: Модель со слагом.
+        :param slug: Слаг.
+        :param fetch: Функция, принимающая идентификатор.
+        :return: Результат fetch.
+        """
+
+        for use_cache in (True, False):
+            pk = resolve_slug(model, slug, use_cache=use_cache)
+            if pk is None:
+                raise Http404
+            try:
+                return fetch(pk)
+            except Http404:
+                if not use_cache:
+                    raise
+                forget_slug(model, slug)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        value = str(self.kwargs[lookup_url_kwarg])
+        if value.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+
+        def fetch(pk):
+            self.kwargs[lookup_url_kwarg] = pk
+            return super(SlugLookupMixin, self).retrieve(
+                request, *args, **{**kwargs, lookup_url_kwarg: pk}
+            )
+
+        self.lookup_slug = value
+        return self.fetch_by_slug(self.get_queryset().model, value, fetch)
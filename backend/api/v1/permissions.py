@@ -12,8 +12,13 @@ class IsOwnerOrReadOnlyOrAdmin(permissions.BasePermission):
             return True
 
         # Разрешить редактирование объекта только автору.
+        # Позиции корзины принадлежат владельцу их продуктовой корзины.
+        if hasattr(obj, "product_cart"):
+            owner_id = obj.product_cart.user_id
+        else:
+            owner_id = obj.user_id
         return (
             request.user.is_authenticated
-            and obj.user == request.user
+            and owner_id == request.user.id
             or request.user.is_staff
         )
@@ -1,6 +1,36 @@
 from rest_framework import serializers
 
-from food_shop.models import Category, Subcategory, Product, ShoppingCartProduct
+from core.constants import LenghtField
+
+from food_shop.models import (
+    CatalogNode,
+    Category,
+    Subcategory,
+    Product,
+    ShoppingCartProduct,
+)
+
+
+def get_icon_variant_urls(variants, request=None):
+    """
+    Ссылки на фото продукта в дополнительных форматах.
+    Parameters:
+        variants (dict | None): Значение Product.icon_variants.
+        request (Request): Запрос для абсолютных ссылок.
+    Returns:
+        dict: Ссылки по полям и форматам,
+            например {"icon_small": {"webp": "http://.../a.webp"}}.
+    """
+    urls = {}
+    for field_name, files in (variants or {}).items():
+        storage = Product._meta.get_field(field_name).storage
+        urls[field_name] = {}
+        for image_format, name in files.items():
+            url = storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[field_name][image_format] = url
+    return urls
 
 
 class SubcategorySerializer(serializers.ModelSerializer):
@@ -55,6 +85,32 @@ class CategorySerializer(serializers.ModelSerializer):
         )
 
 
+class CatalogNodeSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для узлов иерархического каталога.
+    Attributes:
+        - id: Уникальный идентификатор узла.
+        - name: Название узла.
+        - slug: Слаг узла.
+        - parent: Идентификатор родительского узла.
+        - level: Глубина узла в дереве.
+        - category: Идентификатор связанной категории.
+        - subcategory: Идентификатор связанной подкатегории.
+    """
+
+    class Meta:
+        model = CatalogNode
+        fields = (
+            "id",
+            "name",
+            "slug",
+            "parent",
+            "level",
+            "category",
+            "subcategory",
+        )
+
+
 class ProductSerializer(serializers.ModelSerializer):
     """
     Сериализатор для продуктов.
@@ -69,10 +125,13 @@ class ProductSerializer(serializers.ModelSerializer):
         - icon_middle: Средняя иконка продукта.
         - icon_big: Большая иконка продукта.
         - category: Название связанной категории.
+        - icon_variants: Ссылки на фото в дополнительных форматах
+            (WebP, AVIF) по размерам - для выбора формата клиентом.
     """
 
     subcategory = SubcategorySerializer(read_only=True)
     category = serializers.SerializerMethodField()
+    icon_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -87,6 +146,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "icon_middle",
             "icon_big",
             "category",
+            "icon_variants",
         )
 
     @staticmethod
@@ -100,6 +160,129 @@ class ProductSerializer(serializers.ModelSerializer):
         """
         return instance.subcategory.category.name
 
+    def get_icon_variants(self, instance):
+        """
+        Получить ссылки на фото продукта в дополнительных форматах.
+        Parameters:
+            instance (Product): Экземпляр продукта.
+        Returns:
+            dict: Ссылки по полям изображений и форматам.
+        """
+        return get_icon_variant_urls(
+            instance.icon_variants, self.context.get("request")
+        )
+
+
+class ProductValuesSerializer:
+    """
+    Быстрая read-only сериализация продуктов из строк values().
+    Повторяет вывод ProductSerializer байт в байт, но не создает
+    экземпляры моделей и не проходит через поля DRF для каждой строки:
+    подкатегория, категория и изображения берутся из колонок одного
+    запроса с JOIN.
+    Attributes:
+        - values_fields: Колонки values(), нужные для ответа
+            (date_add - для позиции курсора keyset-пагинации).
+        - image_fields: Поля изображений продукта.
+    """
+
+    values_fields = (
+        "id",
+        "name",
+        "slug",
+        "subcategory_id",
+        "subcategory__name",
+        "subcategory__slug",
+        "subcategory__icon",
+        "subcategory__category__name",
+        "price",
+        "measurement_unit",
+        "icon_small",
+        "icon_middle",
+        "icon_big",
+        "icon_variants",
+        "date_add",
+    )
+    image_fields = ("icon_small", "icon_middle", "icon_big")
+    price_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    def __init__(self, instance=None, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        self.request = self.context.get("request")
+        self.storages = {
+            name: Product._meta.get_field(name).storage
+            for name in self.image_fields
+        }
+        self.subcategory_storage = Subcategory._meta.get_field("icon").storage
+
+    def get_image_url(self, storage, name):
+        """
+        Получить ссылку на изображение так же, как serializers.ImageField.
+        Parameters:
+            storage (Storage): Хранилище поля изображения.
+            name (str): Имя файла изображения.
+        Returns:
+            str: Абсолютная ссылка на изображение или None.
+        """
+        if not name:
+            return None
+        url = storage.url(name)
+        if self.request is not None:
+            return self.request.build_absolute_uri(url)
+        return url
+
+    def to_representation(self, row):
+        """
+        Получить представление продукта из строки values().
+        Parameters:
+            row (dict): Строка values() с колонками values_fields.
+        Returns:
+            dict: Представление продукта.
+        """
+        category = row["subcategory__category__name"]
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "slug": row["slug"],
+            "subcategory": {
+                "id": row["subcategory_id"],
+                "name": row["subcategory__name"],
+                "slug": row["subcategory__slug"],
+                "category": category,
+                "icon": self.get_image_url(
+                    self.subcategory_storage, row["subcategory__icon"]
+                ),
+            },
+            "price": self.price_field.to_representation(row["price"]),
+            "measurement_unit": row["measurement_unit"],
+            "icon_small": self.get_image_url(
+                self.storages["icon_small"], row["icon_small"]
+            ),
+            "icon_middle": self.get_image_url(
+                self.storages["icon_middle"], row["icon_middle"]
+            ),
+            "icon_big": self.get_image_url(
+                self.storages["icon_big"], row["icon_big"]
+            ),
+            "category": category,
+            "icon_variants": get_icon_variant_urls(
+                row["icon_variants"], self.request
+            ),
+        }
+
+    @property
+    def data(self):
+        """
+        Получить сериализованные данные.
+        Returns:
+            list | dict: Представления продуктов (many=True) или продукта.
+        """
+        if self.many:
+            return [self.to_representation(row) for row in self.instance]
+        return self.to_representation(self.instance)
+
 
 class ShoppingCartProductSerializer(serializers.ModelSerializer):
     """
@@ -113,7 +296,10 @@ class ShoppingCartProductSerializer(serializers.ModelSerializer):
     product = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.all(),
     )
-    amount = serializers.IntegerField()
+    amount = serializers.IntegerField(
+        min_value=LenghtField.MIN_AMOUNT_PRODUCT.value,
+        max_value=LenghtField.MAX_AMOUNT_PRODUCT.value,
+    )
     total_price = serializers.SerializerMethodField()
 
     class Meta:
@@ -127,12 +313,105 @@ class ShoppingCartProductSerializer(serializers.ModelSerializer):
         """
         Получить общую стоимость товара.
         Parameters:
-            instance (ShoppingCartProduct): Экземпляр товара в корзине покупок.
+            instance (ShoppingCartProduct | dict): Экземпляр товара в корзине
+                покупок или его проверенные данные.
         Returns:
             Общая стоимость товара.
         """
 
-        return instance["product"].price * instance["amount"]
+        if isinstance(instance, dict):
+            return instance["product"].price * instance["amount"]
+        return instance.product.price * instance.amount
+
+    def validate_product(self, product):
+        """
+        Проверить, что при изменении позиции продукт не совпадает
+        с продуктом другой позиции той же корзины.
+        Parameters:
+            product (Product): Новый продукт позиции.
+        Returns:
+            Product: Проверенный продукт.
+        """
+
+        instance = self.instance
+        if (
+            isinstance(instance, ShoppingCartProduct)
+            and product.pk != instance.product_id
+            and ShoppingCartProduct.objects.filter(
+                product_cart_id=instance.product_cart_id, product=product
+            ).exists()
+        ):
+            raise serializers.ValidationError("Этот продукт уже есть в корзине.")
+        return product
+
+
+class ShoppingCartOperationSerializer(serializers.Serializer):
+    """
+    Сериализатор одной операции пакетного изменения корзины.
+    Attributes:
+        - op: Операция: add - добавить, set - установить количество,
+            reduce - уменьшить, remove - удалить позицию.
+        - product: Идентификатор продукта.
+        - amount: Количество (не нужно для remove).
+    """
+
+    OPERATIONS = ("add", "set", "reduce", "remove")
+
+    op = serializers.ChoiceField(choices=OPERATIONS)
+    product = serializers.IntegerField(min_value=1)
+    amount = serializers.IntegerField(
+        min_value=LenghtField.MIN_AMOUNT_PRODUCT.value,
+        max_value=LenghtField.MAX_AMOUNT_PRODUCT.value,
+        required=False,
+    )
+
+    def validate(self, attrs):
+        """
+        Проверить, что количество передано для всех операций, кроме remove.
+        Parameters:
+            attrs (dict): Данные операции.
+        Returns:
+            dict: Проверенные данные операции.
+        """
+        if attrs["op"] != "remove" and "amount" not in attrs:
+            raise serializers.ValidationError(
+                {"amount": "Количество обязательно для этой операции."}
+            )
+        return attrs
+
+
+class ShoppingCartBatchSerializer(serializers.Serializer):
+    """
+    Сериализатор пакетного изменения корзины.
+    Attributes:
+        - operations: Список операций, применяемых по порядку.
+    """
+
+    operations = ShoppingCartOperationSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=LenghtField.MAX_CART_BATCH_OPERATIONS.value,
+    )
+
+    def validate_operations(self, operations):
+        """
+        Проверить, что все продукты из операций существуют
+        (одним запросом на весь пакет).
+        Parameters:
+            operations (list): Список операций.
+        Returns:
+            list: Проверенный список операций.
+        """
+        product_ids = {operation["product"] for operation in operations}
+        existing = set(
+            Product.objects.filter(id__in=product_ids).values_list("id", flat=True)
+        )
+        missing = sorted(product_ids - existing)
+        if missing:
+            raise serializers.ValidationError(
+                f"Продукты не найдены: {', '.join(map(str, missing))}."
+            )
+        return operations
 
 
 class ShoppingCartSummarySerializer(serializers.Serializer):
@@ -2,7 +2,9 @@ from django.urls import include, path
 from rest_framework import routers
 
 from api.v1.views import (
+    CatalogNodeViewSet,
     CategoryViewSet,
+    GuestCartViewSet,
     SubcategoryViewSet,
     ProductViewSet,
     ShoppingCartProduct, ShoppingCartProductViewSet,
@@ -15,7 +17,9 @@ router = routers.DefaultRouter()
 router.register(r"category", CategoryViewSet, basename="category")
 router.register(r"subcategory", SubcategoryViewSet, basename="subcategory")
 router.register(r"product", ProductViewSet, basename="product")
+router.register(r"catalog", CatalogNodeViewSet, basename="catalog")
 router.register(r"shoppingcartproduct", ShoppingCartProductViewSet, basename="shoppingcartproduct")
+router.register(r"guestcart", GuestCartViewSet, basename="guestcart")
 
 
 
@@ -1,19 +1,44 @@
-from django.db.models import F, Sum
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from rest_framework.generics import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
+from rest_framework.exceptions import Throttled
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import viewsets, status, permissions
 
+from api.v1.filters import ProductFilter, ProductSearchFilter, SubcategoryFilter
+from api.v1.mixins import (
+    CachedResponseMixin,
+    ConditionalResponseMixin,
+    SlugLookupMixin,
+    ValuesResponseMixin,
+)
 from api.v1.permissions import IsOwnerOrReadOnlyOrAdmin
 from api.v1.serializers import (
+    CatalogNodeSerializer,
     CategorySerializer,
     SubcategorySerializer,
     ProductSerializer,
+    ProductValuesSerializer,
+    ShoppingCartBatchSerializer,
+    ShoppingCartOperationSerializer,
     ShoppingCartProductSerializer,
     ShoppingCartSummarySerializer,
 )
-from core.pagination import PaginationCust
+from core.constants import CacheNamespace, CacheTimeout
+from core.pagination import PaginationCust, SwitchablePaginationMixin
+from food_shop.exports import EXPORT_FORMATS, export_catalog
+from food_shop.guest_cart import (
+    GUEST_CART_HEADER,
+    GuestCartBusyError,
+    GuestCartStore,
+    get_request_guest_id,
+    new_guest_cart_id,
+)
 from food_shop.models import (
+    CatalogNode,
     Category,
     Subcategory,
     Product,
@@ -22,55 +47,272 @@ from food_shop.models import (
 )
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(
+    ConditionalResponseMixin,
+    CachedResponseMixin,
+    SlugLookupMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """
     Кастомный ViewSet для работы с категориями.
+    Ответы list и retrieve кэшируются и сбрасываются сигналами
+    при изменении категорий и подкатегорий, а также снабжаются
+    ETag/Last-Modified версии каталога. Категория адресуется
+    идентификатором или слагом, а подкатегория и продукт - вложенными
+    путями /category/{slug}/{subcategory_slug}/{product_slug}/.
     Attributes:
         - queryset: QuerySet для получения всех категорий.
         - serializer_class: Сериализатор для категорий.
         - permission_classes: Классы разрешений для доступа к категориям.
         - pagination_class: Пагинация для категорий.
+        - cache_namespace: Пространство имен кэша дерева категорий.
+        - cache_timeout: Время жизни кэша дерева категорий.
+        - etag_namespace: Пространство имен версии каталога.
+        - query_budgets: Бюджеты SQL-запросов по действиям
+            (проверяются тестами, см. core.query_budget).
     """
 
     queryset = Category.objects.prefetch_related("subcategories")
     serializer_class = CategorySerializer
     permission_classes = (AllowAny,)
     pagination_class = PaginationCust
+    cache_namespace = CacheNamespace.CATEGORY_TREE
+    cache_timeout = CacheTimeout.CATEGORY_TREE.value
+    etag_namespace = CacheNamespace.CATALOG
+    query_budgets = {"list": 3, "retrieve": 2, "subcategory": 1, "product": 1}
 
+    def get_category_filter(self, prefix):
+        """
+        Условие на категорию из URL (идентификатор или слаг).
+        :param prefix: Путь к категории от выбираемой модели.
+        :return: Словарь условий для filter().
+        """
 
-class SubcategoryViewSet(viewsets.ReadOnlyModelViewSet):
+        value = str(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if value.isdigit():
+            return {f"{prefix}__pk": value}
+        return {f"{prefix}__slug": value}
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path=r"(?P<subcategory_slug>[^/.]+)",
+        url_name="subcategory",
+    )
+    def subcategory(self, request, pk=None, subcategory_slug=None):
+        """
+        Выводит подкатегорию категории по слагу.
+        :param request: Запрос.
+        :param pk: Идентификатор или слаг категории.
+        :param subcategory_slug: Слаг подкатегории.
+        :return: Подкатегория.
+        """
+
+        queryset = Subcategory.objects.select_related("category").filter(
+            slug=subcategory_slug, **self.get_category_filter("category")
+        )
+        subcategory = self.fetch_by_slug(
+            Subcategory,
+            subcategory_slug,
+            lambda subcategory_pk: get_object_or_404(queryset, pk=subcategory_pk),
+        )
+        serializer = SubcategorySerializer(
+            subcategory, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path=r"(?P<subcategory_slug>[^/.]+)/(?P<product_slug>[^/.]+)",
+        url_name="product",
+    )
+    def product(self, request, pk=None, subcategory_slug=None, product_slug=None):
+        """
+        Выводит продукт по цепочке слагов категории и подкатегории
+        одним запросом по идентификатору из кэша слагов.
+        :param request: Запрос.
+        :param pk: Идентификатор или слаг категории.
+        :param subcategory_slug: Слаг подкатегории.
+        :param product_slug: Слаг продукта.
+        :return: Продукт.
+        """
+
+        queryset = Product.objects.filter(
+            slug=product_slug,
+            subcategory__slug=subcategory_slug,
+            **self.get_category_filter("subcategory__category"),
+        ).values(*ProductValuesSerializer.values_fields)
+        row = self.fetch_by_slug(
+            Product,
+            product_slug,
+            lambda product_pk: get_object_or_404(queryset, pk=product_pk),
+        )
+        serializer = ProductValuesSerializer(
+            row, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+
+class SubcategoryViewSet(
+    ConditionalResponseMixin, SlugLookupMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Кастомный ViewSet для работы с подкатегориями.
+    Подкатегория адресуется идентификатором или слагом.
     Attributes:
         - queryset: QuerySet для получения всех подкатегорий с привязкой к категориям.
         - serializer_class: Сериализатор для подкатегорий.
         - permission_classes: Классы разрешений для доступа к подкатегориям.
         - pagination_class: Пагинация для подкатегорий.
+        - filterset_class: Фильтры подкатегорий (?category=).
+        - etag_namespace: Пространство имен версии каталога.
+        - query_budgets: Бюджеты SQL-запросов по действиям.
     """
 
     queryset = Subcategory.objects.select_related("category")
     serializer_class = SubcategorySerializer
     permission_classes = (AllowAny,)
     pagination_class = PaginationCust
-
-
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+    filterset_class = SubcategoryFilter
+    etag_namespace = CacheNamespace.CATALOG
+    query_budgets = {"list": 2, "retrieve": 1}
+
+
+class ProductViewSet(
+    ConditionalResponseMixin,
+    SlugLookupMixin,
+    ValuesResponseMixin,
+    SwitchablePaginationMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """
     Кастомный ViewSet для работы с продуктами.
+    Продукт адресуется идентификатором или слагом.
     Атрибуты:
-    - queryset: Запрос к модели Product с предварительной загрузкой
-     связанных моделей: "subcategory" и "category"
+    - queryset: Запрос к модели Product с загрузкой связанных
+     моделей "subcategory" и "category" одним JOIN.
     - serializer_class: Сериализатор для продуктов.
+    - values_serializer_class: Быстрый сериализатор строк values()
+     для list и retrieve (тот же JSON, что и serializer_class).
     - permission_classes: Классы разрешений для доступа к продуктам.
-    - pagination_class: Пагинация для продуктов.
+    - pagination_class: Пагинация для продуктов. С параметром
+     ?pagination=cursor используется keyset-пагинация в порядке
+     сортировки фильтров (по умолчанию (date_add, id)); для результатов
+     поиска ?search= она недоступна (ответ 400).
+    - filter_backends: Фильтры, включая полнотекстовый поиск ?search=.
+    - filterset_class: Фильтры по цене, подкатегории, категории,
+     единице измерения и дате добавления.
+    - etag_namespace: Пространство имен версии каталога для
+     ETag/Last-Modified.
+    - query_budgets: Бюджеты SQL-запросов по действиям.
     """
 
-    queryset = Product.objects.select_related("subcategory").prefetch_related(
-        "subcategory__category"
-    )
+    queryset = Product.objects.select_related("subcategory__category")
     serializer_class = ProductSerializer
+    values_serializer_class = ProductValuesSerializer
     permission_classes = (AllowAny,)
     pagination_class = PaginationCust
+    filter_backends = (DjangoFilterBackend, ProductSearchFilter)
+    filterset_class = ProductFilter
+    etag_namespace = CacheNamespace.CATALOG
+    query_budgets = {"list": 2, "retrieve": 1, "export": 1}
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        permission_classes=(permissions.IsAdminUser,),
+    )
+    def export(self, request):
+        """
+        Потоковая выгрузка всего каталога продуктов (только для
+        администраторов). Строки отдаются по мере чтения из БД одним
+        запросом, ответ не собирается в памяти.
+        Параметр export_format: ndjson (по умолчанию) или csv;
+        параметр after_id: продолжить выгрузку после продукта с этим id.
+        :param request: Запрос.
+        :return: Потоковый ответ с выгрузкой.
+        """
+
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {
+                    "export_format": "Доступные форматы: "
+                    f"{', '.join(EXPORT_FORMATS)}."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        after_id = request.query_params.get("after_id")
+        if after_id is not None and not after_id.isdigit():
+            return Response(
+                {"after_id": "Ожидается целое число."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        _, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            export_catalog(
+                export_format,
+                after_id=int(after_id) if after_id is not None else None,
+                header=after_id is None,
+            ),
+            content_type=f"{content_type}; charset=utf-8",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="catalog.{export_format}"'
+        )
+        return response
+
+
+class CatalogNodeViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Кастомный ViewSet для работы с иерархическим каталогом.
+    Attributes:
+        - queryset: QuerySet узлов каталога в порядке обхода дерева.
+        - serializer_class: Сериализатор для узлов каталога.
+        - permission_classes: Классы разрешений для доступа к каталогу.
+        - pagination_class: Пагинация для узлов каталога.
+        - query_budgets: Бюджеты SQL-запросов по действиям.
+    """
+
+    queryset = CatalogNode.objects.all()
+    serializer_class = CatalogNodeSerializer
+    permission_classes = (AllowAny,)
+    pagination_class = PaginationCust
+    query_budgets = {"list": 2, "retrieve": 1, "products": 3, "breadcrumbs": 2}
+
+    @action(detail=True, methods=["get"], url_path="products")
+    def products(self, request, pk=None):
+        """
+        Выводит продукты всего поддерева узла каталога.
+        :param request: Запрос.
+        :param pk: Идентификатор узла.
+        :return: Страница продуктов поддерева.
+        """
+
+        node = self.get_object()
+        queryset = node.get_products().select_related("subcategory__category")
+        page = self.paginate_queryset(queryset)
+        serializer = ProductSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"], url_path="breadcrumbs")
+    def breadcrumbs(self, request, pk=None):
+        """
+        Выводит цепочку предков узла от корня до самого узла.
+        :param request: Запрос.
+        :param pk: Идентификатор узла.
+        :return: Список узлов от корня дерева до текущего узла.
+        """
+
+        node = self.get_object()
+        serializer = self.get_serializer(
+            node.get_ancestors(include_self=True), many=True
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class ShoppingCartProductViewSet(viewsets.ModelViewSet):
@@ -82,11 +324,24 @@ class ShoppingCartProductViewSet(viewsets.ModelViewSet):
         serializer_class (Serializer): Класс сериализатора для продуктовой корзины.
         permission_classes (tuple): Классы разрешений для доступа к продуктовой корзине.
         pagination_class (Paginator): Класс пагинации для продуктовой корзины.
+        query_budgets (dict): Бюджеты SQL-запросов по действиям.
     """
 
     queryset = ShoppingCartProduct.objects.all()
     serializer_class = ShoppingCartProductSerializer
     pagination_class = PaginationCust
+    query_budgets = {
+        "list": 2,
+        "retrieve": 1,
+        "create": 9,
+        "update": 6,
+        "partial_update": 6,
+        "destroy": 5,
+        "reduce_product": 5,
+        "batch": 9,
+        "composition_basket_sum": 1,
+        "clear_product_cart": 5,
+    }
 
     def get_permissions(self):
         """
@@ -112,6 +367,8 @@ class ShoppingCartProductViewSet(viewsets.ModelViewSet):
 
         if self.action == "composition_basket":
             return ShoppingCartSummarySerializer
+        if self.action == "batch":
+            return ShoppingCartBatchSerializer
         return ShoppingCartProductSerializer
 
     def get_queryset(self):
@@ -122,34 +379,26 @@ class ShoppingCartProductViewSet(viewsets.ModelViewSet):
 
         user = self.request.user
         return (
-            ShoppingCartProduct.objects.select_related("product_cart")
-            .prefetch_related("product")
+            ShoppingCartProduct.objects.select_related("product_cart", "product")
             .filter(product_cart__user=user)
         )
 
     def perform_create(self, serializer):
         """
         Добавляет продукт в корзину или обновляет (увеличивает) количество,
-        если он уже в корзине.
+        если он уже в корзине. Увеличение выполняется атомарно в БД
+        (см. ProductCart.add_product) вместе с итогами корзины.
         :param serializer: Сериализатор, содержащий данные о продукте и количестве.
         :return: Ответ с данными о добавленном/обновленном продукте.
         """
 
         try:
             user = self.request.user
-            product_id = serializer.validated_data["product"].id
+            product = serializer.validated_data["product"]
             amount = serializer.validated_data["amount"]
 
             product_cart, _ = ProductCart.objects.get_or_create(user=user)
-            shopping_cart_product, created = ShoppingCartProduct.objects.get_or_create(
-                product_cart=product_cart,
-                product_id=product_id,
-                defaults={"amount": amount},
-            )
-
-            if not created:
-                shopping_cart_product.amount += amount
-                shopping_cart_product.save()
+            shopping_cart_product, _ = product_cart.add_product(product, amount)
 
             serializer = self.get_serializer(shopping_cart_product)
             return Response(
@@ -162,28 +411,44 @@ class ShoppingCartProductViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         """
-        Обновляет данные о продукте в корзине.
+        Обновляет данные о продукте в корзине и итоги корзины
+        на разницу между новой и прежней стоимостью позиции.
+        Позиция блокируется (select_for_update) до чтения прежнего
+        количества, чтобы параллельные изменения не искажали итоги.
         :param serializer: Сериализатор, содержащий данные о продукте.
-        :return: Ответ с данными об обновленном продукте.
         """
-        try:
-            instance = serializer.instance
-            serializer.validated_data.get("amount", instance.amount)
-            serializer.save()
 
-        except Exception as e:
-            return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            instance = (
+                ShoppingCartProduct.objects.select_for_update(of=("self",))
+                .select_related("product_cart", "product")
+                .get(pk=serializer.instance.pk)
+            )
+            old_amount = instance.amount
+            old_price = instance.product.price * old_amount
+            serializer.instance = instance
+            instance = serializer.save()
+            instance.product_cart.apply_totals_delta(
+                amount=instance.amount - old_amount,
+                price=instance.product.price * instance.amount - old_price,
+            )
 
     def perform_destroy(self, instance):
         """
-        Удаляет продукт из корзины.
+        Удаляет продукт из корзины и вычитает его из итогов корзины.
         :param instance: Экземпляр продукта для удаления.
         :return: Ответ с сообщением об успешном удалении продукта.
         """
 
         try:
             instance_id = instance.id
-            instance.delete()
+            with transaction.atomic():
+                instance.delete()
+                instance.product_cart.apply_totals_delta(
+                    amount=-instance.amount,
+                    price=-instance.product.price * instance.amount,
+                    items=-1,
+                )
             return Response(
                 {"message": "Продукт успешно удален", "id": instance_id},
                 status=status.HTTP_204_NO_CONTENT,
@@ -202,7 +467,8 @@ class ShoppingCartProductViewSet(viewsets.ModelViewSet):
     )
     def reduce_product(self, request):
         """
-        Уменьшает количество продукта в корзине.
+        Уменьшает количество продукта в корзине текущего пользователя.
+        Если количество доходит до нуля, позиция удаляется из корзины.
         :param request: Запрос, содержащий данные о продукте и количестве.
         :return: Ответ с сообщением об успешном уменьшении количества продукта.
         """
@@ -210,22 +476,76 @@ class ShoppingCartProductViewSet(viewsets.ModelViewSet):
         product_id = request.data.get("product")
         amount = request.data.get("amount")
 
+        if not isinstance(amount, int) or amount <= 0:
+            return Response(
+                {"message": "Количество должно быть положительным числом."},
+                status=400,
+            )
         try:
-            product = ShoppingCartProduct.objects.get(product_id=product_id)
-            if amount > 0:
-                product.amount -= amount
-                product.save()
-                return Response(
-                    {"message": "Количество продукта успешно уменьшено."}, status=200
+            with transaction.atomic():
+                product = (
+                    ShoppingCartProduct.objects.select_related(
+                        "product_cart", "product"
+                    )
+                    .select_for_update()
+                    .get(product_id=product_id, product_cart__user=request.user)
                 )
-            else:
-                return Response(
-                    {"message": "Количество должно быть положительным числом."},
-                    status=400,
+                amount = min(amount, product.amount)
+                product.amount -= amount
+                if product.amount:
+                    product.save(update_fields=["amount"])
+                else:
+                    product.delete()
+                product.product_cart.apply_totals_delta(
+                    amount=-amount,
+                    price=-product.product.price * amount,
+                    items=-int(not product.amount),
                 )
+            return Response(
+                {"message": "Количество продукта успешно уменьшено."}, status=200
+            )
         except ShoppingCartProduct.DoesNotExist:
             return Response({"message": "Продукт не найден в корзине."}, status=404)
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="batch",
+        permission_classes=(permissions.IsAuthenticated,),
+    )
+    def batch(self, request):
+        """
+        Применяет к корзине пакет операций add/set/reduce/remove
+        в одной транзакции, чтобы синхронизация корзины клиента
+        выполнялась одним запросом с фиксированным числом обращений к БД.
+        :param request: Запрос со списком операций в поле operations.
+        :return: Ответ с итоговым составом корзины и ее итогами.
+        """
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        product_cart, _ = ProductCart.objects.get_or_create(user=request.user)
+        try:
+            product_cart.apply_operations(serializer.validated_data["operations"])
+        except IntegrityError:
+            return Response(
+                {"detail": "Корзина изменена параллельным запросом, повторите."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        product_cart.refresh_from_db()
+        items = ShoppingCartProduct.objects.select_related("product").filter(
+            product_cart=product_cart
+        )
+        data = {
+            "products": ShoppingCartProductSerializer(items, many=True).data,
+            "total_amount": product_cart.total_amount,
+            "total_price": str(product_cart.total_price),
+            "item_count": product_cart.item_count,
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
     @action(
         detail=False,
         methods=["get"],
@@ -236,25 +556,32 @@ class ShoppingCartProductViewSet(viewsets.ModelViewSet):
         """
         Выводит состав корзины с подсчетом количества товаров и
             суммы стоимости товаров в корзине.
+        Итоги берутся из полей корзины, поэтому ответ строится
+            одним запросом без агрегации по позициям.
         :param request: Запрос.
         :return: Ответ с данными о составе корзины,
             количестве товаров и сумме стоимости товаров.
         """
 
-        user = request.user
-        products = ShoppingCartProduct.objects.filter(
-            product_cart__user=user
-        ).values_list("product__name", flat=True)
-        total_data = ShoppingCartProduct.objects.filter(
-            product_cart__user=user
-        ).aggregate(
-            total_amount=Sum("amount"),
-            total_price=Sum(F("amount") * F("product__price")),
+        rows = list(
+            ShoppingCartProduct.objects.filter(
+                product_cart__user=request.user
+            ).values_list(
+                "product__name",
+                "product_cart__total_amount",
+                "product_cart__total_price",
+                "product_cart__item_count",
+            )
         )
+        if rows:
+            _, total_amount, total_price, item_count = rows[0]
+        else:
+            total_amount, total_price, item_count = None, None, 0
         data = {
-            "Продукты": "; ".join(products) ,
-            "Общее количество продуктов": total_data["total_amount"],
-            "Общая сумма продуктов": f"{total_data['total_price']} рублей",
+            "Продукты": "; ".join(row[0] for row in rows),
+            "Общее количество продуктов": total_amount,
+            "Общая сумма продуктов": f"{total_price} рублей",
+            "Количество позиций": item_count,
         }
         return Response(data, status=status.HTTP_200_OK)
 
@@ -274,7 +601,11 @@ class ShoppingCartProductViewSet(viewsets.ModelViewSet):
         user = request.user
         try:
             product_cart = ProductCart.objects.get(user=user)
-            product_cart.shopping_cart_products.all().delete()
+            with transaction.atomic():
+                product_cart.shopping_cart_products.all().delete()
+                ProductCart.objects.filter(pk=product_cart.pk).update(
+                    total_amount=0, total_price=0, item_count=0
+                )
             return Response(
                 {"detail": "Корзина полностью очищена!"},
                 status=status.HTTP_204_NO_CONTENT,
@@ -284,3 +615,287 @@ class ShoppingCartProductViewSet(viewsets.ModelViewSet):
                 {"detail": "Корзина пользователя не найдена"},
                 status=status.HTTP_404_NOT_FOUND,
             )
+
+
+class GuestCartViewSet(viewsets.ViewSet):
+    """
+    ViewSet гостевой корзины с тем же набором действий, что и
+    ShoppingCartProductViewSet. Корзина хранится в кэше
+    (food_shop.guest_cart), а снимок записывается в БД после фиксации
+    запроса или фоновым потоком (GUEST_CART_FLUSH_INTERVAL); с фоновой
+    записью изменения корзины не обращаются к основной БД. Клиент передает
+    подписанный идентификатор корзины в заголовке X-Guest-Cart-Id
+    и получает его в ответе при создании корзины. Позиция корзины
+    адресуется идентификатором продукта. При входе через djoser
+    с этим заголовком корзина переносится в корзину пользователя.
+    Атрибуты:
+        permission_classes (tuple): Доступ без аутентификации.
+        authentication_classes (tuple): Токен не проверяется.
+        query_budgets (dict): Бюджеты SQL-запросов по действиям
+            (только чтение продуктов при фоновой записи снимков).
+    """
+
+    permission_classes = (AllowAny,)
+    authentication_classes = ()
+    query_budgets = {
+        "list": 1,
+        "create": 1,
+        "update": 1,
+        "partial_update": 1,
+        "destroy": 0,
+        "reduce_product": 0,
+        "batch": 2,
+        "composition_basket_sum": 1,
+        "clear_product_cart": 0,
+    }
+    signed_id = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.store = GuestCartStore()
+        self.guest_id = get_request_guest_id(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.signed_id is not None:
+            response[GUEST_CART_HEADER] = self.signed_id
+        return response
+
+    def get_amounts(self):
+        """
+        Текущая корзина гостя (пустая, если корзины еще нет).
+        :return: Количество по идентификаторам продуктов.
+        """
+
+        if self.guest_id is None:
+            return {}
+        return self.store.get(self.guest_id)
+
+    def call_store(self, method, *args):
+        """
+        Вызывает изменяющий метод хранилища корзин; если корзину
+        изменяет другой запрос дольше допустимого, отвечает 429.
+        :param method: Метод GuestCartStore.
+        :param args: Аргументы метода.
+        :return: Результат метода.
+        """
+
+        try:
+            return method(*args)
+        except GuestCartBusyError:
+            raise Throttled(
+                wait=CacheTimeout.GUEST_CART_LOCK.value,
+                detail="Корзина изменяется другим запросом, повторите позже.",
+            )
+
+    def get_items(self, amounts):
+        """
+        Позиции корзины с ценами из каталога (один запрос).
+        :param amounts: Количество по идентификаторам продуктов.
+        :return: Список позиций и словарь названий продуктов.
+        """
+
+        products = {
+            row["id"]: row
+            for row in Product.objects.filter(id__in=amounts).values(
+                "id", "name", "price"
+            )
+        }
+        items = [
+            {
+                "product": product_id,
+                "amount": amount,
+                "total_price": products[product_id]["price"] * amount,
+            }
+            for product_id, amount in amounts.items()
+            if product_id in products
+        ]
+        return items, products
+
+    def cart_response(self, amounts, status_code=status.HTTP_200_OK):
+        items, _ = self.get_items(amounts)
+        return Response(
+            {
+                "products": items,
+                "total_amount": sum(item["amount"] for item in items),
+                "total_price": str(sum(item["total_price"] for item in items)),
+                "item_count": len(items),
+            },
+            status=status_code,
+        )
+
+    def apply(self, operations, require=None):
+        """
+        Применяет операции к корзине гостя атомарно (под блокировкой
+        корзины), создавая идентификатор корзины при первой записи.
+        :param operations: Операции для apply_cart_operations.
+        :param require: Продукт, который должен быть в корзине.
+        :return: Сохраненная корзина или None, если продукта require
+            в корзине нет.
+        """
+
+        if self.guest_id is None:
+            if require is not None:
+                return None
+            self.guest_id, self.signed_id = new_guest_cart_id()
+        return self.call_store(self.store.update, self.guest_id, operations, require)
+
+    def list(self, request):
+        """
+        Выводит позиции гостевой корзины.
+        :param request: Запрос.
+        :return: Ответ со списком позиций.
+        """
+
+        items, _ = self.get_items(self.get_amounts())
+        return Response(items)
+
+    def create(self, request):
+        """
+        Добавляет продукт в гостевую корзину или увеличивает его количество.
+        :param request: Запрос, содержащий данные о продукте и количестве.
+        :return: Ответ с данными о добавленном/обновленном продукте.
+        """
+
+        serializer = ShoppingCartProductSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        product = serializer.validated_data["product"]
+        amounts = self.apply(
+            [
+                {
+                    "op": "add",
+                    "product": product.id,
+                    "amount": serializer.validated_data["amount"],
+                }
+            ]
+        )
+        return Response(
+            {
+                "message": "Продукт успешно добавлен/обновлен!",
+                "product": product.id,
+                "amount": amounts[product.id],
+                "total_price": product.price * amounts[product.id],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def update(self, request, pk=None):
+        """
+        Устанавливает количество продукта в гостевой корзине.
+        :param request: Запрос с новым количеством.
+        :param pk: Идентификатор продукта.
+        :return: Ответ с обновленной корзиной.
+        """
+
+        serializer = ShoppingCartOperationSerializer(
+            data={"op": "set", "product": pk, "amount": request.data.get("amount")}
+        )
+        serializer.is_valid(raise_exception=True)
+        amounts = self.apply(
+            [serializer.validated_data],
+            require=serializer.validated_data["product"],
+        )
+        if amounts is None:
+            return Response(
+                {"detail": "Такого продукта в корзине нет!"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return self.cart_response(amounts)
+
+    partial_update = update
+
+    def destroy(self, request, pk=None):
+        """
+        Удаляет продукт из гостевой корзины.
+        :param request: Запрос.
+        :param pk: Идентификатор продукта.
+        :return: Ответ с сообщением об удалении.
+        """
+
+        if not str(pk).isdigit() or self.apply(
+            [{"op": "remove", "product": int(pk)}], require=int(pk)
+        ) is None:
+            return Response(
+                {"detail": "Такого продукта в корзине нет!"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["post"], url_path="reduce_product")
+    def reduce_product(self, request):
+        """
+        Уменьшает количество продукта в гостевой корзине.
+        Если количество доходит до нуля, позиция удаляется.
+        :param request: Запрос, содержащий данные о продукте и количестве.
+        :return: Ответ с сообщением об уменьшении количества.
+        """
+
+        serializer = ShoppingCartOperationSerializer(
+            data={**request.data, "op": "reduce"}
+        )
+        if not serializer.is_valid():
+            return Response(
+                {"message": "Количество должно быть положительным числом."},
+                status=400,
+            )
+        amounts = self.apply(
+            [serializer.validated_data],
+            require=serializer.validated_data["product"],
+        )
+        if amounts is None:
+            return Response({"message": "Продукт не найден в корзине."}, status=404)
+        return Response(
+            {"message": "Количество продукта успешно уменьшено."}, status=200
+        )
+
+    @action(detail=False, methods=["post"], url_path="batch")
+    def batch(self, request):
+        """
+        Применяет к гостевой корзине пакет операций add/set/reduce/remove.
+        :param request: Запрос со списком операций в поле operations.
+        :return: Ответ с итоговым составом корзины и ее итогами.
+        """
+
+        serializer = ShoppingCartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self.cart_response(self.apply(serializer.validated_data["operations"]))
+
+    @action(detail=False, methods=["get"], url_path="composition_basket_sum")
+    def composition_basket_sum(self, request):
+        """
+        Выводит состав гостевой корзины с количеством и суммой товаров.
+        :param request: Запрос.
+        :return: Ответ с данными о составе корзины.
+        """
+
+        items, products = self.get_items(self.get_amounts())
+        data = {
+            "Продукты": "; ".join(
+                products[item["product"]]["name"] for item in items
+            ),
+            "Общее количество продуктов": sum(item["amount"] for item in items),
+            "Общая сумма продуктов": (
+                f"{sum(item['total_price'] for item in items)} рублей"
+            ),
+            "Количество позиций": len(items),
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["delete"], url_path="clear_product_cart")
+    def clear_product_cart(self, request):
+        """
+        Полностью очищает гостевую корзину.
+        :param request: Запрос.
+        :return: Ответ с сообщением об очистке корзины.
+        """
+
+        if self.guest_id is None:
+            return Response(
+                {"detail": "Корзина пользователя не найдена"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        self.call_store(self.store.clear, self.guest_id)
+        return Response(
+            {"detail": "Корзина полностью очищена!"},
+            status=status.HTTP_204_NO_CONTENT,
+        )
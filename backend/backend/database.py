@@ -0,0 +1,125 @@
+"""
+Настройки подключения к БД из переменных окружения.
+
+DB_ENGINE=sqlite (по умолчанию) - файловая SQLite для разработки,
+DB_ENGINE=postgresql - PostgreSQL для production:
+    POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, DB_HOST, DB_PORT -
+        параметры подключения;
+    DB_CONN_MAX_AGE - сколько секунд держать соединение открытым между
+        запросами (0 - новое соединение на каждый запрос, по умолчанию
+        60 для PostgreSQL и 0 для SQLite);
+    DB_CONN_HEALTH_CHECKS - проверять постоянное соединение перед
+        повторным использованием (по умолчанию True);
+    DB_CONNECT_TIMEOUT - таймаут установки соединения, секунд;
+    DB_STATEMENT_TIMEOUT - предел выполнения одного запроса, мс
+        (0 - без предела);
+    DB_POOLER=pgbouncer - подключение через PgBouncer в режиме пулинга
+        транзакций: серверные курсоры отключаются (курсор не переживает
+        смену серверного соединения), а statement_timeout не передается
+        в параметрах подключения (PgBouncer их отклоняет) и задается
+        на стороне БД: ALTER ROLE ... SET statement_timeout = ...
+DB_REPLICAS - реплики для чтения каталога через пробел: для PostgreSQL
+    HOST или HOST:PORT (остальные параметры как у основной БД), для
+    SQLite - имена файлов в каталоге проекта. Реплики получают
+    псевдонимы replica_1, replica_2, ...
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+ENGINES = {
+    "sqlite": "django.db.backends.sqlite3",
+    "postgresql": "django.db.backends.postgresql",
+}
+POOLERS = ("", "pgbouncer")
+DEFAULT_CONN_MAX_AGE = {"sqlite": 0, "postgresql": 60}
+
+
+def get_bool(env, name, default):
+    return env.get(name, str(default)) == "True"
+
+
+def get_int(env, name, default):
+    value = env.get(name, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ImproperlyConfigured(f"{name} должно быть целым числом: {value!r}")
+
+
+def get_database_config(base_dir, env=None):
+    """
+    Настройки БД "default" из переменных окружения.
+    :param base_dir: Каталог проекта (для файла SQLite).
+    :param env: Переменные окружения (по умолчанию os.environ).
+    :return: Словарь настроек для DATABASES["default"].
+    """
+
+    env = os.environ if env is None else env
+    engine = env.get("DB_ENGINE", "sqlite")
+    if engine not in ENGINES:
+        raise ImproperlyConfigured(
+            f"DB_ENGINE должно быть одним из: {', '.join(ENGINES)}."
+        )
+    config = {
+        "ENGINE": ENGINES[engine],
+        "CONN_MAX_AGE": get_int(env, "DB_CONN_MAX_AGE", DEFAULT_CONN_MAX_AGE[engine]),
+        "CONN_HEALTH_CHECKS": get_bool(env, "DB_CONN_HEALTH_CHECKS", True),
+    }
+    if engine == "sqlite":
+        config.update(
+            NAME=base_dir / "db.sqlite3",
+            # Ожидание блокировки записи вместо немедленной ошибки
+            # "database is locked" при параллельных запросах.
+            OPTIONS={"timeout": 20},
+            # Файловая тестовая БД: общая in-memory БД не ждет блокировок,
+            # и многопоточные тесты падают с "database table is locked".
+            TEST={"NAME": base_dir / "test_db.sqlite3"},
+        )
+        return config
+
+    pooler = env.get("DB_POOLER", "")
+    if pooler not in POOLERS:
+        raise ImproperlyConfigured(
+            f"DB_POOLER должно быть одним из: {', '.join(filter(None, POOLERS))}."
+        )
+    options = {"connect_timeout": get_int(env, "DB_CONNECT_TIMEOUT", 5)}
+    statement_timeout = get_int(env, "DB_STATEMENT_TIMEOUT", 30000)
+    if statement_timeout and not pooler:
+        options["options"] = f"-c statement_timeout={statement_timeout}"
+    config.update(
+        NAME=env.get("POSTGRES_DB", "django"),
+        USER=env.get("POSTGRES_USER", "django_user"),
+        PASSWORD=env.get("POSTGRES_PASSWORD", "django"),
+        HOST=env.get("DB_HOST", "backend-db"),
+        PORT=env.get("DB_PORT", "5432"),
+        OPTIONS=options,
+        DISABLE_SERVER_SIDE_CURSORS=bool(pooler),
+    )
+    return config
+
+
+def get_replica_configs(base_dir, env=None):
+    """
+    Настройки реплик для чтения из DB_REPLICAS.
+    :param base_dir: Каталог проекта (для файлов SQLite).
+    :param env: Переменные окружения (по умолчанию os.environ).
+    :return: Словарь псевдоним -> настройки реплики.
+    """
+
+    env = os.environ if env is None else env
+    primary = get_database_config(base_dir, env)
+    replicas = {}
+    for index, location in enumerate(env.get("DB_REPLICAS", "").split(), 1):
+        config = dict(primary)
+        if primary["ENGINE"] == ENGINES["sqlite"]:
+            config["NAME"] = base_dir / location
+        else:
+            host, _, port = location.partition(":")
+            config["HOST"] = host
+            config["PORT"] = port or primary["PORT"]
+        # В тестах реплика - это основная БД.
+        config["TEST"] = {"MIRROR": "default"}
+        replicas[f"replica_{index}"] = config
+    return replicas
@@ -4,6 +4,8 @@ from pathlib import Path
 from django.core.management.utils import get_random_secret_key
 from dotenv import load_dotenv
 
+from backend.database import get_database_config, get_replica_configs
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,11 +43,17 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.PrimaryPinningMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     #"querycount.middleware.QueryCountMiddleware",
 ]
 
+# Заголовки X-Query-Count/X-DB-Time/X-Query-Budget (для staging).
+QUERY_COUNT_HEADERS = os.getenv("QUERY_COUNT_HEADERS", "False") == "True"
+if QUERY_COUNT_HEADERS:
+    MIDDLEWARE.append("core.middleware.QueryCountHeadersMiddleware")
+
 ROOT_URLCONF = "backend.urls"
 
 TEMPLATES = [
@@ -66,23 +74,61 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "backend.wsgi.application"
 
+# БД из переменных окружения (DB_ENGINE, DB_CONN_MAX_AGE, ...),
+# см. backend/database.py.
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": get_database_config(BASE_DIR),
+    **get_replica_configs(BASE_DIR),
 }
 
-# DATABASES = {
-#     "default": {
-#         "ENGINE": "django.db.backends.postgresql",
-#         "NAME": os.getenv("POSTGRES_DB", default="django"),
-#         "USER": os.getenv("POSTGRES_USER", default="django_user"),
-#         "PASSWORD": os.getenv("POSTGRES_PASSWORD", default="django"),
-#         "HOST": os.getenv("DB_HOST", default="backend-db"),
-#         "PORT": os.getenv("DB_PORT", default=5432),
-#     }
-# }
+# Чтения каталога в запросах API идут на реплики (DB_REPLICAS),
+# см. core/db_routers.py. После записи пользователь читает из основной
+# БД REPLICA_PIN_SECONDS секунд; реплика, отстающая больше
+# REPLICA_MAX_LAG секунд или недоступная, пропускается до следующей
+# проверки через REPLICA_CHECK_INTERVAL секунд.
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["core.db_routers.ReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 10))
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", 5))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", 5))
+
+# Кэш ответов каталога. При нескольких процессах gunicorn нужен общий
+# кэш (например, CACHE_BACKEND=django.core.cache.backends.redis.RedisCache,
+# CACHE_LOCATION=redis://redis:6379/1), чтобы инвалидация сигналами
+# была видна всем процессам.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "ecosystem-alpha"),
+    },
+    # Кэш токен -> пользователь для CachedTokenAuthentication. Отдельный
+    # псевдоним, чтобы число записей было ограничено и токены не вытесняли
+    # ответы каталога. При нескольких процессах также нужен общий кэш:
+    # иначе выход из системы сбросит запись только в одном процессе.
+    "auth": {
+        "BACKEND": os.getenv(
+            "AUTH_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("AUTH_CACHE_LOCATION", "ecosystem-alpha-auth"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000)),
+        },
+    },
+    # Рабочие копии гостевых корзин (food_shop.guest_cart). В продакшене -
+    # общий быстрый кэш (Redis), локально и в тестах - память процесса.
+    "guest_carts": {
+        "BACKEND": os.getenv(
+            "GUEST_CART_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("GUEST_CART_CACHE_LOCATION", "ecosystem-alpha-guest"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("GUEST_CART_CACHE_MAX_ENTRIES", 100000)),
+        },
+    },
+}
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -105,7 +151,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
 }
@@ -151,6 +197,25 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Фоновая обработка изображений продуктов (food_shop.images):
+# количество потоков пула и синхронный режим (для тестов и отладки).
+IMAGE_PROCESSING_WORKERS = int(os.getenv("IMAGE_PROCESSING_WORKERS", 2))
+IMAGE_PROCESSING_EAGER = os.getenv("IMAGE_PROCESSING_EAGER", "False") == "True"
+# Дополнительные форматы производных фото (неподдерживаемые Pillow
+# пропускаются) и качество кодирования по форматам.
+IMAGE_VARIANT_FORMATS = os.getenv("IMAGE_VARIANT_FORMATS", "WEBP AVIF").split()
+IMAGE_QUALITY = {
+    "JPEG": int(os.getenv("IMAGE_JPEG_QUALITY", 75)),
+    "WEBP": int(os.getenv("IMAGE_WEBP_QUALITY", 80)),
+    "AVIF": int(os.getenv("IMAGE_AVIF_QUALITY", 60)),
+}
+
+# Гостевые корзины: псевдоним кэша и период (в секундах) фоновой записи
+# снимков в БД; 0 - без фонового потока, снимок записывается после
+# фиксации транзакции запроса.
+GUEST_CART_CACHE_ALIAS = "guest_carts"
+GUEST_CART_FLUSH_INTERVAL = float(os.getenv("GUEST_CART_FLUSH_INTERVAL", 0))
+
 AUTH_USER_MODEL = "users.MyUser"
 
 # Настройки сессий
@@ -0,0 +1,64 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(namespace):
+    return f"version:{namespace}"
+
+
+def get_cache_version(namespace):
+    """
+    Текущая версия пространства имен кэша.
+    Версия - время последнего изменения в микросекундах, поэтому после
+    вытеснения ключа из кэша новая версия не совпадет ни с одной из старых.
+    :param namespace: Пространство имен кэша.
+    :return: Версия (int).
+    """
+
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(namespace):
+    """
+    Инвалидирует все записи пространства имен, меняя его версию.
+    :param namespace: Пространство имен кэша.
+    :return: Новая версия (int).
+    """
+
+    key = _version_key(namespace)
+    version = max(time.time_ns() // 1000, (cache.get(key) or 0) + 1)
+    cache.set(key, version, None)
+    return version
+
+
+def bump_cache_version_on_commit(namespace, using=None):
+    """
+    Меняет версию пространства имен после фиксации текущей транзакции
+    (вне транзакции - сразу). Если сменить версию до фиксации, чтение
+    между сменой и фиксацией закэширует еще старые данные под новой
+    версией, и они останутся в кэше до истечения таймаута.
+    :param namespace: Пространство имен кэша.
+    :param using: Псевдоним БД транзакции.
+    """
+
+    transaction.on_commit(lambda: bump_cache_version(namespace), using=using)
+
+
+def make_cache_key(namespace, *parts):
+    """
+    Ключ кэша, привязанный к текущей версии пространства имен.
+    :param namespace: Пространство имен кэша.
+    :param parts: Части ключа (например, URL запроса).
+    :return: Ключ кэша (str).
+    """
+
+    digest = hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f"{namespace}:{get_cache_version(namespace)}:{digest}"
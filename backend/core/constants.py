@@ -1,4 +1,4 @@
-from enum import IntEnum
+from enum import IntEnum, StrEnum
 
 
 class LenghtField(IntEnum):
@@ -20,6 +20,26 @@ class LenghtField(IntEnum):
 
     # page_size = 10 for API PaginationCust.page_size
     PAGE_SIZE = 10
+    # Максимальный размер страницы для CursorPaginationCust.max_page_size
+    MAX_PAGE_SIZE = 1000
+    # Количество записей в одной транзакции импорта каталога
+    IMPORT_BATCH_SIZE = 1000
+    # Количество строк, получаемых из БД за раз при выгрузке каталога
+    EXPORT_CHUNK_SIZE = 2000
+    # Предел точного подсчета строк в списках админки
+    # (EstimatedCountPaginator): дальше число строк оценивается
+    ADMIN_COUNT_LIMIT = 10000
+    # Количество строк на странице встроенных таблиц админки
+    ADMIN_INLINE_PAGE_SIZE = 20
+    # Максимальная длина имени поля изображения ProductImage.field_name
+    MAX_LENGT_IMAGE_FIELD = 50
+    # Максимальная длина статуса обработки ProductImage.status
+    MAX_LENGT_STATUS = 20
+    MAX_LENGT_CONTENT_HASH = 64
+    # Максимальные ширина и высота фото продукта
+    ICON_SMALL_SIZE = 200
+    ICON_MIDDLE_SIZE = 400
+    ICON_BIG_SIZE = 600
 
     # Минимальная длина логина пользователя
     MIN_LENGHT_LOGIN_USER = 1
@@ -38,6 +58,36 @@ class LenghtField(IntEnum):
     # Количество продуктов в ShoppingCartProduct.amount
     MIN_AMOUNT_PRODUCT = 1
     MAX_AMOUNT_PRODUCT = 1000
+    # Длина идентификатора гостевой корзины (uuid4.hex)
+    MAX_LENGT_GUEST_CART_ID = 32
+    # Максимальное количество операций в пакетном изменении корзины
+    MAX_CART_BATCH_OPERATIONS = 200
     # Стоимость продукта в Product.price
     MIN_PRICE_PRODUCT = 1.0
     MAX_PRICE_PRODUCT = 10000.0
+
+
+class CacheNamespace(StrEnum):
+    """Пространства имен кэша, инвалидируемые сменой версии."""
+
+    # Сериализованное дерево категорий CategoryViewSet
+    CATEGORY_TREE = "category_tree"
+    # Версия каталога для ETag/Last-Modified категорий,
+    # подкатегорий и продуктов
+    CATALOG = "catalog"
+
+
+class CacheTimeout(IntEnum):
+    """Время жизни записей кэша в секундах."""
+
+    # Ответы CategoryViewSet (список и детальная информация)
+    CATEGORY_TREE = 60 * 60 * 24
+    # Пользователь, найденный по токену (CachedTokenAuthentication)
+    AUTH_TOKEN = 60 * 5
+    # Гостевая корзина в кэше (продлевается при каждом изменении)
+    GUEST_CART = 60 * 60 * 24 * 7
+    # Блокировка изменения гостевой корзины (снимается по истечении,
+    # если запрос, взявший ее, упал)
+    GUEST_CART_LOCK = 5
+    # Идентификатор объекта каталога по слагу (food_shop.slugs.resolve_slug)
+    SLUG = 60 * 60 * 24
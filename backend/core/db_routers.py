@@ -0,0 +1,224 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from core.cache import get_cache_version
+from core.constants import CacheNamespace
+
+logger = logging.getLogger(__name__)
+
+# Состояние текущего запроса (PrimaryPinningMiddleware): вне запроса
+# (команды, фоновые потоки) все чтения идут в основную БД.
+_request_state = ContextVar("db_request_state", default=None)
+
+# Пространства имен кэша, версии которых привязаны к данным каталога:
+# ответы, закэшированные или помеченные ETag под новой версией, должны
+# строиться из данных, уже содержащих изменение.
+VERSIONED_NAMESPACES = (CacheNamespace.CATALOG, CacheNamespace.CATEGORY_TREE)
+
+# Результаты проверки реплик: псевдоним -> (время проверки, исправна).
+_replica_health = {}
+
+# Отставание реплики PostgreSQL в секундах; 0, если реплика применила
+# все полученные изменения (иначе при отсутствии записей на основной БД
+# now() - pg_last_xact_replay_timestamp() растет без реального отставания).
+POSTGRESQL_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery()
+            OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+        THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+class RequestState:
+    """
+    Маршрутизация в рамках одного запроса.
+    Атрибуты:
+    - request: Текущий запрос.
+    - pinned: Чтения запроса идут в основную БД (запрос изменяет
+     данные или уже выполнил запись).
+    - wrote: Запрос выполнил запись в БД.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.pinned = request.method not in ("GET", "HEAD", "OPTIONS")
+        self.wrote = False
+        self._read_pinned = None
+
+    def is_pinned(self):
+        """
+        Закреплен ли запрос за основной БД: сам запрос пишет или
+        пользователь недавно выполнял запись (read-your-writes).
+        """
+
+        if self.pinned:
+            return True
+        if self._read_pinned is None:
+            key = get_pin_key(self.request)
+            self._read_pinned = (
+                key is not None and bool(cache.get(key))
+            ) or is_catalog_recently_changed()
+        return self._read_pinned
+
+
+def is_catalog_recently_changed():
+    """
+    Менялась ли версия каталога или дерева категорий недавно - раньше,
+    чем реплика гарантированно получит изменение (REPLICA_MAX_LAG плюс
+    интервал между проверками отставания). В это время чтения каталога
+    идут в основную БД: иначе ответ со старыми данными реплики попал бы
+    в кэш или получил ETag под новой версией. Версия - время смены
+    в микросекундах (см. core.cache.get_cache_version).
+    """
+
+    window = (settings.REPLICA_MAX_LAG + settings.REPLICA_CHECK_INTERVAL) * 10**6
+    now = time.time_ns() // 1000
+    return any(
+        now - get_cache_version(namespace) < window
+        for namespace in VERSIONED_NAMESPACES
+    )
+
+
+def get_pin_key(request):
+    """
+    Ключ кэша закрепления пользователя за основной БД
+    (None для анонимного пользователя).
+    """
+
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    return f"db-pin:{user.pk}"
+
+
+def start_request(request):
+    """Начинает маршрутизацию запроса. Возвращает токен для finish_request."""
+
+    return _request_state.set(RequestState(request))
+
+
+def finish_request(token):
+    """
+    Завершает маршрутизацию запроса. Если запрос писал в БД,
+    пользователь закрепляется за основной БД на REPLICA_PIN_SECONDS,
+    чтобы следующие запросы не прочитали устаревшие данные с реплики.
+    """
+
+    state = _request_state.get()
+    _request_state.reset(token)
+    if state is not None and state.wrote:
+        key = get_pin_key(state.request)
+        if key is not None:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+
+
+def get_replica_lag(connection):
+    """Отставание реплики в секундах (для SQLite - 0)."""
+
+    if connection.vendor != "postgresql":
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRESQL_LAG_SQL)
+        lag = cursor.fetchone()[0]
+    return float(lag or 0)
+
+
+def check_replica(alias):
+    """
+    Проверяет, что реплика доступна и отстает не больше REPLICA_MAX_LAG.
+    Возвращает: bool: Реплика исправна.
+    """
+
+    connection = connections[alias]
+    try:
+        connection.ensure_connection()
+        lag = get_replica_lag(connection)
+    except DatabaseError as error:
+        logger.warning("Реплика %s недоступна: %s", alias, error)
+        connection.close()
+        return False
+    if lag > settings.REPLICA_MAX_LAG:
+        logger.warning("Реплика %s отстает на %.1f с", alias, lag)
+        return False
+    return True
+
+
+def is_replica_healthy(alias):
+    """
+    Исправна ли реплика. Проверка выполняется не чаще раза в
+    REPLICA_CHECK_INTERVAL секунд, между проверками используется
+    последний результат.
+    """
+
+    now = time.monotonic()
+    checked = _replica_health.get(alias)
+    if checked is None or now - checked[0] >= settings.REPLICA_CHECK_INTERVAL:
+        checked = _replica_health[alias] = (now, check_replica(alias))
+    return checked[1]
+
+
+def reset_replica_health():
+    """Сбрасывает результаты проверок реплик."""
+
+    _replica_health.clear()
+
+
+class ReplicaRouter:
+    """
+    Отправляет чтения каталога в запросах API на реплики
+    (DATABASE_REPLICAS), а записи и все остальные чтения - в основную БД.
+    Запрос, изменяющий данные, и запросы пользователя в течение
+    REPLICA_PIN_SECONDS после записи читают из основной БД, как и все
+    запросы сразу после смены версии каталога. Недоступные
+    и отстающие реплики пропускаются; если исправных реплик нет,
+    чтения идут в основную БД.
+    Атрибуты:
+    - read_models: Модели (app_label.model_name), которые читаются
+     с реплик.
+    """
+
+    read_models = {
+        "food_shop.category",
+        "food_shop.subcategory",
+        "food_shop.product",
+        "food_shop.catalognode",
+    }
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if (
+            state is None
+            or not settings.DATABASE_REPLICAS
+            or model._meta.label_lower not in self.read_models
+            or state.is_pinned()
+        ):
+            return None
+        replicas = [
+            alias for alias in settings.DATABASE_REPLICAS if is_replica_healthy(alias)
+        ]
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,103 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+
+from api.v1.benchmarks import percentile
+
+PERSISTENT_CONN_MAX_AGE = 600
+WARMUP_REQUESTS = 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время ответа эндпоинта с новым соединением с БД на"
+        " каждый запрос (CONN_MAX_AGE=0) и с постоянным соединением."
+        " Соединения закрываются между запросами так же, как в"
+        " WSGI-сервере (close_old_connections), поэтому разница"
+        " показывает стоимость установки соединения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/v1/product/")
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Сколько запросов выполнить в каждом режиме.",
+        )
+
+    def measure(self, path, requests, conn_max_age):
+        """
+        Выполняет requests запросов при заданном CONN_MAX_AGE.
+        Возвращает: dict: p50/p95 (мс) и число открытых соединений.
+        """
+
+        client = Client()
+        for _ in range(WARMUP_REQUESTS):
+            client.get(path)
+        connection.close()
+        connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+        connects = []
+
+        def count_connect(sender, connection, **kwargs):
+            connects.append(connection.alias)
+
+        timings = []
+        connection_created.connect(count_connect)
+        try:
+            for _ in range(requests):
+                start = time.perf_counter()
+                close_old_connections()
+                response = client.get(path)
+                close_old_connections()
+                timings.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(
+                        f"{path} вернул {response.status_code}."
+                    )
+        finally:
+            connection_created.disconnect(count_connect)
+        return {
+            "p50_ms": percentile(timings, 50),
+            "p95_ms": percentile(timings, 95),
+            "connections": len(connects),
+        }
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests должен быть положительным.")
+        original = connection.settings_dict["CONN_MAX_AGE"]
+        persistent = original or PERSISTENT_CONN_MAX_AGE
+        try:
+            results = {
+                "per-request": self.measure(
+                    options["path"], options["requests"], 0
+                ),
+                f"persistent({persistent}s)": self.measure(
+                    options["path"], options["requests"], persistent
+                ),
+            }
+        finally:
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = original
+
+        self.stdout.write(
+            f"{connection.vendor}: {options['path']},"
+            f" {options['requests']} запросов"
+        )
+        self.stdout.write(
+            f"{'режим':<20}{'p50, мс':>10}{'p95, мс':>10}{'соединений':>12}"
+        )
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:<20}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                f"{result['connections']:>12}"
+            )
+        baseline, tuned = results.values()
+        self.stdout.write(
+            "Экономия p50 на запрос:"
+            f" {baseline['p50_ms'] - tuned['p50_ms']:.2f} мс"
+        )
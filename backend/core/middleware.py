@@ -0,0 +1,81 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from core.db_routers import finish_request, start_request
+from core.query_budget import get_query_budget
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCountHeadersMiddleware:
+    """
+    Добавляет к ответу число SQL-запросов и время, проведенное в БД:
+    X-Query-Count, X-DB-Time (мс) и, если у действия задан бюджет,
+    X-Query-Budget. Превышение бюджета пишется в лог предупреждением.
+    Подключается в staging переменной окружения QUERY_COUNT_HEADERS=True.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = {"count": 0, "time": 0.0}
+
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats["count"] += 1
+                stats["time"] += time.perf_counter() - started
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            response = self.get_response(request)
+
+        response["X-Query-Count"] = str(stats["count"])
+        response["X-DB-Time"] = f"{stats['time'] * 1000:.2f}"
+        budget = getattr(request, "query_budget", None)
+        if budget is not None:
+            response["X-Query-Budget"] = str(budget)
+            if stats["count"] > budget:
+                logger.warning(
+                    "%s %s: %s SQL-запросов при бюджете %s",
+                    request.method,
+                    request.path,
+                    stats["count"],
+                    budget,
+                )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Запоминает бюджет действия ViewSet, обрабатывающего запрос."""
+
+        actions = getattr(view_func, "actions", None) or {}
+        action = actions.get(request.method.lower())
+        view = getattr(view_func, "cls", None)
+        if view is not None and action is not None:
+            request.query_budget = get_query_budget(view, action)
+        return None
+
+
+class PrimaryPinningMiddleware:
+    """
+    Передает текущий запрос маршрутизатору ReplicaRouter: чтения
+    каталога идут на реплики только внутри запроса, а после записи
+    запрос и пользователь закрепляются за основной БД.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = start_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            finish_request(token)
@@ -1,4 +1,17 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import ValidationError as APIValidationError
+from rest_framework.pagination import (
+    CursorPagination,
+    PageNumberPagination,
+    _reverse_ordering,
+)
 
 from core.constants import LenghtField
 
@@ -10,3 +23,224 @@ class PaginationCust(PageNumberPagination):
 
     page_size_query_param = "limit"
     page_size = LenghtField.PAGE_SIZE.value
+
+
+class CursorPaginationCust(CursorPagination):
+    """Keyset(курсорная) пагинация без COUNT(*) и OFFSET.
+    Позиция курсора хранит значения всех полей сортировки, поэтому
+    следующая страница выбирается условием вида
+    (date_add, id) < (:date_add, :id) по индексу, и время ответа
+    не зависит от номера страницы.
+    cursor - непрозрачный курсор из ссылок next/previous(string).
+    limit - количество объектов на странице(integer)."""
+
+    ordering = ("-date_add", "-id")
+    page_size_query_param = "limit"
+    page_size = LenghtField.PAGE_SIZE.value
+    max_page_size = LenghtField.MAX_PAGE_SIZE.value
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self._get_keyset_filter(current_position))
+
+        # Берем на один объект больше, чтобы узнать, есть ли следующая страница.
+        results = list(queryset[offset : offset + self.page_size + 1])
+        self.page = list(results[: self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Сортировка страниц: явная сортировка queryset, иначе ordering.
+        Последним полем сортировки должен быть уникальный ключ (id).
+        Сортировка по аннотации (релевантность поиска ?search=)
+        отклоняется с ошибкой 400.
+        """
+
+        ordering = queryset.query.order_by
+        if not ordering or not all(isinstance(field, str) for field in ordering):
+            return self.ordering
+        if any(
+            field.lstrip("-").split("__")[0] in queryset.query.annotations
+            for field in ordering
+        ):
+            # Курсор по вычисляемому полю (релевантности поиска) ненадежен,
+            # а замена сортировки молча потеряла бы порядок поиска.
+            raise APIValidationError(
+                {
+                    "pagination": "Курсорная пагинация недоступна для"
+                    " результатов поиска (?search=), отсортированных"
+                    " по релевантности: используйте постраничную пагинацию."
+                }
+            )
+        return tuple(ordering)
+
+    def _get_keyset_filter(self, position):
+        """
+        Строит условие "строго после позиции" для составного ключа сортировки.
+        Для ("-date_add", "-id") это
+        date_add < :date_add OR (date_add = :date_add AND id < :id).
+        :param position: Позиция курсора (JSON-список значений полей).
+        :return: Q-объект для фильтрации queryset.
+        """
+
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        keyset = Q()
+        equal = {}
+        try:
+            for order, value in zip(self.ordering, values):
+                is_reversed = order.startswith("-")
+                order_attr = order.lstrip("-")
+                if self.cursor.reverse != is_reversed:
+                    lookup = f"{order_attr}__lt"
+                else:
+                    lookup = f"{order_attr}__gt"
+                keyset |= Q(**equal, **{lookup: value})
+                equal[order_attr] = value
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        return keyset
+
+    def _get_position_from_instance(self, instance, ordering):
+        """
+        Позиция объекта - значения всех полей сортировки.
+        Поддерживает как экземпляры моделей (в том числе поля связанных
+        моделей), так и словари из values().
+        """
+
+        values = []
+        for order in ordering:
+            attr = order.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance[attr]
+            else:
+                # Поле связанной модели: subcategory__name.
+                value = instance
+                for name in attr.split("__"):
+                    value = getattr(value, name)
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            values.append(str(value))
+        return json.dumps(values)
+
+
+class SwitchablePaginationMixin:
+    """
+    Миксин ViewSet'а, позволяющий клиенту выбрать keyset-пагинацию
+    параметром запроса ?pagination=cursor (или передав ?cursor=...),
+    сохраняя постраничную пагинацию по умолчанию.
+    Attributes:
+        - cursor_pagination_class: Класс курсорной пагинации.
+    """
+
+    cursor_pagination_class = CursorPaginationCust
+    pagination_query_param = "pagination"
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            pagination_class = self.pagination_class
+            request = getattr(self, "request", None)
+            if request is not None and self.cursor_pagination_class:
+                query_params = request.query_params
+                if (
+                    query_params.get(self.pagination_query_param) == "cursor"
+                    or self.cursor_pagination_class.cursor_query_param in query_params
+                ):
+                    pagination_class = self.cursor_pagination_class
+            self._paginator = pagination_class() if pagination_class else None
+        return self._paginator
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор списков админки без полного COUNT(*).
+    Для таблицы без фильтров на PostgreSQL число строк берется из
+    статистики планировщика (pg_class.reltuples). В остальных случаях
+    считается не больше ADMIN_COUNT_LIMIT строк запросом
+    COUNT(*) FROM (... LIMIT n), поэтому подсчет не сканирует всю
+    таблицу, а страницы дальше предела в списке не показываются.
+    """
+
+    count_limit = LenghtField.ADMIN_COUNT_LIMIT.value
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        estimate = self.get_estimate(queryset)
+        if estimate is not None:
+            return estimate
+        return queryset[: self.count_limit].count()
+
+    @staticmethod
+    def get_estimate(queryset):
+        """
+        Оценка числа строк таблицы из статистики PostgreSQL
+        (None, если запрос отфильтрован или оценка недоступна).
+        """
+
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql" or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples = -1 у таблицы, для которой еще не собрана статистика.
+        if row and row[0] > 0:
+            return row[0]
+        return None
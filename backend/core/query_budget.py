@@ -0,0 +1,69 @@
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceededError(AssertionError):
+    """Действие представления выполнило больше SQL-запросов, чем заявлено."""
+
+
+def get_query_budget(view, action):
+    """
+    Бюджет SQL-запросов действия из атрибута query_budgets представления.
+    :param view: Класс или экземпляр ViewSet.
+    :param action: Имя действия (list, retrieve, create, ...).
+    :return: Максимальное число запросов или None, если бюджет не задан.
+    """
+
+    return getattr(view, "query_budgets", {}).get(action)
+
+
+def count_queries(callback, using="default"):
+    """
+    Выполняет callback и считает выполненные им SQL-запросы.
+    :param callback: Функция без аргументов (например, запрос клиента).
+    :param using: Псевдоним БД.
+    :return: Кортеж (результат callback, список выполненных запросов).
+    """
+
+    with CaptureQueriesContext(connections[using]) as queries:
+        result = callback()
+    return result, queries.captured_queries
+
+
+def assert_query_budget(view, action, request, grow=None, sizes=(1, 10, 50)):
+    """
+    Проверяет, что действие укладывается в бюджет SQL-запросов при росте
+    данных: перед каждым замером grow(size) доводит объем данных до size,
+    а request() выполняет запрос к действию. Число запросов не должно
+    превышать бюджет и не должно расти вместе с данными (признак N+1).
+    :param view: Класс ViewSet с атрибутом query_budgets.
+    :param action: Имя действия.
+    :param request: Функция без аргументов, выполняющая запрос.
+    :param grow: Функция, принимающая размер данных (необязательно).
+    :param sizes: Размеры данных для замеров.
+    :return: Список чисел запросов по размерам.
+    """
+
+    budget = get_query_budget(view, action)
+    if budget is None:
+        raise QueryBudgetExceededError(
+            f"{view.__name__}.{action}: бюджет запросов не задан."
+        )
+    counts = []
+    for size in sizes:
+        if grow is not None:
+            grow(size)
+        _, queries = count_queries(request)
+        if len(queries) > budget:
+            sql = "\n".join(query["sql"] for query in queries)
+            raise QueryBudgetExceededError(
+                f"{view.__name__}.{action}: {len(queries)} запросов при"
+                f" размере {size}, бюджет {budget}:\n{sql}"
+            )
+        counts.append(len(queries))
+    if max(counts) > counts[0]:
+        raise QueryBudgetExceededError(
+            f"{view.__name__}.{action}: число запросов растет с данными"
+            f" {dict(zip(sizes, counts))}."
+        )
+    return counts
@@ -1,55 +1,349 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q, Sum
+from django.forms.models import BaseInlineFormSet
+from django.http import QueryDict
+from django.utils.functional import cached_property
 from django.utils.html import format_html
+from mptt.admin import MPTTModelAdmin
+
+from core.constants import LenghtField
+from core.pagination import EstimatedCountPaginator
 
 from food_shop.models import (
+    CatalogNode,
     Category,
     Subcategory,
     Product,
     ProductCart,
+    ProductImage,
     ShoppingCartProduct,
 )
 
 
-class CategorySubcategoryInline(admin.TabularInline):
+class RangeListFilter(admin.SimpleListFilter):
+    """
+    Фильтр по диапазонам значения поля. Варианты задаются заранее,
+    поэтому боковая панель не выбирает различные значения по всей
+    таблице, а фильтр выполняется условием по индексу поля.
+    Attributes:
+        field_name (str): Имя фильтруемого поля.
+        ranges (tuple): Границы диапазонов (нижняя, верхняя),
+            None - без границы.
+    """
+
+    field_name = None
+    ranges = ()
+
+    def lookups(self, request, model_admin):
+        choices = []
+        for low, high in self.ranges:
+            if high is None:
+                label = f"от {low}"
+            elif low is None:
+                label = f"до {high}"
+            else:
+                label = f"{low} - {high}"
+            choices.append((f"{low or ''}-{high or ''}", label))
+        return choices
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        low, _, high = self.value().partition("-")
+        try:
+            if low:
+                queryset = queryset.filter(**{f"{self.field_name}__gte": low})
+            if high:
+                queryset = queryset.filter(**{f"{self.field_name}__lt": high})
+        except (ValueError, ValidationError) as error:
+            raise IncorrectLookupParameters(error)
+        return queryset
+
+
+class PriceRangeListFilter(RangeListFilter):
+    """Фильтр продуктов по диапазону цены."""
+
+    title = "Цена"
+    parameter_name = "price_range"
+    field_name = "price"
+    ranges = (
+        (None, 100),
+        (100, 500),
+        (500, 1000),
+        (1000, 5000),
+        (5000, None),
+    )
+
+
+class AmountRangeListFilter(RangeListFilter):
+    """Фильтр позиций корзин по количеству товара."""
+
+    title = "Количество"
+    parameter_name = "amount_range"
+    field_name = "amount"
+    ranges = (
+        (None, 5),
+        (5, 20),
+        (20, 100),
+        (100, None),
+    )
+
+
+def get_exact_condition(model, path, value):
+    """
+    Условие точного совпадения поля по пути path. Связи разворачиваются
+    в подзапросы по первичному ключу связанной модели (user_id IN
+    (SELECT id ... WHERE username = ...)), чтобы каждое условие
+    проверялось по индексу и объединение через OR не требовало JOIN.
+    Args: model (Model): Модель, от которой отсчитывается путь.
+          path (str): Путь к полю через "__".
+          value: Искомое значение.
+    Returns: Q: Условие для filter().
+    """
+    name, _, rest = path.partition("__")
+    if not rest:
+        return Q(**{name: value})
+    related_model = model._meta.get_field(name).related_model
+    return Q(
+        **{
+            f"{name}__in": related_model._default_manager.filter(
+                get_exact_condition(related_model, rest, value)
+            ).values("pk")
+        }
+    )
+
+
+class ExactSearchMixin:
+    """
+    Точный поиск по полям search_fields с префиксом "=". Стандартный
+    поиск строит для них __iexact (UPPER(...), для pk - LIKE по тексту),
+    который не использует индексы; здесь поисковая строка целиком
+    сравнивается с полями по __exact, а с первичным ключом - только
+    если она числовая.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q()
+        for field in self.get_search_fields(request):
+            path = field.removeprefix("=")
+            if path == "pk":
+                # Числа вне диапазона BIGINT в БД не передаются.
+                if not (term.isascii() and term.isdigit()) or len(term) > 18:
+                    continue
+                condition |= Q(pk=int(term))
+            else:
+                condition |= get_exact_condition(queryset.model, path, term)
+        if not condition:
+            return queryset.none(), False
+        return queryset.filter(condition), False
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """
+    Формсет встроенной таблицы, загружающий одну страницу строк
+    (на одну строку больше, чтобы узнать о следующей странице) без
+    подсчета всех связанных строк. Номер страницы, параметры запроса и
+    агрегаты сводки задает PaginatedInlineMixin.get_formset.
+    Attributes:
+        per_page (int): Количество строк на странице.
+        page_number (int): Номер текущей страницы.
+        page_parameter (str): Параметр запроса с номером страницы.
+        query_params (QueryDict): Параметры запроса страницы изменения.
+        summary_aggregates (dict): Подпись -> агрегат для сводки.
+    """
+
+    per_page = LenghtField.ADMIN_INLINE_PAGE_SIZE.value
+    page_number = 1
+    page_parameter = "page"
+    query_params = None
+    summary_aggregates = {}
+
+    def get_queryset(self):
+        if not hasattr(self, "_queryset"):
+            queryset = super().get_queryset()
+            offset = (self.page_number - 1) * self.per_page
+            rows = list(queryset[offset : offset + self.per_page + 1])
+            self.has_next = len(rows) > self.per_page
+            self._queryset = rows[: self.per_page]
+        return self._queryset
+
+    def get_page_query(self, number):
+        params = (
+            self.query_params.copy() if self.query_params else QueryDict(mutable=True)
+        )
+        params[self.page_parameter] = number
+        return f"?{params.urlencode()}"
+
+    @property
+    def previous_page_query(self):
+        if self.page_number > 1:
+            return self.get_page_query(self.page_number - 1)
+        return None
+
+    @property
+    def next_page_query(self):
+        self.get_queryset()
+        if self.has_next:
+            return self.get_page_query(self.page_number + 1)
+        return None
+
+    @cached_property
+    def summary(self):
+        """
+        Сводка по всем связанным строкам одним агрегирующим запросом.
+        Агрегаты считаются не больше чем по ADMIN_COUNT_LIMIT строкам,
+        поэтому время не зависит от числа строк; при достижении
+        предела к значениям добавляется "+".
+        Returns: list: Пары (подпись, значение).
+        """
+        if self.instance.pk is None or not self.summary_aggregates:
+            return []
+        limit = LenghtField.ADMIN_COUNT_LIMIT.value
+        aggregates = {
+            f"value_{index}": aggregate
+            for index, aggregate in enumerate(self.summary_aggregates.values())
+        }
+        values = self.queryset[:limit].aggregate(rows=Count("pk"), **aggregates)
+        suffix = "+" if values["rows"] >= limit else ""
+        return [
+            (label, f"{values[f'value_{index}'] or 0}{suffix}")
+            for index, label in enumerate(self.summary_aggregates)
+        ]
+
+
+class PaginatedInlineMixin:
+    """
+    Встроенная таблица только для чтения, которая показывает сводку
+    и постраничный список связанных строк: страница изменения объекта
+    открывается за постоянное время, сколько бы строк к нему ни
+    относилось. Строки редактируются на своих страницах (ссылка
+    "Изменить" у каждой строки).
+    Attributes:
+        formset (BaseInlineFormSet): Постраничный формсет.
+        template (str): Шаблон таблицы со сводкой и ссылками на страницы.
+        summary_aggregates (dict): Подпись -> агрегат для сводки.
+        list_select_related (tuple): Связи, загружаемые одним JOIN.
+    """
+
+    formset = PaginatedInlineFormSet
+    template = "admin/food_shop/paginated_inline.html"
+    summary_aggregates = {}
+    list_select_related = ()
+    extra = 0
+    min_num = 0
+    can_delete = False
+    show_change_link = True
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.list_select_related:
+            queryset = queryset.select_related(*self.list_select_related)
+        return queryset
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        page_parameter = f"{formset.get_default_prefix()}-page"
+        page = request.GET.get(page_parameter, "")
+        return type(
+            formset.__name__,
+            (formset,),
+            {
+                "page_number": int(page) if page.isdigit() and int(page) else 1,
+                "page_parameter": page_parameter,
+                "query_params": request.GET,
+                "summary_aggregates": self.summary_aggregates,
+            },
+        )
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class CategorySubcategoryInline(PaginatedInlineMixin, admin.TabularInline):
     """
     Связь между категорией и подкатегорией товара в административной панели.
     Attributes:
         model (Model): Модель связи между категорией и подкатегорией.
-        min_num (int): Минимальное количество форм для отображения.
-        extra (int): Дополнительное количество пустых форм.
+        fields (tuple): Отображаемые поля.
+        summary_aggregates (dict): Число подкатегорий категории.
     """
+
     model = Subcategory
-    min_num = 0
-    extra = 0
+    fields = ("name", "slug")
+    readonly_fields = fields
+    summary_aggregates = {"Подкатегорий": Count("pk")}
 
 
-class SubcategoryProductInline(admin.TabularInline):
+class SubcategoryProductInline(PaginatedInlineMixin, admin.TabularInline):
     """
     Связь между подкатегорией и продуктом в административной панели.
     Attributes:
         model (Model): Модель связи между подкатегорией и продуктом.
-        min_num (int): Минимальное количество форм для отображения.
-        extra (int): Дополнительное количество пустых форм.
+        fields (tuple): Отображаемые поля.
+        summary_aggregates (dict): Число продуктов подкатегории.
     """
 
     model = Product
-    min_num = 0
-    extra = 0
+    fields = ("name", "slug", "price", "measurement_unit")
+    readonly_fields = fields
+    summary_aggregates = {"Продуктов": Count("pk")}
 
 
-class ProductShoppingCartInline(admin.TabularInline):
+class ProductShoppingCartInline(PaginatedInlineMixin, admin.TabularInline):
     """
     Связь между продуктом и продуктовой корзиной пользователя
     в административной панели.
     Attributes:
         model (Model): Модель связи между продуктами и корзиной.
-        min_num (int): Минимальное количество форм для отображения.
-        extra (int): Дополнительное количество пустых форм.
+        fields (tuple): Отображаемые поля.
+        list_select_related (tuple): Пользователь корзины для __str__.
+        summary_aggregates (dict): Число корзин с продуктом
+            и общее количество продукта в них.
+        ordering (tuple): Сортировка по первичному ключу (индекс).
     """
 
     model = ShoppingCartProduct
-    min_num = 0
+    fields = ("product_cart", "amount", "date_created")
+    readonly_fields = fields
+    list_select_related = ("product_cart__user",)
+    summary_aggregates = {
+        "Корзин": Count("pk"),
+        "Количество в корзинах": Sum("amount"),
+    }
+    ordering = ("-pk",)
+
+
+class ProductImageInline(admin.TabularInline):
+    """
+    Статусы фоновой обработки изображений продукта
+    в административной панели (только чтение).
+    Attributes:
+        model (Model): Модель состояния обработки изображения.
+        fields (tuple): Отображаемые поля.
+        readonly_fields (tuple): Поля только для чтения.
+        extra (int): Дополнительное количество пустых форм.
+        can_delete (bool): Запрет удаления записей.
+    """
+
+    model = ProductImage
+    fields = ("field_name", "status", "error", "date_updated")
+    readonly_fields = fields
     extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Category)
@@ -93,11 +387,33 @@ class SubcategoryAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
+@admin.register(CatalogNode)
+class CatalogNodeAdmin(MPTTModelAdmin):
+    """
+    Настроенная панель админки иерархического каталога.
+    Attributes:
+        list_display (tuple): Кортеж полей, отображаемых в списке записей.
+        search_fields (tuple): Кортеж полей, по которым осуществляется поиск.
+        raw_id_fields (tuple): Связанные поля, выбираемые по идентификатору.
+        empty_value_display (str): Значение, отображаемое при отсутствии значения поля.
+    """
+
+    list_display = ("name", "slug", "category", "subcategory")
+    search_fields = ("name", "slug")
+    raw_id_fields = ("category", "subcategory")
+    empty_value_display = "-пусто-"
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    """Настроенная панель админки продуктов."""
+    """
+    Настроенная панель админки продуктов.
+    Список рассчитан на большой каталог: подкатегории загружаются
+    одним JOIN, цена фильтруется диапазонами по индексу, подкатегория
+    выбирается поиском, а число строк не считается полным COUNT(*).
+    """
 
-    inlines = [ProductShoppingCartInline]
+    inlines = [ProductImageInline, ProductShoppingCartInline]
     list_display = (
         "pk",
         "name",
@@ -110,10 +426,24 @@ class ProductAdmin(admin.ModelAdmin):
         "icon_middle",
         "icon_big",
     )
-    search_fields = ("name", "slug", "date_add", "price", "measurement_unit")
-    list_filter = ("name", "subcategory", "price")
+    list_select_related = ("subcategory",)
+    # Поиск выполняется по полнотекстовому индексу (get_search_results).
+    search_fields = ("name", "slug")
+    list_filter = ("subcategory", PriceRangeListFilter)
+    autocomplete_fields = ("subcategory",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Поиск по названию и слагу через полнотекстовый индекс
+        вместо сканирования таблицы с icontains.
+        """
+        if not search_term:
+            return queryset, False
+        return queryset.search(search_term), False
+
     def display_icon(self, obj, field_name):
         """
         Возвращает отображение иконки категории по указанному полю.
@@ -150,22 +480,32 @@ class ProductAdmin(admin.ModelAdmin):
 
 
 @admin.register(ProductCart)
-class ProductCartAdmin(admin.ModelAdmin):
-    """Настроенная панель админки продуктовой корзины."""
+class ProductCartAdmin(ExactSearchMixin, admin.ModelAdmin):
+    """
+    Настроенная панель админки продуктовой корзины.
+    Пользователь выбирается поиском; поиск корзин нужен и для выбора
+    корзины в позициях корзин.
+    """
 
     list_display = (
         "pk",
         "user",
         "date_created",
+        "item_count",
+        "total_amount",
+        "total_price",
     )
-    search_fields = (
-        "user",
-        "date_created",
-    )
-    list_filter = (
-        "user",
-        "date_created",
+    list_select_related = ("user",)
+    readonly_fields = (
+        "item_count",
+        "total_amount",
+        "total_price",
     )
+    search_fields = ("=user__username", "=user__email")
+    list_filter = ("date_created",)
+    autocomplete_fields = ("user",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = "-пусто-"
 
     def formatted_date_created(self, obj):
@@ -175,8 +515,12 @@ class ProductCartAdmin(admin.ModelAdmin):
 
 
 @admin.register(ShoppingCartProduct)
-class ShoppingCartProductAdmin(admin.ModelAdmin):
-    """Настроенная панель админки продуктовой корзины товаров."""
+class ShoppingCartProductAdmin(ExactSearchMixin, admin.ModelAdmin):
+    """
+    Настроенная панель админки продуктовой корзины товаров.
+    Позиции сортируются по первичному ключу (индекс), корзина и продукт
+    выбираются поиском, поиск - точный по пользователю и слагу продукта.
+    """
 
     list_display = (
         "pk",
@@ -187,16 +531,17 @@ class ShoppingCartProductAdmin(admin.ModelAdmin):
         "amount",
         "date_created",
     )
+    # __str__ корзины и позиции обращается к пользователю и продукту.
+    list_select_related = ("product_cart__user", "product")
     search_fields = (
-        "pk",
-        "product_cart",
-        "product",
-        "product_id",
-        "amount",
-        "date_created",
-    )
-    list_filter = (
-        "product_cart",
-        "product",
+        "=pk",
+        "=product_cart__user__username",
+        "=product__slug",
     )
+    list_filter = (AmountRangeListFilter,)
+    autocomplete_fields = ("product_cart", "product")
+    # Meta.ordering по date_created не индексирован.
+    ordering = ("-pk",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = "-пусто-"
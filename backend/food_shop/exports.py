@@ -0,0 +1,120 @@
+import csv
+import json
+
+from core.constants import LenghtField
+from .models import Product
+
+# Колонки выгрузки. Имена subcategory_name/measurement_unit/price/name
+# совпадают с форматом import_catalog, поэтому выгрузку можно загрузить
+# обратно.
+EXPORT_COLUMNS = {
+    "id": "id",
+    "name": "name",
+    "slug": "slug",
+    "price": "price",
+    "measurement_unit": "measurement_unit",
+    "subcategory_name": "subcategory__name",
+    "category_name": "subcategory__category__name",
+    "date_add": "date_add",
+}
+
+
+def iter_products(after_id=None, chunk_size=LenghtField.EXPORT_CHUNK_SIZE.value):
+    """
+    Потоково выбирает продукты с подкатегорией и категорией одним
+    запросом с JOIN в порядке id. iterator() не кэширует строки
+    (на PostgreSQL - серверный курсор), поэтому память не зависит
+    от размера каталога.
+    :param after_id: Выгрузить продукты с id больше заданного
+        (продолжение прерванной выгрузки).
+    :param chunk_size: Сколько строк получать из БД за раз.
+    :return: Итератор словарей с ключами EXPORT_COLUMNS.
+    """
+
+    queryset = Product.objects.order_by("id")
+    if after_id is not None:
+        queryset = queryset.filter(id__gt=after_id)
+    for row in queryset.values_list(*EXPORT_COLUMNS.values()).iterator(
+        chunk_size=chunk_size
+    ):
+        record = dict(zip(EXPORT_COLUMNS, row))
+        record["price"] = str(record["price"])
+        record["date_add"] = record["date_add"].isoformat()
+        yield record
+
+
+def iter_ndjson(records, header=True):
+    """Строки NDJSON: один JSON-объект на строку."""
+
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class _Line:
+    """Буфер csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(records, header=True):
+    """Строки CSV; заголовок - только если header=True."""
+
+    writer = csv.DictWriter(_Line(), fieldnames=list(EXPORT_COLUMNS))
+    if header:
+        yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+EXPORT_FORMATS = {
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+    "csv": (iter_csv, "text/csv"),
+}
+
+
+def export_catalog(export_format, after_id=None, header=True, chunk_size=None):
+    """
+    Выгрузка каталога в заданном формате.
+    :param export_format: Формат из EXPORT_FORMATS.
+    :param after_id: Продолжить после продукта с этим id.
+    :param header: Выводить заголовок CSV.
+    :param chunk_size: Сколько строк получать из БД за раз.
+    :return: Итератор строк выгрузки.
+    """
+
+    serialize, _ = EXPORT_FORMATS[export_format]
+    records = iter_products(after_id, chunk_size or LenghtField.EXPORT_CHUNK_SIZE.value)
+    return serialize(records, header=header)
+
+
+RESUME_TAIL_SIZE = 64 * 1024
+
+
+def find_resume_point(path, export_format):
+    """
+    Точка продолжения выгрузки в файл: id последней полностью
+    записанной строки и длина файла до конца этой строки (оборванная
+    последняя строка отбрасывается). Читается только конец файла.
+    :param path: Путь к файлу выгрузки.
+    :param export_format: Формат из EXPORT_FORMATS.
+    :return: Кортеж (id или None, длина файла в байтах).
+    """
+
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        start = f.seek(max(size - RESUME_TAIL_SIZE, 0))
+        tail = f.read()
+    end = tail.rfind(b"\n") + 1
+    lines = tail[:end].decode("utf-8", errors="ignore").splitlines()
+    if start:
+        # Первая строка хвоста может быть неполной.
+        lines = lines[1:]
+    for line in reversed(lines):
+        try:
+            if export_format == "ndjson":
+                return int(json.loads(line)["id"]), start + end
+            return int(next(csv.reader([line]))[0]), start + end
+        except (ValueError, KeyError, IndexError, StopIteration):
+            continue
+    return None, start + end
@@ -0,0 +1,288 @@
+import atexit
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.utils import timezone
+
+from core.constants import CacheTimeout
+from .models import GuestCart, Product, ProductCart, apply_cart_operations
+
+logger = logging.getLogger(__name__)
+
+GUEST_CART_HEADER = "X-Guest-Cart-Id"
+SIGNING_SALT = "food_shop.guest_cart"
+# Сколько секунд ждать блокировку корзины, занятую другим запросом.
+LOCK_WAIT = 2
+LOCK_RETRY_DELAY = 0.005
+
+_pending = set()
+_lock = threading.Lock()
+_flusher = None
+
+
+def new_guest_cart_id():
+    """
+    Новый идентификатор гостевой корзины.
+    Возвращает кортеж (guest_id, подписанный идентификатор для клиента).
+    """
+
+    guest_id = uuid.uuid4().hex
+    return guest_id, signing.Signer(salt=SIGNING_SALT).sign(guest_id)
+
+
+def unsign_guest_cart_id(signed_id):
+    """
+    Проверяет подпись идентификатора гостевой корзины.
+    Возвращает: str: guest_id или None, если подпись неверна.
+    """
+
+    if not signed_id:
+        return None
+    try:
+        return signing.Signer(salt=SIGNING_SALT).unsign(signed_id)
+    except signing.BadSignature:
+        return None
+
+
+def get_request_guest_id(request):
+    """Идентификатор гостевой корзины из заголовка X-Guest-Cart-Id."""
+
+    return unsign_guest_cart_id(request.headers.get(GUEST_CART_HEADER))
+
+
+class GuestCartBusyError(Exception):
+    """Корзину дольше LOCK_WAIT секунд изменяет другой запрос."""
+
+
+def get_snapshot_cutoff():
+    """
+    Граница устаревания снимков: корзина, не менявшаяся дольше
+    CacheTimeout.GUEST_CART, считается брошенной.
+    """
+
+    return timezone.now() - timedelta(seconds=CacheTimeout.GUEST_CART.value)
+
+
+class GuestCartStore:
+    """
+    Хранилище гостевых корзин в кэше (псевдоним GUEST_CART_CACHE_ALIAS).
+    Корзина - словарь {идентификатор продукта: количество}. Изменения
+    пишутся в кэш, а в БД снимки попадают после фиксации запроса или
+    с задержкой (см. schedule_flush); при промахе кэша корзина читается
+    из снимка.
+    Изменения выполняются через update() под блокировкой корзины,
+    чтобы параллельные запросы одного гостя не теряли изменения.
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.GUEST_CART_CACHE_ALIAS]
+
+    @staticmethod
+    def get_key(guest_id):
+        return f"guest_cart:{guest_id}"
+
+    def get(self, guest_id):
+        """
+        Получить корзину гостя.
+        Возвращает: dict: Количество по идентификаторам продуктов.
+        """
+
+        amounts = self.cache.get(self.get_key(guest_id))
+        if amounts is None:
+            items = (
+                GuestCart.objects.filter(
+                    guest_id=guest_id, date_updated__gte=get_snapshot_cutoff()
+                )
+                .values_list("items", flat=True)
+                .first()
+            )
+            amounts = {
+                int(product_id): amount for product_id, amount in (items or {}).items()
+            }
+            self.cache.set(
+                self.get_key(guest_id), amounts, CacheTimeout.GUEST_CART.value
+            )
+        return amounts
+
+    @contextmanager
+    def lock(self, guest_id):
+        """
+        Блокировка корзины на время чтения-изменения-записи через
+        атомарный cache.add. Блокировка истекает через
+        CacheTimeout.GUEST_CART_LOCK, если запрос не снял ее сам.
+        Исключения: GuestCartBusyError, если блокировку не удалось
+        получить за LOCK_WAIT секунд.
+        """
+
+        key = f"{self.get_key(guest_id)}:lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_WAIT
+        while not self.cache.add(key, token, CacheTimeout.GUEST_CART_LOCK.value):
+            if time.monotonic() >= deadline:
+                raise GuestCartBusyError(guest_id)
+            time.sleep(LOCK_RETRY_DELAY)
+        try:
+            yield
+        finally:
+            # Не снимаем чужую блокировку, если наша уже истекла.
+            if self.cache.get(key) == token:
+                self.cache.delete(key)
+
+    def update(self, guest_id, operations, require=None):
+        """
+        Применить операции к корзине гостя под блокировкой корзины.
+        Параметры:
+        guest_id (str): Идентификатор корзины.
+        operations (list): Операции для apply_cart_operations.
+        require (int): Продукт, который должен быть в корзине.
+        Возвращает: dict: Сохраненная корзина или None, если продукта
+        require в корзине нет (корзина не меняется).
+        """
+
+        with self.lock(guest_id):
+            amounts = self.get(guest_id)
+            if require is not None and require not in amounts:
+                return None
+            return self.save(guest_id, apply_cart_operations(amounts, operations))
+
+    def clear(self, guest_id):
+        """
+        Очистить корзину гостя под блокировкой корзины.
+        """
+
+        with self.lock(guest_id):
+            return self.save(guest_id, {})
+
+    def save(self, guest_id, amounts):
+        """
+        Сохранить корзину гостя в кэш и поставить ее в очередь записи в БД.
+        """
+
+        amounts = {
+            product_id: amount for product_id, amount in amounts.items() if amount
+        }
+        self.cache.set(self.get_key(guest_id), amounts, CacheTimeout.GUEST_CART.value)
+        schedule_flush(guest_id)
+        return amounts
+
+    def delete(self, guest_id):
+        """
+        Удалить корзину гостя из кэша, очереди записи и БД.
+        """
+
+        self.cache.delete(self.get_key(guest_id))
+        with _lock:
+            _pending.discard(guest_id)
+        GuestCart.objects.filter(guest_id=guest_id).delete()
+
+
+def schedule_flush(guest_id):
+    """
+    Ставит корзину в очередь записи в БД. Если задан
+    GUEST_CART_FLUSH_INTERVAL, очередь раз в интервал записывает фоновый
+    поток (запускается при первой записи), иначе очередь записывается
+    после фиксации транзакции текущего запроса.
+    """
+
+    global _flusher
+    with _lock:
+        _pending.add(guest_id)
+    if settings.GUEST_CART_FLUSH_INTERVAL <= 0:
+        transaction.on_commit(flush_pending)
+        return
+    with _lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(
+            target=_flush_forever, name="guest-cart-flusher", daemon=True
+        )
+        _flusher.start()
+        atexit.register(flush_pending)
+
+
+def _flush_forever():
+    stop = threading.Event()
+    while not stop.wait(settings.GUEST_CART_FLUSH_INTERVAL):
+        try:
+            flush_pending()
+        except Exception:
+            logger.exception("Ошибка записи гостевых корзин")
+        finally:
+            # Соединения с БД привязаны к потоку: закрываем их после записи.
+            connections.close_all()
+
+
+def flush_pending():
+    """
+    Записывает корзины из очереди в БД одним множественным upsert'ом.
+    Возвращает: int: Количество записанных корзин.
+    """
+
+    global _pending
+    with _lock:
+        guest_ids, _pending = _pending, set()
+    if not guest_ids:
+        return 0
+
+    store = GuestCartStore()
+    carts = store.cache.get_many([store.get_key(guest_id) for guest_id in guest_ids])
+    snapshots = [
+        GuestCart(guest_id=guest_id, items=carts[store.get_key(guest_id)])
+        for guest_id in guest_ids
+        if store.get_key(guest_id) in carts
+    ]
+    with transaction.atomic():
+        GuestCart.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=["guest_id"],
+            update_fields=["items", "date_updated"],
+        )
+    return len(snapshots)
+
+
+def delete_expired_snapshots():
+    """
+    Удаляет снимки корзин, не менявшихся дольше CacheTimeout.GUEST_CART
+    (такие снимки уже не читаются, см. GuestCartStore.get).
+    Возвращает: int: Количество удаленных снимков.
+    """
+
+    deleted, _ = GuestCart.objects.filter(
+        date_updated__lt=get_snapshot_cutoff()
+    ).delete()
+    return deleted
+
+
+def merge_guest_cart(guest_id, user):
+    """
+    Переносит гостевую корзину в продуктовую корзину пользователя
+    одним множественным upsert'ом и удаляет гостевую корзину.
+    Корзина читается и удаляется под блокировкой корзины, чтобы
+    параллельные изменения гостя не потерялись и не перенеслись дважды.
+    Продукты, удаленные из каталога, пока лежали в корзине, пропускаются.
+    """
+
+    store = GuestCartStore()
+    with store.lock(guest_id):
+        amounts = store.get(guest_id)
+        available = set(
+            Product.objects.filter(id__in=amounts).values_list("id", flat=True)
+        )
+        amounts = {
+            product_id: amount
+            for product_id, amount in amounts.items()
+            if product_id in available
+        }
+        if amounts:
+            product_cart, _ = ProductCart.objects.get_or_create(user=user)
+            product_cart.merge_items(amounts)
+        store.delete(guest_id)
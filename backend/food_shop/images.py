@@ -0,0 +1,353 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from core.cache import bump_cache_version
+from core.constants import CacheNamespace, LenghtField
+from .models import Product, ProductImage
+
+logger = logging.getLogger(__name__)
+
+# Поля изображений продукта от большего размера к меньшему:
+# источником служит самое большое из заполненных изображений.
+ICON_SIZES = {
+    "icon_big": LenghtField.ICON_BIG_SIZE.value,
+    "icon_middle": LenghtField.ICON_MIDDLE_SIZE.value,
+    "icon_small": LenghtField.ICON_SMALL_SIZE.value,
+}
+
+# Метаданные, которые сохраняются в производных изображениях
+# (прозрачность палитровых PNG); EXIF, ICC и прочее отбрасываются.
+KEPT_IMAGE_INFO = ("transparency",)
+
+_executor = None
+
+
+def get_executor():
+    """
+    Пул потоков обработки изображений (создается при первом обращении).
+    """
+
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PROCESSING_WORKERS,
+            thread_name_prefix="product-images",
+        )
+    return _executor
+
+
+def get_changed_image_fields(product, created=False):
+    """
+    Поля изображений, файлы которых заменены с момента загрузки продукта
+    из БД (или все заполненные поля для нового продукта). Запоминает
+    текущие имена файлов, чтобы повторное сохранение их не учитывало.
+    Параметры:
+    product (Product): Сохраненный продукт.
+    created (bool): Продукт создан, а не изменен.
+    Возвращает:
+    list: Имена измененных полей.
+    """
+
+    current = {
+        field_name: getattr(product, field_name).name or "" for field_name in ICON_SIZES
+    }
+    loaded = getattr(product, "_loaded_images", None)
+    if created or loaded is None:
+        changed = [field_name for field_name, name in current.items() if name]
+    else:
+        changed = [
+            field_name
+            for field_name, name in current.items()
+            if field_name in loaded and loaded[field_name] != name
+        ]
+    product._loaded_images = current
+    return changed
+
+
+def enqueue_product_images(product, created=False):
+    """
+    Ставит изображения продукта в очередь обработки, если файлы
+    изображений заменены: сохранение без замены файлов (например,
+    изменение цены) не выполняет ни запросов, ни файлового ввода-вывода.
+    Статусы полей переводятся в "В очереди", а сама обработка
+    запускается только после фиксации транзакции сохранения продукта.
+    Параметры:
+    product (Product): Сохраненный продукт.
+    created (bool): Продукт создан, а не изменен.
+    """
+
+    if not get_changed_image_fields(product, created):
+        return
+    if not any(getattr(product, field_name) for field_name in ICON_SIZES):
+        return
+
+    ProductImage.objects.bulk_create(
+        [
+            ProductImage(
+                product=product,
+                field_name=field_name,
+                status=ProductImage.Status.PENDING,
+            )
+            for field_name in ICON_SIZES
+        ],
+        update_conflicts=True,
+        unique_fields=["product", "field_name"],
+        update_fields=["status", "error", "date_updated"],
+    )
+    transaction.on_commit(lambda: submit_product_images(product.pk))
+
+
+def submit_product_images(product_id):
+    """
+    Передает обработку изображений продукта в пул потоков
+    (или выполняет ее сразу при IMAGE_PROCESSING_EAGER).
+    """
+
+    if settings.IMAGE_PROCESSING_EAGER:
+        _process_safely(product_id)
+        return None
+    return get_executor().submit(_process_in_worker, product_id)
+
+
+def _process_safely(product_id):
+    try:
+        process_product_images(product_id)
+    except Exception:
+        logger.exception("Ошибка обработки изображений продукта %s", product_id)
+
+
+def _process_in_worker(product_id):
+    try:
+        _process_safely(product_id)
+    finally:
+        # Соединения с БД привязаны к потоку: закрываем их после задачи.
+        connections.close_all()
+
+
+def resize_image(image, max_size):
+    """
+    Уменьшает копию изображения так, чтобы ни ширина, ни высота
+    не превышали заданное значение, сохраняя пропорции.
+    Параметры:
+    image (Image): Декодированное изображение.
+    max_size (int): Максимальное значение для ширины и высоты изображения.
+    Возвращает:
+    Image: Уменьшенная копия изображения.
+    """
+
+    resized = image.copy()
+    resized.thumbnail((max_size, max_size))
+    return resized
+
+
+def get_variant_formats():
+    """
+    Дополнительные форматы производных изображений из
+    IMAGE_VARIANT_FORMATS, которые поддерживает установленный Pillow
+    (например, AVIF доступен не во всех сборках).
+    """
+
+    Image.init()
+    return [
+        image_format
+        for image_format in settings.IMAGE_VARIANT_FORMATS
+        if image_format in Image.SAVE
+    ]
+
+
+def get_encoder_options(image_format):
+    """
+    Параметры кодирования формата: качество из IMAGE_QUALITY,
+    прогрессивный JPEG, оптимизация таблиц Хаффмана и палитры PNG,
+    самый медленный (и компактный) режим WebP.
+    """
+
+    quality = settings.IMAGE_QUALITY.get(image_format)
+    options = {"quality": quality} if quality else {}
+    if image_format == "JPEG":
+        options.update(optimize=True, progressive=True)
+    elif image_format == "PNG":
+        options.update(optimize=True)
+    elif image_format == "WEBP":
+        options.update(method=6)
+    return options
+
+
+def strip_metadata(image):
+    """
+    Поворачивает изображение по EXIF-ориентации и удаляет метаданные
+    (EXIF, ICC-профиль, комментарии), которые иначе попадают
+    в каждое производное изображение.
+    """
+
+    image = ImageOps.exif_transpose(image)
+    image.info = {
+        key: value for key, value in image.info.items() if key in KEPT_IMAGE_INFO
+    }
+    return image
+
+
+def encode_image(image, image_format):
+    """
+    Кодирует изображение в байты заданного формата с параметрами
+    get_encoder_options.
+    """
+
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **get_encoder_options(image_format))
+    return buffer.getvalue()
+
+
+def save_derivative(product, field_name, content, extension):
+    """
+    Сохраняет производное изображение в хранилище поля, перезаписывая
+    текущий файл поля или создавая новый, если поле пустое.
+    Возвращает: str: Имя сохраненного файла.
+    """
+
+    field_file = getattr(product, field_name)
+    storage = field_file.storage
+    if field_file:
+        name = field_file.name
+        storage.delete(name)
+    else:
+        name = field_file.field.generate_filename(
+            product, f"{product.slug or product.pk}.{extension}"
+        )
+    return storage.save(name, ContentFile(content))
+
+
+def save_variant(product, field_name, derivative_name, content, extension):
+    """
+    Сохраняет изображение дополнительного формата рядом с производным
+    изображением поля (то же имя с другим расширением).
+    Возвращает: str: Имя сохраненного файла.
+    """
+
+    storage = getattr(product, field_name).storage
+    name = f"{os.path.splitext(derivative_name)[0]}.{extension}"
+    storage.delete(name)
+    return storage.save(name, ContentFile(content))
+
+
+def read_image_files(product):
+    """
+    Читает заполненные изображения продукта и считает их хэши.
+    Возвращает: dict: {поле: (содержимое, sha256)}.
+    """
+
+    files = {}
+    for field_name in ICON_SIZES:
+        field_file = getattr(product, field_name)
+        if field_file:
+            with field_file.open("rb") as f:
+                content = f.read()
+            files[field_name] = (content, hashlib.sha256(content).hexdigest())
+    return files
+
+
+def process_product_images(product_id):
+    """
+    Строит размеры фото продукта из одного декодирования исходника.
+    Исходником служит самое большое изображение, чей хэш отличается от
+    записанного при прошлой обработке; пересобираются оно, меньшие
+    размеры и пустые поля, остальные файлы не трогаются. Если ни один
+    файл не изменился, обработка ничего не пишет. Исходник, уже
+    укладывающийся в размер своего поля, не перекодируется (без потери
+    качества). Каждый собранный размер сохраняется в формате исходника
+    и в дополнительных форматах (WebP, AVIF) без метаданных. Результаты
+    записываются через update(), поэтому post_save повторно не вызывается.
+    Параметры:
+    product_id (int): Идентификатор продукта.
+    """
+
+    claimed = ProductImage.objects.filter(
+        product_id=product_id, status=ProductImage.Status.PENDING
+    ).update(status=ProductImage.Status.PROCESSING, error="")
+    if not claimed:
+        return
+
+    images = ProductImage.objects.filter(
+        product_id=product_id, status=ProductImage.Status.PROCESSING
+    )
+    product = Product.objects.filter(pk=product_id).first()
+    try:
+        files = read_image_files(product) if product else {}
+        records = {image.field_name: image for image in images}
+        changed = [
+            field_name
+            for field_name, (_, content_hash) in files.items()
+            if field_name not in records
+            or records[field_name].content_hash != content_hash
+        ]
+        if not changed:
+            images.update(status=ProductImage.Status.DONE)
+            return
+
+        source_field = changed[0]
+        content, source_hash = files[source_field]
+        image = Image.open(BytesIO(content))
+        image.load()
+        image_format = image.format or "PNG"
+        source_size = image.size
+        image = strip_metadata(image)
+        extension = os.path.splitext(getattr(product, source_field).name)[1]
+        extension = extension.lstrip(".") or image_format.lower()
+
+        sizes = list(ICON_SIZES)
+        rebuild = [
+            field_name
+            for field_name in sizes
+            if field_name not in files
+            or sizes.index(field_name) >= sizes.index(source_field)
+        ]
+        updates = {}
+        variants = dict(product.icon_variants or {})
+        variant_formats = get_variant_formats()
+        for field_name, max_size in ICON_SIZES.items():
+            image = resize_image(image, max_size)
+            if field_name not in rebuild:
+                continue
+            record = records[field_name]
+            if field_name == source_field and max(source_size) <= max_size:
+                name = getattr(product, field_name).name
+                record.content_hash = source_hash
+            else:
+                encoded = encode_image(image, image_format)
+                name = updates[field_name] = save_derivative(
+                    product, field_name, encoded, extension
+                )
+                record.content_hash = hashlib.sha256(encoded).hexdigest()
+            record.width, record.height = image.size
+            variants[field_name] = {
+                variant_format.lower(): save_variant(
+                    product,
+                    field_name,
+                    name,
+                    encode_image(image, variant_format),
+                    variant_format.lower(),
+                )
+                for variant_format in variant_formats
+            }
+        Product.objects.filter(pk=product_id).update(icon_variants=variants, **updates)
+        ProductImage.objects.bulk_update(
+            [records[field_name] for field_name in rebuild],
+            ["content_hash", "width", "height"],
+        )
+        # update() не вызывает сигналы: ссылки на изображения в ответах
+        # каталога изменились, поэтому версию каталога меняем вручную.
+        bump_cache_version(CacheNamespace.CATALOG)
+    except Exception as error:
+        images.update(status=ProductImage.Status.FAILED, error=str(error))
+        raise
+    images.update(status=ProductImage.Status.DONE)
@@ -4,6 +4,4 @@ from django.core.management.base import BaseCommand
 
 class Command(BaseCommand):
     def handle(self, *args, **options):
-        call_command("add_сategory")
-        call_command("add_subсategory")
-        call_command("add_product")
\ No newline at end of file
+        call_command("import_catalog")
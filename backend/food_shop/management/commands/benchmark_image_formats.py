@@ -0,0 +1,97 @@
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from PIL import Image
+
+from food_shop.images import (
+    ICON_SIZES,
+    encode_image,
+    get_variant_formats,
+    resize_image,
+    strip_metadata,
+)
+from food_shop.models import Product
+
+
+def encode_legacy(image, image_format):
+    """
+    Кодирование до оптимизации: формат исходника, параметры Pillow
+    по умолчанию, метаданные исходника сохраняются.
+    """
+
+    buffer = BytesIO()
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.save(buffer, format=image_format, exif=image.info.get("exif", b""))
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает размер производных фото продуктов: прежнее кодирование"
+        " в формате исходника, настроенное кодирование без метаданных и"
+        " дополнительные форматы (WebP, AVIF). Фото для синтетического"
+        " каталога добавляет seed_catalog --images N."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=100,
+            help="Сколько продуктов с фото обработать.",
+        )
+
+    def handle(self, *args, **options):
+        products = (
+            Product.objects.exclude(Q(icon_big="") | Q(icon_big__isnull=True))
+            .order_by("id")[: options["limit"]]
+        )
+        variant_formats = get_variant_formats()
+        columns = ["legacy", "tuned", *(fmt.lower() for fmt in variant_formats)]
+        totals = {field_name: dict.fromkeys(columns, 0) for field_name in ICON_SIZES}
+
+        count = 0
+        for product in products:
+            with product.icon_big.open("rb") as source:
+                original = Image.open(source)
+                original.load()
+            image_format = original.format or "PNG"
+            legacy = original
+            image = strip_metadata(original)
+            for field_name, max_size in ICON_SIZES.items():
+                legacy = resize_image(legacy, max_size)
+                image = resize_image(image, max_size)
+                sizes = totals[field_name]
+                sizes["legacy"] += len(encode_legacy(legacy, image_format))
+                sizes["tuned"] += len(encode_image(image, image_format))
+                for variant_format in variant_formats:
+                    sizes[variant_format.lower()] += len(
+                        encode_image(image, variant_format)
+                    )
+            count += 1
+        if not count:
+            raise CommandError(
+                "Нет продуктов с фото (см. manage.py seed_catalog --images N)."
+            )
+
+        self.stdout.write(
+            f"Продуктов с фото: {count}; размер в КБ и экономия"
+            " относительно прежнего кодирования."
+        )
+        self.stdout.write(
+            f"{'поле':<12}" + "".join(f"{column:>14}" for column in columns)
+        )
+        for field_name, sizes in totals.items():
+            legacy = sizes["legacy"]
+            self.stdout.write(
+                f"{field_name:<12}"
+                + "".join(
+                    f"{sizes[column] / 1024:>8.0f}"
+                    f" {100 - 100 * sizes[column] / legacy:>+4.0f}%"
+                    if column != "legacy"
+                    else f"{legacy / 1024:>14.0f}"
+                    for column in columns
+                )
+            )
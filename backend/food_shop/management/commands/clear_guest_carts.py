@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from food_shop.guest_cart import delete_expired_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет снимки гостевых корзин, не менявшихся дольше срока"
+        " хранения гостевой корзины. Запускается по расписанию (cron)."
+    )
+
+    def handle(self, *args, **options):
+        deleted = delete_expired_snapshots()
+        self.stdout.write(
+            self.style.SUCCESS(f"Удалено {deleted} устаревших гостевых корзин.")
+        )
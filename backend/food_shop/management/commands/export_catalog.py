@@ -0,0 +1,83 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.constants import LenghtField
+from food_shop.exports import EXPORT_FORMATS, export_catalog, find_resume_point
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковая выгрузка каталога продуктов в NDJSON или CSV с"
+        " постоянным расходом памяти. Прерванную выгрузку в файл можно"
+        " продолжить с --resume (или явно с --after-id)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", dest="export_format", choices=EXPORT_FORMATS,
+            default="ndjson",
+        )
+        parser.add_argument(
+            "--output", help="Файл выгрузки (по умолчанию stdout)."
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            help="Выгрузить продукты с id больше заданного.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Продолжить выгрузку в --output после последней"
+                 " полностью записанной строки.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=LenghtField.EXPORT_CHUNK_SIZE.value,
+            help="Сколько строк получать из БД за раз.",
+        )
+
+    def handle(self, *args, **options):
+        export_format = options["export_format"]
+        after_id = options["after_id"]
+        mode = "w"
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size должен быть положительным.")
+        if options["resume"]:
+            if not options["output"]:
+                raise CommandError("--resume требует --output.")
+            try:
+                after_id, offset = find_resume_point(
+                    options["output"], export_format
+                )
+            except FileNotFoundError:
+                offset = 0
+            else:
+                with open(options["output"], "rb+") as f:
+                    f.truncate(offset)
+                mode = "a"
+        header = mode == "w" or offset == 0
+
+        lines = export_catalog(
+            export_format,
+            after_id=after_id,
+            header=header,
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"]:
+            with open(
+                options["output"], mode, encoding="utf-8", newline=""
+            ) as f:
+                count = self.write(f, lines)
+        else:
+            count = self.write(sys.stdout, lines)
+        self.stderr.write(f"Выгружено строк: {count}.")
+
+    def write(self, stream, lines):
+        count = 0
+        for line in lines:
+            stream.write(line)
+            count += 1
+        return count
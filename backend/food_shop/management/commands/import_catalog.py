@@ -0,0 +1,301 @@
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.cache import bump_cache_version
+from core.constants import CacheNamespace, LenghtField
+from food_shop.models import (
+    CatalogNode,
+    Category,
+    Product,
+    ProductCart,
+    Subcategory,
+)
+
+MODELS = ("categories", "subcategories", "products")
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def iter_records(path):
+    """
+    Потоково читает записи из JSON-массива или NDJSON(.ndjson, .jsonl),
+    не загружая файл в память целиком.
+    """
+
+    with open(path, encoding="utf-8-sig") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        buffer = ""
+        started = False
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            buffer += chunk
+            while True:
+                buffer = buffer.lstrip()
+                if not started:
+                    if not buffer:
+                        break
+                    if buffer[0] != "[":
+                        raise CommandError(f"{path}: ожидается JSON-массив.")
+                    buffer = buffer[1:]
+                    started = True
+                    continue
+                if buffer.startswith(","):
+                    buffer = buffer[1:]
+                    continue
+                if buffer.startswith("]"):
+                    return
+                if not buffer:
+                    break
+                try:
+                    record, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise CommandError(f"{path}: некорректный JSON.")
+                    break
+                yield record
+                buffer = buffer[end:]
+            if not chunk:
+                raise CommandError(f"{path}: неожиданный конец файла.")
+
+
+def iter_batches(records, batch_size):
+    """Разбивает поток записей на пачки по batch_size."""
+
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ImportStats:
+    """Счетчики импорта одной модели."""
+
+    def __init__(self, label):
+        self.label = label
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.started = time.perf_counter()
+
+    def __str__(self):
+        total = self.inserted + self.updated + self.skipped
+        elapsed = time.perf_counter() - self.started
+        throughput = total / elapsed if elapsed else 0
+        return (
+            f"'{self.label}': добавлено {self.inserted}, обновлено {self.updated},"
+            f" пропущено {self.skipped} за {elapsed:.2f} с"
+            f" ({throughput:.0f} записей/с)."
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Пакетный импорт категорий, подкатегорий и продуктов из JSON/NDJSON"
+        " через bulk_create с обновлением существующих записей."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--models",
+            nargs="+",
+            choices=MODELS,
+            default=list(MODELS),
+            help="Какие данные импортировать.",
+        )
+        parser.add_argument(
+            "--categories-file", default="data/category.json"
+        )
+        parser.add_argument(
+            "--subcategories-file", default="data/subcategory.json"
+        )
+        parser.add_argument(
+            "--products-file", default="data/product.json"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=LenghtField.IMPORT_BATCH_SIZE.value,
+            help="Количество записей в одной транзакции.",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        if self.batch_size < 1:
+            raise CommandError("--batch-size должен быть положительным.")
+
+        # Категории держим в памяти: их немного, а имя не уникально в БД.
+        self.categories = dict(Category.objects.values_list("name", "id"))
+        self.subcategories = dict(Subcategory.objects.values_list("name", "id"))
+
+        if "categories" in options["models"]:
+            self.report(self.import_categories(options["categories_file"]))
+        if "subcategories" in options["models"]:
+            self.report(self.import_subcategories(options["subcategories_file"]))
+        if "products" in options["models"]:
+            self.report(self.import_products(options["products_file"]))
+
+        # bulk_create не вызывает сигналы: синхронизируем дерево и кэш вручную.
+        if {"categories", "subcategories"} & set(options["models"]):
+            CatalogNode.objects.sync_catalog()
+            bump_cache_version(CacheNamespace.CATEGORY_TREE)
+        bump_cache_version(CacheNamespace.CATALOG)
+
+    def report(self, stats):
+        self.stdout.write(self.style.SUCCESS(f"Загрузка {stats}"))
+
+    def ensure_categories(self, names):
+        """Создает отсутствующие категории одним bulk_create."""
+
+        missing = {name for name in names if name not in self.categories}
+        if not missing:
+            return 0
+        Category.objects.bulk_create([Category(name=name) for name in missing])
+        self.categories.update(
+            Category.objects.filter(name__in=missing).values_list("name", "id")
+        )
+        return len(missing)
+
+    def import_categories(self, path):
+        stats = ImportStats("Категорий")
+        for batch in iter_batches(iter_records(path), self.batch_size):
+            names = set()
+            for record in batch:
+                name = record.get("name")
+                if not name or name in self.categories or name in names:
+                    stats.skipped += 1
+                    continue
+                names.add(name)
+            with transaction.atomic():
+                stats.inserted += self.ensure_categories(names)
+        return stats
+
+    def import_subcategories(self, path):
+        stats = ImportStats("Подкатегорий")
+        for batch in iter_batches(iter_records(path), self.batch_size):
+            rows = {}
+            for record in batch:
+                name = record.get("name")
+                category_name = record.get("category_name")
+                if not name or not category_name or name in rows:
+                    stats.skipped += 1
+                    continue
+                rows[name] = category_name
+
+            with transaction.atomic():
+                self.ensure_categories(rows.values())
+                existing = dict(
+                    Subcategory.objects.filter(name__in=rows).values_list(
+                        "name", "category_id"
+                    )
+                )
+                objs = []
+                for name, category_name in rows.items():
+                    category_id = self.categories[category_name]
+                    if name not in existing:
+                        stats.inserted += 1
+                    elif existing[name] != category_id:
+                        stats.updated += 1
+                    else:
+                        stats.skipped += 1
+                        continue
+                    objs.append(Subcategory(name=name, category_id=category_id))
+                Subcategory.objects.bulk_create(
+                    objs,
+                    update_conflicts=True,
+                    unique_fields=["name"],
+                    update_fields=["category"],
+                )
+        self.subcategories = dict(Subcategory.objects.values_list("name", "id"))
+        return stats
+
+    def parse_product(self, record):
+        """
+        Проверяет запись продукта.
+        Возвращает кортеж (name, price, measurement_unit, subcategory_id)
+        или None, если запись нужно пропустить.
+        """
+
+        name = record.get("name")
+        subcategory_id = self.subcategories.get(record.get("subcategory_name"))
+        measurement_unit = record.get("measurement_unit") or "kg"
+        if not name or subcategory_id is None:
+            return None
+        if measurement_unit not in dict(Product.UNIT_CHOICES):
+            return None
+        try:
+            price = Decimal(str(record.get("price"))).quantize(Decimal("0.01"))
+        except (InvalidOperation, ValueError):
+            return None
+        if not (
+            LenghtField.MIN_PRICE_PRODUCT.value
+            <= price
+            <= LenghtField.MAX_PRICE_PRODUCT.value
+        ):
+            return None
+        return name, price, measurement_unit, subcategory_id
+
+    def import_products(self, path):
+        stats = ImportStats("Продуктов")
+        for batch in iter_batches(iter_records(path), self.batch_size):
+            rows = {}
+            for record in batch:
+                row = self.parse_product(record)
+                if row is None or row[0] in rows:
+                    stats.skipped += 1
+                    continue
+                rows[row[0]] = row
+
+            with transaction.atomic():
+                existing = {
+                    row[0]: row
+                    for row in Product.objects.filter(name__in=rows).values_list(
+                        "name", "price", "measurement_unit", "subcategory_id"
+                    )
+                }
+                objs = []
+                repriced = []
+                for name, row in rows.items():
+                    if name not in existing:
+                        stats.inserted += 1
+                    elif existing[name] != row:
+                        stats.updated += 1
+                        if existing[name][1] != row[1]:
+                            repriced.append(name)
+                    else:
+                        stats.skipped += 1
+                        continue
+                    objs.append(
+                        Product(
+                            name=name,
+                            price=row[1],
+                            measurement_unit=row[2],
+                            subcategory_id=row[3],
+                        )
+                    )
+                Product.objects.bulk_create(
+                    objs,
+                    update_conflicts=True,
+                    unique_fields=["name"],
+                    update_fields=["price", "measurement_unit", "subcategory"],
+                )
+                # bulk_create не вызывает сигналы: итоги корзин с
+                # подорожавшими/подешевевшими продуктами пересчитываем здесь.
+                if repriced:
+                    ProductCart.objects.filter(
+                        shopping_cart_products__product__name__in=repriced
+                    ).refresh_totals()
+        return stats
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from food_shop.images import process_product_images
+from food_shop.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Синхронно обрабатывает изображения продуктов из очереди"
+        " (например, после перезапуска процесса с незавершенными задачами)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Повторно поставить в очередь изображения с ошибкой"
+                 " и зависшие в обработке.",
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            ProductImage.objects.filter(
+                status__in=(
+                    ProductImage.Status.FAILED,
+                    ProductImage.Status.PROCESSING,
+                )
+            ).update(status=ProductImage.Status.PENDING)
+
+        product_ids = (
+            ProductImage.objects.filter(status=ProductImage.Status.PENDING)
+            .values_list("product_id", flat=True)
+            .distinct()
+        )
+        processed = failed = 0
+        for product_id in list(product_ids):
+            try:
+                process_product_images(product_id)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f"Продукт {product_id}: {error}")
+            else:
+                processed += 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Обработаны изображения {processed} продуктов,"
+                f" с ошибкой: {failed}."
+            )
+        )
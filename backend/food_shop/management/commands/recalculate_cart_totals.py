@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from food_shop.models import ProductCart
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает с нуля денормализованные итоги продуктовых корзин"
+        " (количество, стоимость и число позиций) по их содержимому."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            nargs="+",
+            dest="user_ids",
+            help="Пересчитать только корзины указанных пользователей.",
+        )
+
+    def handle(self, *args, **options):
+        carts = ProductCart.objects.all()
+        if options["user_ids"]:
+            carts = carts.filter(user_id__in=options["user_ids"])
+        updated = carts.refresh_totals()
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитаны итоги {updated} корзин.")
+        )
@@ -0,0 +1,121 @@
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from PIL import Image
+
+from core.constants import LenghtField
+from food_shop.management.commands.import_catalog import iter_batches
+from food_shop.models import Category, Product, Subcategory
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет каталог синтетическими продуктами для нагрузочных"
+        " проверок и бенчмарков (повторный запуск добавляет недостающие)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--products",
+            type=int,
+            default=1000,
+            help="Сколько синтетических продуктов должно быть в каталоге.",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="Бенчмарк",
+            help="Префикс названий категории, подкатегорий и продуктов.",
+        )
+        parser.add_argument(
+            "--images",
+            type=int,
+            default=0,
+            help="Скольким продуктам без фото добавить синтетическое"
+                 " большое фото (для benchmark_image_formats).",
+        )
+
+    def make_image(self, index):
+        """
+        Синтетическое фото 1200x900 (градиенты и шум, похоже на снимок
+        по сжимаемости) в формате JPEG.
+        """
+
+        size = (1200, 900)
+        image = Image.merge(
+            "RGB",
+            (
+                Image.linear_gradient("L").resize(size),
+                Image.radial_gradient("L").resize(size),
+                Image.effect_noise(size, 20 + index % 40),
+            ),
+        )
+        buffer = BytesIO()
+        image.save(buffer, format="JPEG", quality=95)
+        return buffer.getvalue()
+
+    def add_images(self, prefix, total):
+        """
+        Добавляет фото продуктам без фото. Фото записываются через
+        bulk_update без сигналов: производные строит process_product_images.
+        """
+
+        products = list(
+            Product.objects.filter(name__startswith=f"{prefix} продукт ")
+            .filter(Q(icon_big="") | Q(icon_big__isnull=True))
+            .order_by("id")[:total]
+        )
+        for product in products:
+            product.icon_big.save(
+                f"{product.slug}.jpg",
+                ContentFile(self.make_image(product.id)),
+                save=False,
+            )
+        Product.objects.bulk_update(products, ["icon_big"])
+        return len(products)
+
+    def handle(self, *args, **options):
+        total = options["products"]
+        prefix = options["prefix"]
+        if total < 1:
+            raise CommandError("--products должен быть положительным.")
+
+        category, _ = Category.objects.get_or_create(name=f"{prefix} категория")
+        subcategories = [
+            Subcategory.objects.get_or_create(
+                name=f"{prefix} подкатегория {index}",
+                defaults={"category": category},
+            )[0]
+            for index in range(10)
+        ]
+        existing = set(
+            Product.objects.filter(name__startswith=f"{prefix} продукт ")
+            .values_list("name", flat=True)
+        )
+        units = [unit for unit, _ in Product.UNIT_CHOICES]
+        missing = (
+            Product(
+                name=f"{prefix} продукт {index}",
+                subcategory=subcategories[index % len(subcategories)],
+                price=Decimal(10 + index % 990).quantize(Decimal("0.01")),
+                measurement_unit=units[index % len(units)],
+            )
+            for index in range(total)
+            if f"{prefix} продукт {index}" not in existing
+        )
+        created = 0
+        for batch in iter_batches(missing, LenghtField.IMPORT_BATCH_SIZE.value):
+            with transaction.atomic():
+                Product.objects.bulk_create(batch)
+            created += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано продуктов: {created}, уже было: {len(existing)}."
+            )
+        )
+        if options["images"] > 0:
+            added = self.add_images(prefix, options["images"])
+            self.stdout.write(self.style.SUCCESS(f"Добавлено фото: {added}."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0005_alter_shoppingcartproduct_product"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["-date_add", "-id"], name="product_date_add_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,144 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:06
+
+import autoslug.fields
+import django.db.models.deletion
+import food_shop.models
+import mptt.fields
+from django.db import migrations, models
+
+from food_shop.slugs import allocate_slugs
+
+
+def build_catalog_tree(apps, schema_editor):
+    """
+    Переносит плоские категории и подкатегории в дерево узлов:
+    каждая категория - корень отдельного дерева, ее подкатегории -
+    дочерние узлы. Поля nested set заполняются напрямую, так как
+    исторические модели не имеют менеджера django-mptt. Слаги узлов
+    назначает allocate_slugs: узлы категорий сохраняют слаг категории,
+    а совпадающим с ним слагам подкатегорий добавляется суффикс.
+    """
+
+    Category = apps.get_model("food_shop", "Category")
+    Subcategory = apps.get_model("food_shop", "Subcategory")
+    CatalogNode = apps.get_model("food_shop", "CatalogNode")
+
+    roots = []
+    children = []
+    categories = Category.objects.order_by("name", "id")
+    for tree_id, category in enumerate(categories, start=1):
+        subcategories = list(
+            Subcategory.objects.filter(category=category).order_by("name", "id")
+        )
+        root = CatalogNode(
+            name=category.name,
+            slug=category.slug,
+            category=category,
+            tree_id=tree_id,
+            level=0,
+            lft=1,
+            rght=2 * len(subcategories) + 2,
+        )
+        roots.append(root)
+        for position, subcategory in enumerate(subcategories):
+            children.append(
+                CatalogNode(
+                    name=subcategory.name,
+                    slug=subcategory.slug,
+                    subcategory=subcategory,
+                    parent=root,
+                    tree_id=tree_id,
+                    level=1,
+                    lft=2 * position + 2,
+                    rght=2 * position + 3,
+                )
+            )
+    allocate_slugs(roots + children)
+    CatalogNode.objects.bulk_create(roots)
+    CatalogNode.objects.bulk_create(children)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0006_product_date_add_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogNode",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=150, verbose_name="Название узла каталога"
+                    ),
+                ),
+                (
+                    "slug",
+                    autoslug.fields.AutoSlugField(
+                        editable=False,
+                        max_length=150,
+                        populate_from=food_shop.models.get_slug,
+                        unique=True,
+                        verbose_name="Слаг узла каталога",
+                    ),
+                ),
+                ("lft", models.PositiveIntegerField(editable=False)),
+                ("rght", models.PositiveIntegerField(editable=False)),
+                ("tree_id", models.PositiveIntegerField(db_index=True, editable=False)),
+                ("level", models.PositiveIntegerField(editable=False)),
+                (
+                    "category",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="catalog_node",
+                        to="food_shop.category",
+                        verbose_name="Категория",
+                    ),
+                ),
+                (
+                    "parent",
+                    mptt.fields.TreeForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="children",
+                        to="food_shop.catalognode",
+                        verbose_name="Родительский узел",
+                    ),
+                ),
+                (
+                    "subcategory",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="catalog_node",
+                        to="food_shop.subcategory",
+                        verbose_name="Подкатегория",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Узел каталога",
+                "verbose_name_plural": "Узлы каталога",
+                "indexes": [
+                    models.Index(
+                        fields=["tree_id", "lft"], name="catalog_node_tree_lft_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_catalog_tree, migrations.RunPython.noop),
+    ]
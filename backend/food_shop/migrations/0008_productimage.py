@@ -0,0 +1,82 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0007_catalognode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductImage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "field_name",
+                    models.CharField(
+                        choices=[
+                            ("icon_small", "Фото продукта маленькое"),
+                            ("icon_middle", "Фото продукта среднее"),
+                            ("icon_big", "Фото продукта большое"),
+                        ],
+                        max_length=50,
+                        verbose_name="Поле изображения",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("processing", "Обрабатывается"),
+                            ("done", "Готово"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Статус обработки",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, verbose_name="Ошибка обработки"),
+                ),
+                (
+                    "date_updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Дата изменения статуса"
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="images",
+                        to="food_shop.product",
+                        verbose_name="Продукт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изображение продукта",
+                "verbose_name_plural": "Изображения продуктов",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="productimage",
+            constraint=models.UniqueConstraint(
+                fields=("product", "field_name"), name="unique_product_image_field"
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:12
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def fill_cart_totals(apps, schema_editor):
+    """
+    Заполняет итоги существующих корзин по их позициям.
+    """
+
+    ProductCart = apps.get_model("food_shop", "ProductCart")
+    totals = ProductCart.objects.annotate(
+        sum_amount=Sum("shopping_cart_products__amount"),
+        sum_price=Sum(
+            F("shopping_cart_products__amount")
+            * F("shopping_cart_products__product__price")
+        ),
+        count_items=Count("shopping_cart_products"),
+    ).filter(count_items__gt=0)
+    for cart in totals:
+        ProductCart.objects.filter(pk=cart.pk).update(
+            total_amount=cart.sum_amount,
+            total_price=cart.sum_price,
+            item_count=cart.count_items,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0008_productimage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productcart",
+            name="item_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Количество позиций"
+            ),
+        ),
+        migrations.AddField(
+            model_name="productcart",
+            name="total_amount",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Общее количество продуктов"
+            ),
+        ),
+        migrations.AddField(
+            model_name="productcart",
+            name="total_price",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                max_digits=14,
+                verbose_name="Общая стоимость продуктов",
+            ),
+        ),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
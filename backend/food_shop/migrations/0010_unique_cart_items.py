@@ -0,0 +1,89 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:15
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+MAX_AMOUNT_PRODUCT = 1000
+
+
+def merge_duplicate_carts(apps, schema_editor):
+    """
+    Сливает дубли перед добавлением ограничений уникальности:
+    несколько корзин одного пользователя - в самую раннюю, несколько
+    позиций одного продукта в корзине - в одну с суммарным
+    (ограниченным сверху) количеством. Итоги затронутых корзин
+    пересчитываются.
+    """
+
+    ProductCart = apps.get_model("food_shop", "ProductCart")
+    ShoppingCartProduct = apps.get_model("food_shop", "ShoppingCartProduct")
+    touched = set()
+
+    duplicate_users = (
+        ProductCart.objects.values("user")
+        .annotate(carts=Count("id"))
+        .filter(carts__gt=1)
+        .values_list("user", flat=True)
+    )
+    for user_id in list(duplicate_users):
+        cart_ids = list(
+            ProductCart.objects.filter(user_id=user_id)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        ShoppingCartProduct.objects.filter(product_cart_id__in=cart_ids[1:]).update(
+            product_cart_id=cart_ids[0]
+        )
+        ProductCart.objects.filter(id__in=cart_ids[1:]).delete()
+        touched.add(cart_ids[0])
+
+    duplicate_items = (
+        ShoppingCartProduct.objects.values("product_cart", "product")
+        .annotate(items=Count("id"))
+        .filter(items__gt=1)
+    )
+    for row in list(duplicate_items):
+        items = ShoppingCartProduct.objects.filter(
+            product_cart_id=row["product_cart"], product_id=row["product"]
+        ).order_by("id")
+        keep = items.first()
+        amount = items.aggregate(total=Sum("amount"))["total"]
+        items.exclude(id=keep.id).delete()
+        items.update(amount=min(amount, MAX_AMOUNT_PRODUCT))
+        touched.add(row["product_cart"])
+
+    for cart_id in touched:
+        totals = ShoppingCartProduct.objects.filter(product_cart_id=cart_id).aggregate(
+            total_amount=Sum("amount"),
+            total_price=Sum(F("amount") * F("product__price")),
+            item_count=Count("id"),
+        )
+        ProductCart.objects.filter(id=cart_id).update(
+            total_amount=totals["total_amount"] or 0,
+            total_price=totals["total_price"] or 0,
+            item_count=totals["item_count"],
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0009_productcart_totals"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_carts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="productcart",
+            constraint=models.UniqueConstraint(
+                fields=("user",), name="unique_user_product_cart"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="shoppingcartproduct",
+            constraint=models.UniqueConstraint(
+                fields=("product_cart", "product"), name="unique_product_cart_product"
+            ),
+        ),
+    ]
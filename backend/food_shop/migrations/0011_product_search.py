@@ -0,0 +1,91 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:20
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    # Внешний (external content) индекс FTS5: хранит только индекс,
+    # сами данные берутся из food_shop_product по rowid.
+    """
+    CREATE VIRTUAL TABLE food_shop_product_fts USING fts5(
+        name,
+        slug,
+        content='food_shop_product',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER food_shop_product_fts_insert
+    AFTER INSERT ON food_shop_product BEGIN
+        INSERT INTO food_shop_product_fts(rowid, name, slug)
+        VALUES (new.id, new.name, new.slug);
+    END
+    """,
+    """
+    CREATE TRIGGER food_shop_product_fts_delete
+    AFTER DELETE ON food_shop_product BEGIN
+        INSERT INTO food_shop_product_fts(food_shop_product_fts, rowid, name, slug)
+        VALUES ('delete', old.id, old.name, old.slug);
+    END
+    """,
+    """
+    CREATE TRIGGER food_shop_product_fts_update
+    AFTER UPDATE OF name, slug ON food_shop_product BEGIN
+        INSERT INTO food_shop_product_fts(food_shop_product_fts, rowid, name, slug)
+        VALUES ('delete', old.id, old.name, old.slug);
+        INSERT INTO food_shop_product_fts(rowid, name, slug)
+        VALUES (new.id, new.name, new.slug);
+    END
+    """,
+    "INSERT INTO food_shop_product_fts(food_shop_product_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS food_shop_product_fts_update",
+    "DROP TRIGGER IF EXISTS food_shop_product_fts_delete",
+    "DROP TRIGGER IF EXISTS food_shop_product_fts_insert",
+    "DROP TABLE IF EXISTS food_shop_product_fts",
+]
+
+# Выражение индекса должно совпадать с выражением в Product.objects.search().
+POSTGRESQL_FORWARD = [
+    """
+    CREATE INDEX food_shop_product_search_idx ON food_shop_product
+    USING GIN (to_tsvector('simple', name || ' ' || slug))
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS food_shop_product_search_idx",
+]
+
+
+def run_for_vendor(statements):
+    """
+    Возвращает функцию миграции, выполняющую SQL только на той СУБД,
+    для которой он написан. На остальных поиск работает без индекса.
+    """
+
+    def run(apps, schema_editor):
+        vendor_statements = statements.get(schema_editor.connection.vendor, [])
+        for statement in vendor_statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0010_unique_cart_items"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(
+                {"sqlite": SQLITE_FORWARD, "postgresql": POSTGRESQL_FORWARD}
+            ),
+            run_for_vendor(
+                {"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRESQL_BACKWARD}
+            ),
+        ),
+    ]
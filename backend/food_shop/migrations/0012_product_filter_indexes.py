@@ -0,0 +1,38 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0011_product_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["subcategory", "-date_add", "-id"],
+                name="product_subcat_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["measurement_unit", "-date_add", "-id"],
+                name="product_unit_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["price", "-date_add", "-id"], name="product_price_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subcategory",
+            index=models.Index(
+                fields=["category", "name"], name="subcategory_category_name_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0012_product_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GuestCart",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "guest_id",
+                    models.CharField(
+                        max_length=32,
+                        unique=True,
+                        verbose_name="Идентификатор гостевой корзины",
+                    ),
+                ),
+                (
+                    "items",
+                    models.JSONField(
+                        default=dict, verbose_name="Продукты гостевой корзины"
+                    ),
+                ),
+                (
+                    "date_updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Дата обновления гостевой корзины"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Гостевая корзина",
+                "verbose_name_plural": "Гостевые корзины",
+            },
+        ),
+    ]
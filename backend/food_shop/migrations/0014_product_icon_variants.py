@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0013_guestcart"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="icon_variants",
+            field=models.JSONField(
+                blank=True,
+                editable=False,
+                null=True,
+                verbose_name="Варианты фото продукта",
+            ),
+        ),
+    ]
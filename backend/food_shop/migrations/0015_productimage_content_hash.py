@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-17 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0014_product_icon_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productimage",
+            name="content_hash",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="SHA-256 файла после обработки"
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="height",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="Высота"
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="width",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="Ширина"
+            ),
+        ),
+    ]
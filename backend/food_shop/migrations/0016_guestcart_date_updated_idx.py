@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-17 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("food_shop", "0015_productimage_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="guestcart",
+            index=models.Index(
+                fields=["date_updated"], name="guest_cart_date_updated_idx"
+            ),
+        ),
+    ]
@@ -1,9 +1,21 @@
+import re
+
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from autoslug import AutoSlugField
-from transliterate import translit
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from mptt.managers import TreeManager
+from mptt.models import MPTTModel, TreeForeignKey
+from mptt.querysets import TreeQuerySet
 
 from core.constants import LenghtField
+from food_shop.slugs import (
+    BulkAutoSlugField,
+    SlugQuerySet,
+    SlugQuerySetMixin,
+    transliterate,
+)
 from users.models import MyUser
 
 
@@ -13,10 +25,7 @@ def get_slug(instance):
     категорий, подкатегорий и продуктов.
     """
 
-    return translit(
-        instance.name,
-        'ru',
-        reversed=True)
+    return transliterate(instance.name)
 
 
 class Category(models.Model):
@@ -31,7 +40,7 @@ class Category(models.Model):
         max_length=LenghtField.MAX_LENGT_NAME.value,
         verbose_name="Название категории"
     )
-    slug = AutoSlugField(
+    slug = BulkAutoSlugField(
         max_length=LenghtField.MAX_LEN_SLUG.value,
         populate_from=get_slug,
         unique=True,
@@ -44,6 +53,8 @@ class Category(models.Model):
         blank=True,
     )
 
+    objects = SlugQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Категория"
         verbose_name_plural = "Категории"
@@ -77,7 +88,7 @@ class Subcategory(models.Model):
         related_name="subcategories",
         verbose_name="Категория"
     )
-    slug = AutoSlugField(
+    slug = BulkAutoSlugField(
         unique=True,
         max_length=LenghtField.MAX_LEN_SLUG.value,
         populate_from=get_slug,
@@ -90,10 +101,20 @@ class Subcategory(models.Model):
         blank=True,
     )
 
+    objects = SlugQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Подкатегория"
         verbose_name_plural = "Подкатегории"
         ordering = ("name",)
+        indexes = [
+            # Подкатегории категории по названию: фильтр ?category=
+            # подкатегорий и продуктов.
+            models.Index(
+                fields=["category", "name"],
+                name="subcategory_category_name_idx"
+            ),
+        ]
 
     def __str__(self):
         """
@@ -104,6 +125,229 @@ class Subcategory(models.Model):
         return self.name
 
 
+class CatalogNodeQuerySet(SlugQuerySetMixin, TreeQuerySet):
+    """QuerySet узлов каталога."""
+
+
+class CatalogNodeManager(TreeManager.from_queryset(CatalogNodeQuerySet)):
+    """
+    Менеджер узлов каталога с синхронизацией дерева
+    из плоских моделей категорий и подкатегорий.
+    """
+
+    def sync_catalog(self):
+        """
+        Приводит дерево в соответствие с плоскими моделями: создает
+        недостающие узлы категорий(корни деревьев) и подкатегорий,
+        обновляет названия и переносит подкатегории, сменившие категорию,
+        после чего перестраивает nested set одним проходом.
+        Используется после массовых операций, которые не вызывают сигналы.
+        """
+
+        self.bulk_create(
+            [
+                self.model(
+                    name=category.name,
+                    category=category,
+                    lft=0, rght=0, tree_id=0, level=0,
+                )
+                for category in Category.objects.filter(catalog_node__isnull=True)
+            ]
+        )
+        category_nodes = dict(
+            self.filter(category__isnull=False).values_list("category_id", "id")
+        )
+        self.bulk_create(
+            [
+                self.model(
+                    name=subcategory.name,
+                    subcategory=subcategory,
+                    parent_id=category_nodes[subcategory.category_id],
+                    lft=0, rght=0, tree_id=0, level=0,
+                )
+                for subcategory in Subcategory.objects.filter(
+                    catalog_node__isnull=True
+                )
+            ]
+        )
+
+        tree_categories = dict(
+            self.filter(category__isnull=False).values_list("tree_id", "category_id")
+        )
+        changed_nodes = []
+        for node in self.exclude(
+            category__isnull=True, subcategory__isnull=True
+        ).select_related("category", "subcategory"):
+            source = node.category or node.subcategory
+            changed = node.name != source.name
+            if (
+                node.subcategory is not None
+                and tree_categories.get(node.tree_id) != source.category_id
+            ):
+                node.parent_id = category_nodes[source.category_id]
+                changed = True
+            if changed:
+                node.name = source.name
+                changed_nodes.append(node)
+        self.bulk_update(changed_nodes, ["name", "parent"])
+        self.rebuild()
+
+
+class CatalogNode(MPTTModel):
+    """
+    Узел иерархического каталога(django-mptt, nested set).
+    Категории являются корнями деревьев, подкатегории - их потомками,
+    между ними могут находиться промежуточные узлы любой глубины.
+    Поддерево, предки и хлебные крошки выбираются одним
+    запросом по диапазону (tree_id, lft, rght).
+    Атрибуты:
+        - name: Название узла.
+        - slug: Уникальный слаг узла.
+        - parent: Родительский узел.
+        - category: Связанная категория (для корневых узлов).
+        - subcategory: Связанная подкатегория.
+    """
+
+    name = models.CharField(
+        max_length=LenghtField.MAX_LENGT_NAME.value,
+        verbose_name="Название узла каталога"
+    )
+    slug = BulkAutoSlugField(
+        unique=True,
+        max_length=LenghtField.MAX_LEN_SLUG.value,
+        populate_from=get_slug,
+        verbose_name="Слаг узла каталога"
+    )
+    parent = TreeForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="children",
+        verbose_name="Родительский узел"
+    )
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="catalog_node",
+        verbose_name="Категория"
+    )
+    subcategory = models.OneToOneField(
+        Subcategory,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="catalog_node",
+        verbose_name="Подкатегория"
+    )
+
+    objects = CatalogNodeManager()
+
+    class MPTTMeta:
+        order_insertion_by = ["name"]
+
+    class Meta:
+        verbose_name = "Узел каталога"
+        verbose_name_plural = "Узлы каталога"
+        indexes = [
+            models.Index(
+                fields=["tree_id", "lft"],
+                name="catalog_node_tree_lft_idx"
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Возвращает строковое представление узла каталога.
+        Returns: str: Название узла.
+        """
+
+        return self.name
+
+    def get_products(self):
+        """
+        Продукты всех подкатегорий поддерева узла.
+        Returns: QuerySet: Продукты, отобранные одним запросом
+        по диапазону lft..rght дерева.
+        """
+
+        return Product.objects.filter(
+            subcategory__catalog_node__tree_id=self.tree_id,
+            subcategory__catalog_node__lft__range=(self.lft, self.rght),
+        )
+
+
+class ProductQuerySet(SlugQuerySetMixin, models.QuerySet):
+    """
+    QuerySet продуктов.
+    """
+
+    def search(self, query):
+        """
+        Полнотекстовый поиск по названию и транслитерированному слагу,
+        поэтому находятся и "клубника", и "klubnika". Каждое слово
+        запроса ищется как префикс. Используется индекс FTS5 на SQLite
+        и GIN-индекс tsvector на PostgreSQL (миграция 0011), на других
+        СУБД - поиск icontains без индекса.
+        Найденные продукты аннотируются релевантностью search_rank
+        (чем больше, тем релевантнее).
+        Parameters:
+            query (str): Поисковая строка.
+        Returns:
+            QuerySet: Найденные продукты.
+        """
+
+        terms = re.findall(r"\w+", query.lower())
+        if not terms:
+            return self.none()
+
+        vendor = connections[self.db].vendor
+        if vendor == "sqlite":
+            # Таблица FTS5 присоединяется по rowid = id: MATCH выполняется
+            # один раз, и bm25() считается для найденной строки там же
+            # (коррелированный подзапрос повторял бы MATCH для каждой
+            # строки, и время росло бы квадратично с числом совпадений).
+            match = " ".join(f'"{term}"*' for term in terms)
+            return self.extra(
+                tables=["food_shop_product_fts"],
+                where=[
+                    "food_shop_product_fts.rowid = food_shop_product.id",
+                    "food_shop_product_fts MATCH %s",
+                ],
+                params=[match],
+            ).annotate(
+                search_rank=RawSQL(
+                    "-bm25(food_shop_product_fts)",
+                    (),
+                    output_field=models.FloatField(),
+                )
+            )
+        if vendor == "postgresql":
+            match = " & ".join(f"{term}:*" for term in terms)
+            matched = RawSQL(
+                "SELECT id FROM food_shop_product WHERE"
+                " to_tsvector('simple', name || ' ' || slug)"
+                " @@ to_tsquery('simple', %s)",
+                (match,),
+            )
+            rank = RawSQL(
+                "ts_rank(to_tsvector('simple', food_shop_product.name"
+                " || ' ' || food_shop_product.slug), to_tsquery('simple', %s))",
+                (match,),
+                output_field=models.FloatField(),
+            )
+        else:
+            condition = Q()
+            for term in terms:
+                condition &= Q(name__icontains=term) | Q(slug__icontains=term)
+            return self.filter(condition).annotate(
+                search_rank=Value(0.0, output_field=models.FloatField())
+            )
+        return self.filter(id__in=matched).annotate(search_rank=rank)
+
+
 class Product(models.Model):
     """
     Модель продукта.
@@ -116,6 +360,8 @@ class Product(models.Model):
         - icon_small: Маленькое фото продукта.
         - icon_middle: Среднее фото продукта.
         - icon_big: Большое фото продукта.
+        - icon_variants: Файлы фото в дополнительных форматах по полям,
+            например {"icon_small": {"webp": "products_small/a.webp"}}.
         - date_add: Дата добавления продукта.
     """
 
@@ -124,6 +370,7 @@ class Product(models.Model):
         ("lt", "Литры"),
         ("pcs", "Штуки"),
     )
+    IMAGE_FIELDS = ("icon_big", "icon_middle", "icon_small")
     name = models.CharField(
         unique=True,
         max_length=LenghtField.MAX_LENGT_NAME.value,
@@ -135,7 +382,7 @@ class Product(models.Model):
         related_name="products",
         verbose_name="Подкатегория"
     )
-    slug = AutoSlugField(
+    slug = BulkAutoSlugField(
         unique=True,
         max_length=LenghtField.MAX_LEN_SLUG.value,
         populate_from=get_slug,
@@ -184,15 +431,47 @@ class Product(models.Model):
         null=True,
         verbose_name="Фото продукта большое",
     )
+    # null без default: столбец добавляется ALTER TABLE без пересоздания
+    # таблицы (на SQLite пересоздание удалило бы триггеры поиска FTS5).
+    icon_variants = models.JSONField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Варианты фото продукта",
+    )
     date_add = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Дата добавления продукта"
     )
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Продукт"
         verbose_name_plural = "Продукты"
         ordering = ["-date_add"]
+        indexes = [
+            # Индекс для keyset-пагинации по (date_add, id).
+            models.Index(
+                fields=["-date_add", "-id"],
+                name="product_date_add_id_idx"
+            ),
+            # Фильтры ?subcategory= и ?category= с сортировкой по дате.
+            models.Index(
+                fields=["subcategory", "-date_add", "-id"],
+                name="product_subcat_date_idx"
+            ),
+            # Фильтр ?measurement_unit= с сортировкой по дате.
+            models.Index(
+                fields=["measurement_unit", "-date_add", "-id"],
+                name="product_unit_date_idx"
+            ),
+            # Диапазон цены ?price_min=&price_max= с сортировкой по дате.
+            models.Index(
+                fields=["price", "-date_add", "-id"],
+                name="product_price_date_idx"
+            ),
+        ]
 
     def __str__(self):
         """
@@ -202,13 +481,198 @@ class Product(models.Model):
 
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Запоминает загруженные из БД цену и имена файлов изображений,
+        чтобы сигналы post_save пересчитывали итоги корзин только при
+        изменении цены, а изображения обрабатывали только при замене файлов.
+        """
+
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_price = instance.__dict__.get("price")
+        instance._loaded_images = {
+            name: instance.__dict__[name] or ""
+            for name in cls.IMAGE_FIELDS
+            if name in instance.__dict__
+        }
+        return instance
+
+
+class ProductImage(models.Model):
+    """
+    Состояние обработки изображения продукта.
+    Одна запись на каждое поле изображения продукта; производные
+    размеры строятся фоновым обработчиком (food_shop.images).
+    Атрибуты:
+        - product: Продукт.
+        - field_name: Поле изображения продукта.
+        - status: Статус обработки.
+        - error: Текст ошибки последней обработки.
+        - content_hash: SHA-256 файла поля после последней обработки
+            (совпадение означает, что файл не менялся).
+        - width: Ширина файла поля после обработки.
+        - height: Высота файла поля после обработки.
+        - date_updated: Дата последнего изменения статуса.
+    """
+
+    class Status(models.TextChoices):
+        """
+        Статус обработки изображения.
+        """
+
+        PENDING = "pending", "В очереди"
+        PROCESSING = "processing", "Обрабатывается"
+        DONE = "done", "Готово"
+        FAILED = "failed", "Ошибка"
+
+    FIELD_CHOICES = (
+        ("icon_small", "Фото продукта маленькое"),
+        ("icon_middle", "Фото продукта среднее"),
+        ("icon_big", "Фото продукта большое"),
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="images",
+        verbose_name="Продукт"
+    )
+    field_name = models.CharField(
+        max_length=LenghtField.MAX_LENGT_IMAGE_FIELD.value,
+        choices=FIELD_CHOICES,
+        verbose_name="Поле изображения"
+    )
+    status = models.CharField(
+        max_length=LenghtField.MAX_LENGT_STATUS.value,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Статус обработки"
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="Ошибка обработки"
+    )
+    content_hash = models.CharField(
+        max_length=LenghtField.MAX_LENGT_CONTENT_HASH.value,
+        blank=True,
+        verbose_name="SHA-256 файла после обработки"
+    )
+    width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Ширина"
+    )
+    height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Высота"
+    )
+    date_updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения статуса"
+    )
+
+    class Meta:
+        verbose_name = "Изображение продукта"
+        verbose_name_plural = "Изображения продуктов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "field_name"],
+                name="unique_product_image_field"
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Возвращает строковое представление изображения продукта.
+        Returns: str: Поле изображения и статус обработки.
+        """
+
+        return f"{self.field_name}: {self.get_status_display()}"
+
+
+def apply_cart_operations(amounts, operations):
+    """
+    Сворачивает операции над корзиной в итоговое количество по продуктам.
+    Количество ограничено MAX_AMOUNT_PRODUCT, ноль означает, что позиции
+    в корзине нет.
+    Parameters:
+        amounts (dict): Текущее количество по идентификаторам продуктов
+            (изменяется на месте).
+        operations (list): Словари с ключами op (add, set, reduce,
+            remove), product (идентификатор продукта) и amount.
+    Returns:
+        dict: Итоговое количество по идентификаторам продуктов.
+    """
+
+    max_amount = LenghtField.MAX_AMOUNT_PRODUCT.value
+    for operation in operations:
+        product_id = operation["product"]
+        current = amounts.get(product_id, 0)
+        amount = operation.get("amount", 0)
+        if operation["op"] == "add":
+            current = min(current + amount, max_amount)
+        elif operation["op"] == "set":
+            current = amount
+        elif operation["op"] == "reduce":
+            current = max(current - amount, 0)
+        else:
+            current = 0
+        amounts[product_id] = current
+    return amounts
+
+
+class ProductCartQuerySet(models.QuerySet):
+    """
+    QuerySet продуктовых корзин.
+    """
+
+    def refresh_totals(self):
+        """
+        Пересчитывает итоги корзин с нуля одним UPDATE с подзапросами
+        к позициям корзины. Используется для восстановления итогов и
+        после изменений, которые нельзя выразить приращением
+        (изменение цены продукта, удаление продукта).
+        Returns: int: Количество обновленных корзин.
+        """
+
+        items = (
+            ShoppingCartProduct.objects.filter(product_cart=OuterRef("pk"))
+            .order_by()
+            .values("product_cart")
+        )
+        return self.update(
+            total_amount=Coalesce(
+                Subquery(items.annotate(total=Sum("amount")).values("total")),
+                0,
+            ),
+            total_price=Coalesce(
+                Subquery(
+                    items.annotate(
+                        total=Sum(F("amount") * F("product__price"))
+                    ).values("total")
+                ),
+                Value(0),
+                output_field=ProductCart._meta.get_field("total_price"),
+            ),
+            item_count=Coalesce(
+                Subquery(items.annotate(total=Count("id")).values("total")),
+                0,
+            ),
+        )
+
 
 class ProductCart(models.Model):
     """
     Модель продуктовой корзины у покупателя-пользователя.
+    Итоги корзины хранятся денормализованно и поддерживаются
+    операциями записи корзины.
     Атрибуты:
         - user: Пользователь, владеющий корзиной.
         - date_created: Дата создания корзины.
+        - total_amount: Общее количество продуктов в корзине.
+        - total_price: Общая стоимость продуктов в корзине.
+        - item_count: Количество позиций (разных продуктов) в корзине.
     """
 
     user = models.ForeignKey(
@@ -220,11 +684,33 @@ class ProductCart(models.Model):
         auto_now_add=True,
         verbose_name="Дата создания продуктовой корзины"
     )
+    total_amount = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Общее количество продуктов"
+    )
+    total_price = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name="Общая стоимость продуктов"
+    )
+    item_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Количество позиций"
+    )
+
+    objects = ProductCartQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Продуктовая корзина"
         verbose_name_plural = "Продуктовые корзины"
         ordering = ["-date_created"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user"],
+                name="unique_user_product_cart",
+            )
+        ]
 
     def __str__(self):
         """
@@ -233,6 +719,158 @@ class ProductCart(models.Model):
         """
         return f"Покупатель-пользователь {self.user}"
 
+    def apply_totals_delta(self, amount=0, price=0, items=0):
+        """
+        Атомарно изменяет итоги корзины на приращения в БД (F-выражения),
+        не перезаписывая параллельные изменения.
+        Parameters:
+            amount (int): Изменение общего количества продуктов.
+            price (Decimal): Изменение общей стоимости.
+            items (int): Изменение количества позиций.
+        """
+
+        ProductCart.objects.filter(pk=self.pk).update(
+            total_amount=F("total_amount") + amount,
+            total_price=F("total_price") + price,
+            item_count=F("item_count") + items,
+        )
+
+    def add_product(self, product, amount):
+        """
+        Атомарно добавляет продукт в корзину без потери параллельных
+        изменений: количество увеличивается в БД (F-выражение), позиция
+        создается в точке сохранения и при конфликте уникальности
+        (параллельное добавление) увеличивается повторно. Итоговое
+        количество ограничено MAX_AMOUNT_PRODUCT.
+        Parameters:
+            product (Product): Добавляемый продукт.
+            amount (int): Добавляемое количество.
+        Returns:
+            tuple: Позиция корзины и флаг создания новой позиции.
+        """
+
+        max_amount = LenghtField.MAX_AMOUNT_PRODUCT.value
+        items = ShoppingCartProduct.objects.filter(
+            product_cart=self, product=product
+        )
+        with transaction.atomic():
+            added, created, item = amount, False, None
+            if not items.filter(amount__lte=max_amount - amount).update(
+                amount=F("amount") + amount
+            ):
+                try:
+                    with transaction.atomic():
+                        added = min(amount, max_amount)
+                        item = ShoppingCartProduct.objects.create(
+                            product_cart=self, product=product, amount=added
+                        )
+                    created = True
+                except IntegrityError:
+                    # Позиция уже есть (в том числе добавлена параллельно):
+                    # увеличиваем ее под блокировкой строки, не выходя
+                    # за максимум.
+                    item = items.select_for_update().get()
+                    added = max(min(amount, max_amount - item.amount), 0)
+                    items.update(amount=F("amount") + added)
+                    item.amount += added
+            self.apply_totals_delta(
+                amount=added, price=product.price * added, items=int(created)
+            )
+        if item is None:
+            # Количество увеличено в БД: читаем только итоговую позицию,
+            # продукт уже загружен.
+            item = items.get()
+        item.product = product
+        return item, created
+
+    def apply_operations(self, operations):
+        """
+        Применяет пакет операций над корзиной в одной транзакции.
+        Операции сначала сворачиваются в памяти в итоговое количество
+        по каждому продукту, затем изменения записываются множественными
+        запросами (bulk_create, bulk_update, delete) и итоги пересчитываются
+        одним UPDATE, поэтому число запросов не зависит от размера пакета.
+        Parameters:
+            operations (list): Словари с ключами op (add, set, reduce,
+                remove), product (идентификатор продукта) и amount.
+        """
+
+        product_ids = {operation["product"] for operation in operations}
+        with transaction.atomic():
+            items = {
+                item.product_id: item
+                for item in ShoppingCartProduct.objects.select_for_update()
+                .filter(product_cart=self, product_id__in=product_ids)
+                .order_by()
+            }
+            amounts = {
+                product_id: item.amount for product_id, item in items.items()
+            }
+            apply_cart_operations(amounts, operations)
+
+            to_create, to_update, to_delete = [], [], []
+            for product_id, amount in amounts.items():
+                item = items.get(product_id)
+                if item is None:
+                    if amount:
+                        to_create.append(
+                            ShoppingCartProduct(
+                                product_cart=self,
+                                product_id=product_id,
+                                amount=amount,
+                            )
+                        )
+                elif not amount:
+                    to_delete.append(item.id)
+                elif amount != item.amount:
+                    item.amount = amount
+                    to_update.append(item)
+
+            if to_create:
+                ShoppingCartProduct.objects.bulk_create(to_create)
+            if to_update:
+                ShoppingCartProduct.objects.bulk_update(to_update, ["amount"])
+            if to_delete:
+                ShoppingCartProduct.objects.filter(id__in=to_delete).delete()
+            ProductCart.objects.filter(pk=self.pk).refresh_totals()
+
+    def merge_items(self, amounts):
+        """
+        Добавляет позиции (например, гостевой корзины) к корзине одним
+        множественным upsert'ом по (product_cart, product): количество
+        складывается с уже имеющимся и ограничивается MAX_AMOUNT_PRODUCT.
+        Parameters:
+            amounts (dict): Количество по идентификаторам продуктов.
+        """
+
+        amounts = {
+            product_id: amount for product_id, amount in amounts.items() if amount
+        }
+        if not amounts:
+            return
+        max_amount = LenghtField.MAX_AMOUNT_PRODUCT.value
+        with transaction.atomic():
+            existing = dict(
+                ShoppingCartProduct.objects.select_for_update()
+                .filter(product_cart=self, product_id__in=amounts)
+                .order_by()
+                .values_list("product_id", "amount")
+            )
+            ShoppingCartProduct.objects.bulk_create(
+                [
+                    ShoppingCartProduct(
+                        product_cart=self,
+                        product_id=product_id,
+                        amount=min(existing.get(product_id, 0) + amount, max_amount),
+                    )
+                    for product_id, amount in amounts.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["product_cart", "product"],
+                update_fields=["amount"],
+            )
+            ProductCart.objects.filter(pk=self.pk).refresh_totals()
+
 
 class ShoppingCartProduct(models.Model):
     """
@@ -285,6 +923,12 @@ class ShoppingCartProduct(models.Model):
         verbose_name = "Продукт в корзине у пользователя"
         verbose_name_plural = "Продукты в корзинах у пользователей"
         ordering = ["-date_created"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product_cart", "product"],
+                name="unique_product_cart_product",
+            )
+        ]
 
     def __str__(self):
         """
@@ -298,5 +942,46 @@ class ShoppingCartProduct(models.Model):
                 f" {self.product.measurement_unit}")
 
 
+class GuestCart(models.Model):
+    """
+    Снимок гостевой корзины. Рабочая копия корзины гостя хранится в кэше
+    (см. food_shop.guest_cart), а в БД с задержкой записываются снимки,
+    чтобы корзина пережила вытеснение из кэша.
+    Атрибуты:
+        - guest_id: Идентификатор гостевой корзины.
+        - items: Количество по идентификаторам продуктов.
+        - date_updated: Дата последней записи снимка.
+    """
+
+    guest_id = models.CharField(
+        unique=True,
+        max_length=LenghtField.MAX_LENGT_GUEST_CART_ID.value,
+        verbose_name="Идентификатор гостевой корзины"
+    )
+    items = models.JSONField(
+        default=dict,
+        verbose_name="Продукты гостевой корзины"
+    )
+    date_updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата обновления гостевой корзины"
+    )
+
+    class Meta:
+        verbose_name = "Гостевая корзина"
+        verbose_name_plural = "Гостевые корзины"
+        indexes = [
+            # Удаление устаревших снимков (clear_guest_carts).
+            models.Index(
+                fields=["date_updated"],
+                name="guest_cart_date_updated_idx"
+            ),
+        ]
 
+    def __str__(self):
+        """
+        Возвращает строковое представление гостевой корзины.
+        Returns: str: Идентификатор гостевой корзины.
+        """
 
+        return f"Гостевая корзина {self.guest_id}"
@@ -0,0 +1,78 @@
+"""
+Триггеры полнотекстового индекса продуктов на SQLite (FTS5).
+Индекс и триггеры создает миграция 0011_product_search, но SQLite
+при перестройке таблицы (ALTER, который SQLite не умеет выполнять
+на месте, Django заменяет копированием в новую таблицу) удаляет
+триггеры таблицы food_shop_product без ошибки. Поэтому после
+каждого migrate отсутствующие триггеры создаются заново.
+"""
+
+from django.db import transaction
+
+SEARCH_TABLE = "food_shop_product_fts"
+
+SQLITE_TRIGGERS = {
+    "food_shop_product_fts_insert": """
+    CREATE TRIGGER IF NOT EXISTS food_shop_product_fts_insert
+    AFTER INSERT ON food_shop_product BEGIN
+        INSERT INTO food_shop_product_fts(rowid, name, slug)
+        VALUES (new.id, new.name, new.slug);
+    END
+    """,
+    "food_shop_product_fts_delete": """
+    CREATE TRIGGER IF NOT EXISTS food_shop_product_fts_delete
+    AFTER DELETE ON food_shop_product BEGIN
+        INSERT INTO food_shop_product_fts(food_shop_product_fts, rowid, name, slug)
+        VALUES ('delete', old.id, old.name, old.slug);
+    END
+    """,
+    "food_shop_product_fts_update": """
+    CREATE TRIGGER IF NOT EXISTS food_shop_product_fts_update
+    AFTER UPDATE OF name, slug ON food_shop_product BEGIN
+        INSERT INTO food_shop_product_fts(food_shop_product_fts, rowid, name, slug)
+        VALUES ('delete', old.id, old.name, old.slug);
+        INSERT INTO food_shop_product_fts(rowid, name, slug)
+        VALUES (new.id, new.name, new.slug);
+    END
+    """,
+}
+
+
+def get_search_triggers(connection):
+    """
+    Имена существующих триггеров индекса продуктов.
+    :param connection: Соединение с БД SQLite.
+    :return: Множество имен триггеров.
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN"
+            f" ({', '.join(['%s'] * len(SQLITE_TRIGGERS))})",
+            list(SQLITE_TRIGGERS),
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def ensure_search_triggers(connection):
+    """
+    Создает отсутствующие триггеры индекса продуктов и перестраивает
+    индекс, если триггеров не было: изменения продуктов без триггеров
+    в индекс не попали. На других СУБД и до миграции 0011 ничего
+    не делает.
+    :param connection: Соединение с БД.
+    :return: Список созданных триггеров.
+    """
+
+    if connection.vendor != "sqlite":
+        return []
+    if SEARCH_TABLE not in connection.introspection.table_names():
+        return []
+    missing = sorted(set(SQLITE_TRIGGERS) - get_search_triggers(connection))
+    if not missing:
+        return []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGERS[name])
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+    return missing
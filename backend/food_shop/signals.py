@@ -1,43 +1,268 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_logged_in
+from django.db import connections
+from django.db.models.signals import (
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+)
 from django.dispatch import receiver
-from PIL import Image
-import logging
+from core.cache import bump_cache_version_on_commit
+from core.constants import CacheNamespace
+from .guest_cart import (
+    GuestCartBusyError,
+    get_request_guest_id,
+    merge_guest_cart,
+)
+from .images import enqueue_product_images
+from .models import CatalogNode, Category, Product, ProductCart, Subcategory
+from .search import ensure_search_triggers
+from .slugs import forget_slug
 
-from .models import Product
 
+@receiver(post_save, sender=Product)
+def resize_product_images(sender, instance, created, **kwargs):
+    """
+    Сигнал, ставящий изображения продукта в очередь фоновой обработки
+    после его сохранения(post_save), если файлы изображений заменены
+    (изменение цены и других полей изображения не трогает).
+    Само изменение размеров выполняется
+    вне запроса после фиксации транзакции (см. food_shop.images).
+
+    Параметры:
+    sender (Model): Модель, которая отправляет сигнал.
+    instance (Product): Экземпляр модели, который был сохранен.
+    created (bool): Продукт создан, а не изменен.
+    **kwargs: Произвольные именованные аргументы.
+    """
+
+    enqueue_product_images(instance, created)
+
+
+@receiver(post_save, sender=Product)
+def refresh_cart_totals_on_price_change(sender, instance, created, **kwargs):
+    """
+    Сигнал, пересчитывающий итоги корзин с продуктом после
+    изменения его цены.
+
+    Параметры:
+    sender (Model): Модель, которая отправляет сигнал.
+    instance (Product): Сохраненный продукт.
+    created (bool): Продукт создан, а не изменен.
+    **kwargs: Произвольные именованные аргументы.
+    """
+
+    loaded_price = getattr(instance, "_loaded_price", None)
+    if not created and loaded_price is not None and loaded_price != instance.price:
+        ProductCart.objects.filter(
+            shopping_cart_products__product=instance
+        ).refresh_totals()
+    instance._loaded_price = instance.price
+
+
+@receiver(pre_delete, sender=Product)
+def remember_product_carts(sender, instance, **kwargs):
+    """
+    Сигнал, запоминающий корзины удаляемого продукта
+    до каскадного удаления позиций.
+    """
+
+    instance._cart_ids = list(
+        ProductCart.objects.filter(
+            shopping_cart_products__product=instance
+        ).values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def refresh_cart_totals_on_product_delete(sender, instance, **kwargs):
+    """
+    Сигнал, пересчитывающий итоги корзин после удаления
+    продукта вместе с его позициями в корзинах.
+    """
+
+    cart_ids = getattr(instance, "_cart_ids", None)
+    if cart_ids:
+        ProductCart.objects.filter(id__in=cart_ids).refresh_totals()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Subcategory)
+@receiver(post_delete, sender=Subcategory)
+def invalidate_category_tree_cache(sender, **kwargs):
+    """
+    Сигнал, сбрасывающий кэш дерева категорий после изменения
+    или удаления категории/подкатегории (после фиксации транзакции).
+
+    Параметры:
+    sender (Model): Модель, которая отправляет сигнал.
+    **kwargs: Произвольные именованные аргументы.
+    """
+
+    bump_cache_version_on_commit(CacheNamespace.CATEGORY_TREE)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Subcategory)
+@receiver(post_delete, sender=Subcategory)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_catalog_version(sender, **kwargs):
+    """
+    Сигнал, меняющий версию каталога (а с ней ETag и Last-Modified
+    ответов каталога) после изменения или удаления категории,
+    подкатегории или продукта (после фиксации транзакции, иначе клиент
+    может получить новый ETag со старым телом ответа).
+
+    Параметры:
+    sender (Model): Модель, которая отправляет сигнал.
+    **kwargs: Произвольные именованные аргументы.
+    """
 
-def resize_image(image, max_size):
+    bump_cache_version_on_commit(CacheNamespace.CATALOG)
+
+
+def get_category_node(category):
     """
-    Изменяет размер изображения, сохраняя его пропорции, так чтобы
-    ни ширина, ни высота не превышали заданное максимальное значение.
+    Возвращает корневой узел каталога категории, создавая его при отсутствии.
     Параметры:
-    image (File): Файл изображения, который нужно изменить.
-    max_size (int): Максимальное значение для ширины и высоты изображения.
+    category (Category): Категория.
     Возвращает:
-    None: Функция изменяет размер изображения на месте и сохраняет его
-          в том же файле.
+    CatalogNode: Корневой узел категории.
     """
 
-    img = Image.open(image)
-    img.thumbnail((max_size, max_size))
-    img.save(image.path)
+    node = CatalogNode.objects.filter(category=category).first()
+    if node is None:
+        node = CatalogNode.objects.create(name=category.name, category=category)
+    return node
 
 
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Subcategory)
+@receiver(post_delete, sender=Subcategory)
 @receiver(post_save, sender=Product)
-def resize_product_images(sender, instance, **kwargs):
+@receiver(post_delete, sender=Product)
+def forget_cached_slug(sender, instance, **kwargs):
     """
-    Сигнал, изменяющий размер изображений продукта после его сохранения(post_save).
+    Сигнал, удаляющий слаг сохраненного или удаленного объекта
+    из кэша slug -> id.
 
     Параметры:
     sender (Model): Модель, которая отправляет сигнал.
-    instance (Product): Экземпляр модели, который был сохранен.
+    instance (Model): Сохраненный или удаленный объект.
+    **kwargs: Произвольные именованные аргументы.
+    """
+
+    forget_slug(sender, instance.slug)
+
+
+@receiver(post_save, sender=Category)
+def sync_category_node(sender, instance, **kwargs):
+    """
+    Сигнал, создающий или переименовывающий корневой узел
+    каталога после сохранения категории.
+
+    Параметры:
+    sender (Model): Модель, которая отправляет сигнал.
+    instance (Category): Сохраненная категория.
+    **kwargs: Произвольные именованные аргументы.
+    """
+
+    node = get_category_node(instance)
+    if node.name != instance.name:
+        node.name = instance.name
+        node.save()
+
+
+@receiver(post_save, sender=Subcategory)
+def sync_subcategory_node(sender, instance, **kwargs):
+    """
+    Сигнал, создающий узел каталога подкатегории или переносящий его
+    в дерево новой категории. Промежуточные узлы между категорией и
+    подкатегорией сохраняются, если подкатегория осталась в том же дереве.
+
+    Параметры:
+    sender (Model): Модель, которая отправляет сигнал.
+    instance (Subcategory): Сохраненная подкатегория.
+    **kwargs: Произвольные именованные аргументы.
+    """
+
+    parent = get_category_node(instance.category)
+    node = CatalogNode.objects.filter(subcategory=instance).first()
+    if node is None:
+        CatalogNode.objects.create(
+            name=instance.name, subcategory=instance, parent=parent
+        )
+        return
+
+    changed = node.name != instance.name
+    if not node.is_descendant_of(parent):
+        node.parent = parent
+        changed = True
+    if changed:
+        node.name = instance.name
+        node.save()
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Subcategory)
+def delete_catalog_node(sender, instance, **kwargs):
+    """
+    Сигнал, удаляющий узел каталога вместе с поддеревом через django-mptt
+    до каскадного удаления, чтобы в nested set не оставалось разрывов.
+
+    Параметры:
+    sender (Model): Модель, которая отправляет сигнал.
+    instance (Category | Subcategory): Удаляемый объект.
+    **kwargs: Произвольные именованные аргументы.
+    """
+
+    lookup = {sender._meta.model_name: instance}
+    for node in CatalogNode.objects.filter(**lookup):
+        node.delete()
+
+
+@receiver(user_logged_in)
+def merge_guest_cart_on_login(sender, request, user, **kwargs):
+    """
+    Сигнал, переносящий гостевую корзину (заголовок X-Guest-Cart-Id)
+    в продуктовую корзину пользователя при входе (djoser token/login/).
+
+    Параметры:
+    sender (Model): Модель пользователя.
+    request (Request): Запрос входа.
+    user (MyUser): Вошедший пользователь.
+    **kwargs: Произвольные именованные аргументы.
+    """
+
+    if request is None:
+        return
+    guest_id = get_request_guest_id(request)
+    if guest_id is None:
+        return
+    try:
+        merge_guest_cart(guest_id, user)
+    except GuestCartBusyError:
+        # Корзину изменяет другой запрос: она остается гостевой
+        # и переносится при следующем входе.
+        pass
+
+
+@receiver(post_migrate)
+def restore_product_search_triggers(sender, using, **kwargs):
+    """
+    Сигнал, восстанавливающий после migrate триггеры полнотекстового
+    индекса продуктов, которые SQLite удаляет при перестройке таблицы
+    (см. food_shop.search).
+
+    Параметры:
+    sender (AppConfig): Приложение, миграции которого применены.
+    using (str): Псевдоним БД.
     **kwargs: Произвольные именованные аргументы.
     """
 
-    print(f"Сигнал вызван для продукта: {instance.name}")
-    if instance.icon_small:
-        resize_image(instance.icon_small, 200)
-    if instance.icon_middle:
-        resize_image(instance.icon_middle, 400)
-    if instance.icon_big:
-        resize_image(instance.icon_big, 600)
\ No newline at end of file
+    if sender.label == "food_shop":
+        ensure_search_triggers(connections[using])
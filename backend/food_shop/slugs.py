@@ -0,0 +1,194 @@
+from collections import Counter
+from functools import lru_cache
+
+from autoslug import AutoSlugField
+from autoslug.utils import crop_slug, get_prepopulated_value
+from django.core.cache import cache
+from django.db import models
+from transliterate import translit
+
+from core.constants import CacheTimeout
+
+# Сколько префиксов проверять одним запросом LIKE ... OR LIKE ...
+# (SQLite ограничивает глубину выражения).
+PREFIX_QUERY_CHUNK_SIZE = 100
+TRANSLIT_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=TRANSLIT_CACHE_SIZE)
+def transliterate(name):
+    """
+    Транслитерация названия с русского (с запоминанием результата:
+    одни и те же названия транслитерируются при каждом сохранении).
+    """
+
+    return translit(name, "ru", reversed=True)
+
+
+def _base_slug(field, instance):
+    """Слаг без суффикса, как его строит AutoSlugField."""
+
+    value = field.value_from_object(instance)
+    if field.always_update or not value:
+        value = get_prepopulated_value(field, instance)
+    slug = field.slugify(value) if value else ""
+    return field.slugify(crop_slug(field, slug)) or instance._meta.model_name
+
+
+def _suffixed(field, base, index):
+    """Слаг с суффиксом -index, обрезанный до max_length как в AutoSlugField."""
+
+    tail = f"{field.index_sep}{index}"
+    return f"{base[:field.max_length - len(tail)]}{tail}"
+
+
+def _taken_slugs(field, manager, bases, exclude_pks):
+    """
+    Занятые слаги для базовых слагов пачки: один запрос slug IN (...),
+    а запрос по префиксу - только для базовых слагов, которые уже заняты
+    или повторяются внутри пачки (им понадобятся суффиксы).
+    """
+
+    name = field.attname
+    taken = set(
+        manager.filter(**{f"{name}__in": set(bases)})
+        .exclude(pk__in=exclude_pks)
+        .values_list(name, flat=True)
+    )
+    repeated = {base for base, count in Counter(bases).items() if count > 1}
+    colliding = sorted(taken | repeated)
+    for start in range(0, len(colliding), PREFIX_QUERY_CHUNK_SIZE):
+        condition = models.Q()
+        for base in colliding[start : start + PREFIX_QUERY_CHUNK_SIZE]:
+            # Суффикс может заменить конец длинного слага: ищем по началу.
+            prefix = base[: max(field.max_length - 8, 1)]
+            condition |= models.Q(**{f"{name}__startswith": prefix})
+        taken.update(
+            manager.filter(condition)
+            .exclude(pk__in=exclude_pks)
+            .values_list(name, flat=True)
+        )
+    return taken
+
+
+def allocate_slugs(instances, field_name="slug"):
+    """
+    Назначает уникальные слаги пачке объектов одной модели.
+    Вместо перебора суффиксов запросом на каждый вариант (AutoSlugField)
+    занятые слаги выбираются одним запросом на пачку, а свободные
+    суффиксы -2, -3, ... подбираются в памяти, в том числе для
+    одинаковых названий внутри пачки. Объекты, которым слаг уже
+    назначен, повторно не обрабатываются при сохранении.
+    :param instances: Объекты одной модели.
+    :param field_name: Имя поля слага.
+    :return: Список назначенных слагов.
+    """
+
+    instances = [
+        instance
+        for instance in instances
+        if field_name not in getattr(instance, "_allocated_slugs", ())
+    ]
+    if not instances:
+        return []
+    model = type(instances[0])
+    field = model._meta.get_field(field_name)
+    bases = [_base_slug(field, instance) for instance in instances]
+    exclude_pks = [instance.pk for instance in instances if instance.pk]
+    taken = _taken_slugs(field, model._default_manager, bases, exclude_pks)
+
+    slugs = []
+    next_index = {}
+    for instance, base in zip(instances, bases):
+        slug = base
+        if slug in taken:
+            index = next_index.get(base, 2)
+            while _suffixed(field, base, index) in taken:
+                index += 1
+            slug = _suffixed(field, base, index)
+            next_index[base] = index + 1
+        taken.add(slug)
+        setattr(instance, field.attname, slug)
+        instance._allocated_slugs = {
+            *getattr(instance, "_allocated_slugs", ()),
+            field_name,
+        }
+        slugs.append(slug)
+    return slugs
+
+
+class BulkAutoSlugField(AutoSlugField):
+    """
+    AutoSlugField с назначением слага через allocate_slugs: при создании
+    объекта свободный суффикс ищется одним запросом, а при обновлении
+    уже сохраненный слаг не перепроверяется (уникальность гарантирует
+    ограничение в БД). Миграции видят поле как AutoSlugField.
+    """
+
+    def deconstruct(self):
+        name, _, args, kwargs = super().deconstruct()
+        return name, "autoslug.fields.AutoSlugField", args, kwargs
+
+    def pre_save(self, instance, add):
+        value = self.value_from_object(instance)
+        allocated = self.name in getattr(instance, "_allocated_slugs", ())
+        if allocated or (value and not add and not self.always_update):
+            return value
+        allocate_slugs([instance], self.name)
+        return self.value_from_object(instance)
+
+
+class SlugQuerySetMixin:
+    """
+    Назначает слаги пачке объектов до bulk_create (иначе pre_save поля
+    подбирал бы суффикс отдельно для каждого объекта и не видел бы
+    одинаковые названия внутри пачки).
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for field in self.model._meta.concrete_fields:
+            if isinstance(field, BulkAutoSlugField):
+                allocate_slugs([obj for obj in objs if obj.pk is None], field.name)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class SlugQuerySet(SlugQuerySetMixin, models.QuerySet):
+    """QuerySet моделей со слагом BulkAutoSlugField."""
+
+
+def _slug_cache_key(model, slug):
+    return f"slug:{model._meta.label_lower}:{slug}"
+
+
+def resolve_slug(model, slug, use_cache=True):
+    """
+    Идентификатор объекта по слагу через кэш slug -> id. Промах кэша
+    стоит одного запроса по уникальному индексу слага.
+    :param model: Модель со слагом.
+    :param slug: Слаг.
+    :param use_cache: Брать идентификатор из кэша, если он там есть.
+    :return: Идентификатор или None, если объекта нет.
+    """
+
+    key = _slug_cache_key(model, slug)
+    pk = cache.get(key) if use_cache else None
+    if pk is None:
+        pk = (
+            model._default_manager.filter(slug=slug)
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if pk is not None:
+            cache.set(key, pk, CacheTimeout.SLUG.value)
+    return pk
+
+
+def forget_slug(model, slug):
+    """
+    Удаляет слаг из кэша slug -> id. Устаревшие записи после
+    переименования также отбрасываются при обращении: объект ищется
+    по паре (id, slug), и при несовпадении кэш перечитывается.
+    """
+
+    cache.delete(_slug_cache_key(model, slug))
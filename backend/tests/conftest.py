@@ -0,0 +1,16 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Очищает все кэши перед каждым тестом, чтобы закэшированные ответы
+    и токены не переходили между тестами (откат транзакции теста
+    сигналы не вызывает).
+    """
+    for cache in caches.all():
+        cache.clear()
+    yield
+    for cache in caches.all():
+        cache.clear()
@@ -0,0 +1,256 @@
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.pagination import EstimatedCountPaginator
+from core.query_budget import count_queries
+from food_shop.models import (
+    Category,
+    Product,
+    ProductCart,
+    ShoppingCartProduct,
+    Subcategory,
+)
+from users.models import MyUser
+
+
+class TestAdminChangelists(APITestCase):
+    """
+    Тесты списков админки для большого каталога и корзин.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Администратор, продукты с разными ценами и корзина с позицией.
+        """
+        cls.admin = MyUser.objects.create_superuser(
+            username="Admin_perf", email="perf@example.com", password="pass"
+        )
+        category = Category.objects.create(name="Фрукты")
+        cls.subcategory = Subcategory.objects.create(name="Ягоды", category=category)
+        cls.cheap = Product.objects.create(
+            name="Клубника", subcategory=cls.subcategory, price=50
+        )
+        cls.expensive = Product.objects.create(
+            name="Малина", subcategory=cls.subcategory, price=700
+        )
+        cls.cart = ProductCart.objects.create(user=cls.admin)
+        cls.cart.add_product(cls.cheap, 3)
+        cls.item = cls.cart.shopping_cart_products.get()
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get_changelist(self, model_name, params=None):
+        url = reverse(f"admin:food_shop_{model_name}_changelist")
+        response, queries = count_queries(lambda: self.client.get(url, params))
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def test_changelists_skip_full_count(self):
+        """
+        Списки не выполняют COUNT(*) по всей таблице: подсчет
+        ограничен ADMIN_COUNT_LIMIT.
+        """
+        for model_name in ("product", "productcart", "shoppingcartproduct"):
+            with self.subTest(model_name=model_name):
+                _, queries = self.get_changelist(model_name)
+                counts = [
+                    query["sql"]
+                    for query in queries
+                    if "COUNT(" in query["sql"].upper()
+                ]
+                self.assertTrue(counts)
+                for sql in counts:
+                    self.assertIn(f"LIMIT {EstimatedCountPaginator.count_limit}", sql)
+
+    def test_product_changelist_queries_do_not_grow(self):
+        """
+        Число запросов списка продуктов не зависит от числа строк.
+        """
+        _, before = self.get_changelist("product")
+        Product.objects.bulk_create(
+            Product(name=f"Продукт {index}", subcategory=self.subcategory, price=10)
+            for index in range(20)
+        )
+        _, after = self.get_changelist("product")
+        self.assertEqual(len(before), len(after))
+
+    def test_price_range_filter(self):
+        """
+        Фильтр по диапазону цены отбирает продукты по границам.
+        """
+        response, _ = self.get_changelist("product", {"price_range": "500-1000"})
+        self.assertEqual(list(response.context["cl"].result_list), [self.expensive])
+        response, _ = self.get_changelist("product", {"price_range": "-100"})
+        self.assertEqual(list(response.context["cl"].result_list), [self.cheap])
+
+    def test_cart_items_search(self):
+        """
+        Поиск позиций корзин - точный по пользователю и слагу продукта.
+        """
+        response, _ = self.get_changelist(
+            "shoppingcartproduct", {"q": self.admin.username}
+        )
+        self.assertEqual(response.context["cl"].result_count, 1)
+        response, _ = self.get_changelist(
+            "shoppingcartproduct", {"q": self.expensive.slug}
+        )
+        self.assertEqual(response.context["cl"].result_count, 0)
+
+    def test_exact_search_uses_indexes(self):
+        """
+        Точный поиск корзин и позиций сравнивает поля по индексу:
+        без UPPER(...) и LIKE, первичный ключ - только для чисел.
+        """
+        searches = (
+            ("productcart", self.admin.username, 1),
+            ("productcart", self.admin.email, 1),
+            ("shoppingcartproduct", str(self.item.pk), 1),
+            ("shoppingcartproduct", self.admin.username, 1),
+            ("shoppingcartproduct", self.cheap.slug, 1),
+            ("shoppingcartproduct", "нет-такого", 0),
+        )
+        for model_name, term, count in searches:
+            with self.subTest(model_name=model_name, term=term):
+                response, _ = self.get_changelist(model_name, {"q": term})
+                self.assertEqual(response.context["cl"].result_count, count)
+                queryset = response.context["cl"].queryset
+                sql, params = queryset.query.sql_with_params()
+                self.assertNotIn("UPPER(", sql)
+                self.assertNotIn(" LIKE ", sql)
+                pk_condition = f'"{queryset.model._meta.db_table}"."id" = '
+                self.assertEqual(pk_condition in sql, term.isdigit())
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                    plan = [row[-1] for row in cursor.fetchall()]
+                self.assertFalse(
+                    [
+                        step
+                        for step in plan
+                        if step.startswith("SCAN") and "INDEX" not in step
+                    ],
+                    plan,
+                )
+
+    def test_autocomplete_products(self):
+        """
+        Продукт для позиции корзины выбирается поиском.
+        """
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "food_shop",
+                "model_name": "shoppingcartproduct",
+                "field_name": "product",
+                "term": "Малина",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["id"] for item in response.json()["results"]],
+            [str(self.expensive.pk)],
+        )
+
+
+class TestPaginatedInlines(APITestCase):
+    """
+    Тесты постраничных встроенных таблиц на страницах изменения.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Продукт, который лежит в 25 корзинах.
+        """
+        cls.admin = MyUser.objects.create_superuser(
+            username="Inline_admin", email="inline@example.com", password="pass"
+        )
+        category = Category.objects.create(name="Фрукты")
+        cls.subcategory = Subcategory.objects.create(name="Ягоды", category=category)
+        cls.product = Product.objects.create(
+            name="Клубника", subcategory=cls.subcategory, price=50
+        )
+        cls.url = reverse("admin:food_shop_product_change", args=(cls.product.pk,))
+        cls.add_carts(25)
+
+    @classmethod
+    def add_carts(cls, count):
+        start = MyUser.objects.count()
+        users = MyUser.objects.bulk_create(
+            MyUser(username=f"Inline_user_{index}", email=f"i{index}@example.com")
+            for index in range(start, start + count)
+        )
+        carts = ProductCart.objects.bulk_create(
+            ProductCart(user=user) for user in users
+        )
+        ShoppingCartProduct.objects.bulk_create(
+            ShoppingCartProduct(product_cart=cart, product=cls.product, amount=2)
+            for cart in carts
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get_formset(self, response):
+        for inline_admin_formset in response.context["inline_admin_formsets"]:
+            if inline_admin_formset.opts.model is ShoppingCartProduct:
+                return inline_admin_formset.formset
+        raise AssertionError("Нет таблицы корзин")
+
+    def test_cart_inline_is_paginated(self):
+        """
+        Таблица корзин показывает страницу строк, сводку и ссылки
+        на соседние страницы.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        formset = self.get_formset(response)
+        self.assertEqual(len(formset.forms), 20)
+        self.assertEqual(
+            formset.summary,
+            [("Корзин", "25"), ("Количество в корзинах", "50")],
+        )
+        self.assertIn(formset.next_page_query, response.content.decode())
+
+        response = self.client.get(self.url, {formset.page_parameter: 2})
+        formset = self.get_formset(response)
+        self.assertEqual(len(formset.forms), 5)
+        self.assertIsNone(formset.next_page_query)
+        self.assertIsNotNone(formset.previous_page_query)
+
+    def test_change_page_queries_do_not_grow(self):
+        """
+        Число запросов страницы изменения не зависит от числа корзин.
+        """
+        _, before = count_queries(lambda: self.client.get(self.url))
+        self.add_carts(30)
+        _, after = count_queries(lambda: self.client.get(self.url))
+        self.assertEqual(len(before), len(after))
+
+    def test_save_product_with_readonly_inline(self):
+        """
+        Продукт сохраняется со страницы изменения, строки корзин
+        при этом не меняются.
+        """
+        response = self.client.get(self.url)
+        data = {}
+        for inline_admin_formset in response.context["inline_admin_formsets"]:
+            management_form = inline_admin_formset.formset.management_form
+            for name, field in management_form.fields.items():
+                data[management_form.add_prefix(name)] = management_form[name].value()
+        data.update(
+            name=self.product.name,
+            slug=self.product.slug,
+            subcategory=self.subcategory.pk,
+            price="60",
+            measurement_unit=self.product.measurement_unit,
+        )
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 302)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.price, 60)
+        self.assertEqual(
+            ShoppingCartProduct.objects.filter(product=self.product).count(), 25
+        )
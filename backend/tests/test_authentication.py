@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from users.models import MyUser
+
+
+class TestCachedTokenAuthentication(APITestCase):
+    """
+    Тесты кэширующей аутентификации по токену.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Пользователь с токеном.
+        """
+        cls.user = MyUser.objects.create_user(
+            username="Usertest_auth",
+            email="usertest_auth@example.com",
+            password="Passwordpass1",
+        )
+
+    def setUp(self):
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.url = reverse("shoppingcartproduct-list")
+
+    def get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        return response, [query["sql"] for query in queries]
+
+    def test_cached_request_skips_token_query(self):
+        """
+        Повторный запрос не обращается к таблице токенов.
+        """
+        first, first_queries = self.get()
+        second, second_queries = self.get()
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(second_queries), len(first_queries) - 1)
+        self.assertFalse([sql for sql in second_queries if "authtoken_token" in sql])
+
+    def test_logout_invalidates_token(self):
+        """
+        После выхода через djoser токен сразу перестает действовать.
+        """
+        self.get()
+        response = self.client.post(reverse("logout"))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response, _ = self.get()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """
+        Деактивация пользователя сбрасывает закэшированный токен.
+        """
+        self.get()
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.get()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_is_rejected(self):
+        """
+        Неизвестный токен по-прежнему отклоняется.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        response, _ = self.get()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,373 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from pytest import mark
+
+from food_shop import guest_cart
+from food_shop.models import (
+    CatalogNode,
+    Category,
+    Product,
+    ProductCart,
+    ShoppingCartProduct,
+    Subcategory,
+)
+
+
+@pytest.fixture
+def catalog_files(tmp_path):
+    """
+    Фикстура с файлами каталога: категории и подкатегории в JSON-массиве,
+    продукты - в NDJSON (включая невалидные и повторяющиеся записи).
+    Возвращает: dict: Именованные аргументы для команды import_catalog.
+    """
+    categories = tmp_path / "category.json"
+    categories.write_text(
+        json.dumps([{"name": "Фрукты"}, {"name": "Овощи"}, {"name": "Фрукты"}]),
+        encoding="utf-8",
+    )
+    subcategories = tmp_path / "subcategory.json"
+    subcategories.write_text(
+        json.dumps(
+            [
+                {"name": "Ягоды", "category_name": "Фрукты"},
+                {"name": "Корнеплоды", "category_name": "Овощи"},
+            ]
+        ),
+        encoding="utf-8",
+    )
+    products = tmp_path / "product.ndjson"
+    products.write_text(
+        "\n".join(
+            json.dumps(record)
+            for record in [
+                {
+                    "name": "Клубника",
+                    "price": "300",
+                    "measurement_unit": "kg",
+                    "subcategory_name": "Ягоды",
+                },
+                {
+                    "name": "Морковь",
+                    "price": "40",
+                    "measurement_unit": "kg",
+                    "subcategory_name": "Корнеплоды",
+                },
+                {
+                    "name": "Свекла",
+                    "price": "0",
+                    "measurement_unit": "kg",
+                    "subcategory_name": "Корнеплоды",
+                },
+                {
+                    "name": "Арбуз",
+                    "price": "90",
+                    "measurement_unit": "kg",
+                    "subcategory_name": "Бахчевые",
+                },
+                {
+                    "name": "Клубника",
+                    "price": "300",
+                    "measurement_unit": "kg",
+                    "subcategory_name": "Ягоды",
+                },
+            ]
+        ),
+        encoding="utf-8",
+    )
+    return {
+        "categories_file": str(categories),
+        "subcategories_file": str(subcategories),
+        "products_file": str(products),
+        "batch_size": 2,
+    }
+
+
+@mark.django_db
+class TestImportCatalogCommand:
+    """Тесты пакетного импорта каталога(import_catalog)."""
+
+    def test_import_creates_catalog(self, catalog_files):
+        """
+        Импорт создает категории, подкатегории и валидные продукты,
+        пропуская дубликаты и невалидные записи.
+        """
+        out = StringIO()
+        call_command("import_catalog", stdout=out, **catalog_files)
+
+        assert Category.objects.count() == 2
+        assert Subcategory.objects.get(name="Ягоды").category.name == "Фрукты"
+        assert set(Product.objects.values_list("name", flat=True)) == {
+            "Клубника",
+            "Морковь",
+        }
+        assert "'Продуктов': добавлено 2, обновлено 0, пропущено 3" in out.getvalue()
+
+    def test_reimport_updates_changed_rows(self, catalog_files, tmp_path):
+        """
+        Повторный импорт обновляет измененные продукты
+        и пропускает неизмененные.
+        """
+        call_command("import_catalog", stdout=StringIO(), **catalog_files)
+        products = tmp_path / "update.json"
+        products.write_text(
+            json.dumps(
+                [
+                    {
+                        "name": "Клубника",
+                        "price": "350",
+                        "measurement_unit": "kg",
+                        "subcategory_name": "Ягоды",
+                    },
+                    {
+                        "name": "Морковь",
+                        "price": "40",
+                        "measurement_unit": "kg",
+                        "subcategory_name": "Корнеплоды",
+                    },
+                ]
+            ),
+            encoding="utf-8",
+        )
+        out = StringIO()
+        call_command(
+            "import_catalog",
+            models=["products"],
+            products_file=str(products),
+            stdout=out,
+        )
+
+        assert Product.objects.get(name="Клубника").price == 350
+        assert "'Продуктов': добавлено 0, обновлено 1, пропущено 1" in out.getvalue()
+
+    def test_import_syncs_catalog_tree(self, catalog_files):
+        """
+        После импорта дерево каталога содержит узлы для всех подкатегорий.
+        """
+        call_command("import_catalog", stdout=StringIO(), **catalog_files)
+        node = CatalogNode.objects.get(subcategory__name="Ягоды")
+        assert node.parent.category.name == "Фрукты"
+        assert [product.name for product in node.get_products()] == ["Клубника"]
+
+
+@mark.django_db
+class TestRecalculateCartTotalsCommand:
+    """Тесты команды пересчета итогов корзин."""
+
+    def test_recalculate_repairs_drifted_totals(self, django_user_model):
+        """Команда восстанавливает итоги корзины по ее позициям."""
+        user = django_user_model.objects.create_user(
+            username="cart_owner", email="cart_owner@example.com", password="pass"
+        )
+        category = Category.objects.create(name="Фрукты")
+        subcategory = Subcategory.objects.create(name="Ягоды", category=category)
+        product = Product.objects.create(
+            name="Клубника", subcategory=subcategory, price=300
+        )
+        cart = ProductCart.objects.create(user=user, total_amount=99)
+        ShoppingCartProduct.objects.create(product_cart=cart, product=product, amount=2)
+
+        out = StringIO()
+        call_command("recalculate_cart_totals", stdout=out)
+
+        cart.refresh_from_db()
+        assert (cart.total_amount, cart.total_price, cart.item_count) == (
+            2,
+            600,
+            1,
+        )
+        assert "Пересчитаны итоги 1 корзин" in out.getvalue()
+
+
+@mark.django_db
+class TestBenchmarkProductListCommand:
+    """Тесты команд seed_catalog и benchmark_product_list."""
+
+    def test_seed_catalog_is_idempotent(self):
+        """Повторный запуск добавляет только недостающие продукты."""
+        call_command("seed_catalog", products=15, stdout=StringIO())
+        call_command("seed_catalog", products=20, stdout=StringIO())
+        assert Product.objects.filter(name__startswith="Бенчмарк").count() == 20
+
+    def test_benchmark_reports_each_page_size(self):
+        """Бенчмарк проверяет совпадение ответов и печатает ускорение."""
+        call_command("seed_catalog", products=12, stdout=StringIO())
+        out = StringIO()
+        call_command(
+            "benchmark_product_list",
+            repeat=1,
+            page_sizes=[5, 10],
+            stdout=out,
+            stderr=StringIO(),
+        )
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 3
+        assert lines[1].split()[0] == "5"
+        assert lines[2].endswith("x")
+
+
+@mark.django_db
+class TestEndpointBenchmarkCommands:
+    """Тесты команд benchmark_endpoints и compare_benchmarks."""
+
+    def run_benchmark(self, tmp_path, name="baseline.json"):
+        output = tmp_path / name
+        call_command(
+            "benchmark_endpoints",
+            products=12,
+            users=2,
+            cart_items=3,
+            requests=2,
+            output=str(output),
+            stdout=StringIO(),
+        )
+        return output
+
+    def test_benchmark_covers_routes_and_rolls_back(self, tmp_path):
+        """Замеряются все маршруты, а синтетические данные откатываются."""
+        results = json.loads(self.run_benchmark(tmp_path).read_text())
+        assert results["params"]["requests"] == 2
+        assert "login" in results["routes"]
+        assert "cart-batch" in results["routes"]
+        for result in results["routes"].values():
+            assert result["statuses"][0] < 400
+            assert result["p95_ms"] >= result["p50_ms"]
+        assert not Product.objects.exists()
+
+    def test_benchmark_isolates_caches_and_flusher(self, tmp_path, settings):
+        """
+        Запуск не оставляет видимых приложению записей в кэшах
+        и не запускает фоновую запись гостевых корзин.
+        """
+        settings.GUEST_CART_FLUSH_INTERVAL = 60
+        before = {alias: set(caches[alias]._cache) for alias in settings.CACHES}
+        results = json.loads(self.run_benchmark(tmp_path).read_text())
+        guest_routes = {
+            "guestcart-update",
+            "guestcart-destroy",
+            "login-merge-guestcart",
+        }
+        assert guest_routes <= set(results["routes"])
+        for alias in settings.CACHES:
+            assert {
+                key for key in caches[alias]._cache if not key.startswith("benchmark-")
+            } == before[alias]
+        assert guest_cart._flusher is None
+
+    def test_compare_flags_regressions(self, tmp_path):
+        """Рост числа SQL-запросов и задержки считается регрессией."""
+        baseline = self.run_benchmark(tmp_path)
+        results = json.loads(baseline.read_text())
+        call_command(
+            "compare_benchmarks", str(baseline), str(baseline), stdout=StringIO()
+        )
+
+        results["routes"]["product-list"]["queries"] += 1
+        results["routes"]["login"]["p95_ms"] *= 2
+        current = tmp_path / "current.json"
+        current.write_text(json.dumps(results))
+        err = StringIO()
+        with pytest.raises(CommandError, match="Обнаружено регрессий: 2"):
+            call_command(
+                "compare_benchmarks",
+                str(baseline),
+                str(current),
+                stdout=StringIO(),
+                stderr=err,
+            )
+        assert "product-list: SQL-запросов" in err.getvalue()
+
+
+@mark.django_db
+class TestExportCatalogCommand:
+    """Тесты потоковой выгрузки каталога(export_catalog)."""
+
+    def test_ndjson_export_roundtrips_through_import(self, catalog_files, tmp_path):
+        """
+        Выгрузка NDJSON содержит все продукты в порядке id
+        и загружается обратно командой import_catalog.
+        """
+        call_command("import_catalog", stdout=StringIO(), **catalog_files)
+        path = tmp_path / "catalog.ndjson"
+        call_command(
+            "export_catalog", output=str(path), chunk_size=1, stderr=StringIO()
+        )
+
+        records = [json.loads(line) for line in path.read_text("utf-8").splitlines()]
+        assert [record["id"] for record in records] == list(
+            Product.objects.order_by("id").values_list("id", flat=True)
+        )
+        assert records[0]["subcategory_name"] == "Ягоды"
+        assert records[0]["category_name"] == "Фрукты"
+
+        Product.objects.all().delete()
+        call_command(
+            "import_catalog",
+            models=["products"],
+            products_file=str(path),
+            stdout=StringIO(),
+        )
+        assert set(Product.objects.values_list("name", flat=True)) == {
+            "Клубника",
+            "Морковь",
+        }
+
+    def test_csv_resume_continues_after_last_full_row(self, catalog_files, tmp_path):
+        """
+        --resume отбрасывает оборванную строку и дописывает продукты
+        после последней полной строки без повторного заголовка.
+        """
+        call_command("import_catalog", stdout=StringIO(), **catalog_files)
+        path = tmp_path / "catalog.csv"
+        call_command(
+            "export_catalog",
+            export_format="csv",
+            output=str(path),
+            stderr=StringIO(),
+        )
+        full = path.read_text("utf-8")
+        lines = full.splitlines(keepends=True)
+        path.write_text(lines[0] + lines[1] + lines[2][:5], "utf-8")
+
+        call_command(
+            "export_catalog",
+            export_format="csv",
+            output=str(path),
+            resume=True,
+            stderr=StringIO(),
+        )
+
+        assert path.read_text("utf-8") == full
+
+    def test_resume_requires_output(self):
+        """--resume без --output недопустим."""
+        with pytest.raises(CommandError):
+            call_command("export_catalog", resume=True)
+
+
+@mark.django_db(transaction=True)
+class TestBenchmarkDbConnectionsCommand:
+    """Тесты бенчмарка постоянных соединений(benchmark_db_connections)."""
+
+    def test_persistent_mode_reuses_connection(self):
+        """
+        Без постоянных соединений открывается соединение на каждый
+        запрос, с постоянными - одно на все запросы.
+        """
+        out = StringIO()
+        call_command(
+            "benchmark_db_connections",
+            path="/api/v1/subcategory/",
+            requests=5,
+            stdout=out,
+        )
+
+        rows = {
+            line.split()[0]: line.split()[-1]
+            for line in out.getvalue().splitlines()[2:4]
+        }
+        assert rows == {"per-request": "5", "persistent(600s)": "1"}
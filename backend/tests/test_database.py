@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from backend.database import get_database_config, get_replica_configs
+
+BASE_DIR = Path("/srv/app")
+
+
+class TestDatabaseConfig:
+    """Тесты настроек БД из переменных окружения."""
+
+    def test_sqlite_by_default(self):
+        """Без переменных окружения используется файловая SQLite."""
+        config = get_database_config(BASE_DIR, {})
+
+        assert config["ENGINE"] == "django.db.backends.sqlite3"
+        assert config["NAME"] == BASE_DIR / "db.sqlite3"
+        assert config["CONN_MAX_AGE"] == 0
+
+    def test_postgresql_profile(self):
+        """
+        PostgreSQL: постоянные соединения с проверкой, таймауты
+        подключения и выполнения запроса.
+        """
+        config = get_database_config(
+            BASE_DIR,
+            {
+                "DB_ENGINE": "postgresql",
+                "POSTGRES_DB": "shop",
+                "DB_HOST": "db",
+                "DB_STATEMENT_TIMEOUT": "2000",
+            },
+        )
+
+        assert config["ENGINE"] == "django.db.backends.postgresql"
+        assert config["NAME"] == "shop"
+        assert config["HOST"] == "db"
+        assert config["CONN_MAX_AGE"] == 60
+        assert config["CONN_HEALTH_CHECKS"] is True
+        assert config["OPTIONS"] == {
+            "connect_timeout": 5,
+            "options": "-c statement_timeout=2000",
+        }
+        assert config["DISABLE_SERVER_SIDE_CURSORS"] is False
+
+    def test_pgbouncer(self):
+        """
+        За PgBouncer серверные курсоры отключены, а statement_timeout
+        не передается в параметрах подключения.
+        """
+        config = get_database_config(
+            BASE_DIR,
+            {
+                "DB_ENGINE": "postgresql",
+                "DB_POOLER": "pgbouncer",
+                "DB_CONN_MAX_AGE": "0",
+            },
+        )
+
+        assert config["DISABLE_SERVER_SIDE_CURSORS"] is True
+        assert "options" not in config["OPTIONS"]
+        assert config["CONN_MAX_AGE"] == 0
+
+    def test_replicas(self):
+        """
+        Реплики наследуют настройки основной БД, меняется только адрес;
+        в тестах реплика - зеркало основной БД.
+        """
+        replicas = get_replica_configs(
+            BASE_DIR,
+            {
+                "DB_ENGINE": "postgresql",
+                "DB_PORT": "6432",
+                "DB_REPLICAS": "replica-a replica-b:5433",
+            },
+        )
+
+        assert list(replicas) == ["replica_1", "replica_2"]
+        assert (replicas["replica_1"]["HOST"], replicas["replica_1"]["PORT"]) == (
+            "replica-a",
+            "6432",
+        )
+        assert (replicas["replica_2"]["HOST"], replicas["replica_2"]["PORT"]) == (
+            "replica-b",
+            "5433",
+        )
+        assert replicas["replica_1"]["TEST"] == {"MIRROR": "default"}
+        assert get_replica_configs(BASE_DIR, {}) == {}
+
+    @pytest.mark.parametrize(
+        "env",
+        [
+            {"DB_ENGINE": "oracle"},
+            {"DB_ENGINE": "postgresql", "DB_POOLER": "pgpool"},
+            {"DB_CONN_MAX_AGE": "forever"},
+        ],
+    )
+    def test_invalid_values(self, env):
+        """Неверные значения переменных - ошибка конфигурации."""
+        with pytest.raises(ImproperlyConfigured):
+            get_database_config(BASE_DIR, env)
@@ -0,0 +1,160 @@
+import sqlite3
+
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from pytest import mark
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import db_routers
+from core.cache import _version_key, bump_cache_version
+from core.constants import CacheNamespace
+from core.db_routers import (
+    VERSIONED_NAMESPACES,
+    ReplicaRouter,
+    reset_replica_health,
+)
+from food_shop.models import Category, Product, Subcategory
+from users.models import MyUser
+
+REPLICA = "replica_test"
+
+
+@pytest.fixture
+def replica(tmp_path, settings):
+    """
+    Фикстура реплики: копия основной SQLite-БД с продуктом в отдельном
+    файле. После копирования продукт на основной БД переименовывается,
+    поэтому по названию видно, из какой БД прочитан продукт.
+    Возвращает: Product: Продукт (с названием на основной БД).
+    """
+    category = Category.objects.create(name="Фрукты")
+    subcategory = Subcategory.objects.create(name="Ягоды", category=category)
+    product = Product.objects.create(
+        name="Клубника", subcategory=subcategory, price=100
+    )
+    path = tmp_path / "replica.sqlite3"
+    primary = connections["default"]
+    primary.ensure_connection()
+    target = sqlite3.connect(path)
+    primary.connection.backup(target)
+    target.close()
+    Product.objects.filter(pk=product.pk).update(name="Клубника садовая")
+    product.refresh_from_db()
+
+    connections.settings[REPLICA] = {
+        **primary.settings_dict,
+        "NAME": str(path),
+    }
+    settings.DATABASE_REPLICAS = [REPLICA]
+    reset_replica_health()
+    cache.clear()
+    # Каталог менялся давно: реплика уже догнала основную БД.
+    for namespace in VERSIONED_NAMESPACES:
+        cache.set(_version_key(namespace), 1, None)
+    yield product
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.settings[REPLICA]
+    reset_replica_health()
+
+
+def get_product_name(client, product):
+    response = client.get(f"/api/v1/product/{product.pk}/")
+    assert response.status_code == 200
+    return response.data["name"]
+
+
+@mark.django_db(transaction=True)
+class TestReplicaRouter:
+    """Тесты маршрутизации чтений каталога на реплики."""
+
+    def test_catalog_reads_go_to_replica(self, replica):
+        """Чтение каталога в запросе API идет на реплику."""
+        assert get_product_name(APIClient(), replica) == "Клубника"
+
+    def test_reads_outside_requests_use_primary(self, replica):
+        """Вне запроса (команды, фоновые задачи) чтения идут в основную БД."""
+        assert Product.objects.get(pk=replica.pk).name == "Клубника садовая"
+
+    def test_user_is_pinned_after_write(self, replica):
+        """
+        После записи (добавления в корзину) пользователь читает
+        каталог из основной БД, остальные - с реплики.
+        """
+        user = MyUser.objects.create_user(
+            username="Replica_user",
+            email="replica@example.com",
+            password="Passwordpass1",
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+        assert get_product_name(client, replica) == "Клубника"
+
+        response = client.post(
+            "/api/v1/shoppingcartproduct/",
+            {"product": replica.pk, "amount": 1},
+            format="json",
+        )
+        assert response.status_code == 201
+
+        assert get_product_name(client, replica) == "Клубника садовая"
+        assert get_product_name(APIClient(), replica) == "Клубника"
+
+    def test_reads_after_version_bump_use_primary(self, replica):
+        """
+        Сразу после смены версии каталога чтения идут в основную БД:
+        ответ с данными реплики не попадает в кэш и не получает ETag
+        под новой версией.
+        """
+        url = f"/api/v1/product/{replica.pk}/"
+        client = APIClient()
+        old_etag = client.get(url)["ETag"]
+
+        bump_cache_version(CacheNamespace.CATALOG)
+        response = client.get(url)
+        assert response.data["name"] == "Клубника садовая"
+        assert response["ETag"] != old_etag
+
+    def test_category_cache_filled_from_primary_after_bump(self, replica):
+        """Кэш дерева категорий после смены версии строится по основной БД."""
+        Subcategory.objects.filter(pk=replica.subcategory_id).update(
+            name="Садовые ягоды"
+        )
+        bump_cache_version(CacheNamespace.CATEGORY_TREE)
+        client = APIClient()
+        for _ in range(2):
+            response = client.get("/api/v1/category/")
+            subcategory = response.data["results"][0]["subcategories"][0]
+            assert subcategory["name"] == "Садовые ягоды"
+
+    def test_unavailable_replica_falls_back_to_primary(self, replica, tmp_path):
+        """Недоступная реплика пропускается."""
+        connections.settings[REPLICA]["NAME"] = str(tmp_path / "missing" / "db")
+        connections[REPLICA].close()
+        del connections[REPLICA]
+
+        assert get_product_name(APIClient(), replica) == "Клубника садовая"
+
+    def test_lagging_replica_falls_back_to_primary(
+        self, replica, settings, monkeypatch
+    ):
+        """Реплика, отстающая больше REPLICA_MAX_LAG, пропускается."""
+        monkeypatch.setattr(
+            db_routers,
+            "get_replica_lag",
+            lambda connection: settings.REPLICA_MAX_LAG + 1,
+        )
+
+        assert get_product_name(APIClient(), replica) == "Клубника садовая"
+
+    def test_migrations_only_on_primary(self, settings):
+        """Миграции не применяются к репликам."""
+        settings.DATABASE_REPLICAS = [REPLICA]
+        router = ReplicaRouter()
+
+        assert router.allow_migrate(REPLICA, "food_shop") is False
+        assert router.allow_migrate("default", "food_shop") is None
@@ -0,0 +1,301 @@
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from core.constants import CacheTimeout
+from food_shop import guest_cart
+from food_shop.models import (
+    Category,
+    GuestCart,
+    Product,
+    ProductCart,
+    ShoppingCartProduct,
+    Subcategory,
+)
+from users.models import MyUser
+
+
+@override_settings(GUEST_CART_FLUSH_INTERVAL=0)
+class TestGuestCart(APITestCase):
+    """
+    Тесты гостевой корзины в кэше с отложенной записью в БД.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Два продукта и пользователь с корзиной.
+        """
+        category = Category.objects.create(name="Test_Category_Guest")
+        subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_Guest", category=category
+        )
+        cls.apple = Product.objects.create(
+            name="Test_Product_Яблоко", subcategory=subcategory, price=100
+        )
+        cls.pear = Product.objects.create(
+            name="Test_Product_Груша", subcategory=subcategory, price=50
+        )
+        cls.user = MyUser.objects.create_user(
+            username="Usertest_guest",
+            email="usertest_guest@example.com",
+            password="Passwordpass1",
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        guest_cart.flush_pending()
+
+    def add(self, product, amount):
+        response = self.client.post(
+            reverse("guestcart-list"),
+            {"product": product.id, "amount": amount},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        if guest_cart.GUEST_CART_HEADER in response:
+            self.client.credentials(
+                HTTP_X_GUEST_CART_ID=response[guest_cart.GUEST_CART_HEADER]
+            )
+        return response
+
+    def test_first_add_issues_signed_cart_id(self):
+        """
+        Первое добавление создает корзину и возвращает подписанный id.
+        """
+        response = self.add(self.apple, 2)
+        signed_id = response[guest_cart.GUEST_CART_HEADER]
+        self.assertIsNotNone(guest_cart.unsign_guest_cart_id(signed_id))
+
+        self.add(self.apple, 3)
+        response = self.client.get(reverse("guestcart-list"))
+        self.assertEqual(
+            [(item["product"], item["amount"]) for item in response.data],
+            [(self.apple.id, 5)],
+        )
+
+    def test_snapshot_written_on_commit_without_flusher(self):
+        """
+        Без GUEST_CART_FLUSH_INTERVAL фоновый поток не запускается,
+        а снимок корзины записывается после фиксации транзакции запроса.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            signed_id = self.add(self.apple, 2)[guest_cart.GUEST_CART_HEADER]
+        guest_id = guest_cart.unsign_guest_cart_id(signed_id)
+        self.assertIsNone(guest_cart._flusher)
+        self.assertEqual(
+            GuestCart.objects.get(guest_id=guest_id).items,
+            {str(self.apple.id): 2},
+        )
+
+    @override_settings(GUEST_CART_FLUSH_INTERVAL=60)
+    @patch.object(guest_cart, "_flusher", object())
+    def test_mutations_do_not_write_to_database(self):
+        """
+        С фоновой записью (GUEST_CART_FLUSH_INTERVAL) изменения корзины
+        гостя не пишут в БД.
+        """
+        self.add(self.apple, 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.add(self.pear, 2)
+            self.client.post(
+                reverse("guestcart-reduce-product"),
+                {"product": self.apple.id, "amount": 1},
+                format="json",
+            )
+            self.client.patch(
+                reverse("guestcart-detail", kwargs={"pk": self.pear.id}),
+                {"amount": 4},
+                format="json",
+            )
+        self.assertFalse(
+            [query["sql"] for query in queries if not query["sql"].startswith("SELECT")]
+        )
+        response = self.client.get(reverse("guestcart-composition-basket-sum"))
+        self.assertEqual(response.data["Общее количество продуктов"], 4)
+        self.assertEqual(response.data["Количество позиций"], 1)
+
+    def test_forged_cart_id_is_ignored(self):
+        """
+        Идентификатор с неверной подписью не дает доступа к корзине.
+        """
+        signed_id = self.add(self.apple, 1)[guest_cart.GUEST_CART_HEADER]
+        self.client.credentials(HTTP_X_GUEST_CART_ID=signed_id[:-1] + "x")
+        response = self.client.get(reverse("guestcart-list"))
+        self.assertEqual(response.data, [])
+
+    def test_flush_persists_snapshot_and_restores_it(self):
+        """
+        Снимок корзины записывается в БД и восстанавливается после
+        вытеснения корзины из кэша.
+        """
+        signed_id = self.add(self.apple, 3)[guest_cart.GUEST_CART_HEADER]
+        self.assertEqual(guest_cart.flush_pending(), 1)
+        guest_id = guest_cart.unsign_guest_cart_id(signed_id)
+        self.assertEqual(
+            GuestCart.objects.get(guest_id=guest_id).items,
+            {str(self.apple.id): 3},
+        )
+
+        store = guest_cart.GuestCartStore()
+        store.cache.clear()
+        self.assertEqual(store.get(guest_id), {self.apple.id: 3})
+
+    @override_settings(GUEST_CART_FLUSH_INTERVAL=60)
+    @patch.object(guest_cart, "_flusher", object())
+    def test_concurrent_updates_lose_no_changes(self):
+        """
+        Параллельные изменения одной корзины не теряют друг друга.
+        """
+        store = guest_cart.GuestCartStore()
+        guest_id, _ = guest_cart.new_guest_cart_id()
+        store.save(guest_id, {})
+        get = store.get
+
+        def slow_get(guest_id):
+            # Расширяет окно между чтением и записью корзины.
+            amounts = get(guest_id)
+            time.sleep(0.001)
+            return amounts
+
+        store.get = slow_get
+        threads_count, adds_per_thread = 8, 20
+        barrier = threading.Barrier(threads_count)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(adds_per_thread):
+                    store.update(
+                        guest_id,
+                        [{"op": "add", "product": self.apple.id, "amount": 1}],
+                    )
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=worker) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            get(guest_id), {self.apple.id: threads_count * adds_per_thread}
+        )
+
+    def test_busy_cart_returns_429(self):
+        """
+        Если корзину дольше допустимого изменяет другой запрос,
+        изменение отклоняется с 429, а корзина не меняется.
+        """
+        signed_id = self.add(self.apple, 1)[guest_cart.GUEST_CART_HEADER]
+        guest_id = guest_cart.unsign_guest_cart_id(signed_id)
+        store = guest_cart.GuestCartStore()
+        with patch.object(guest_cart, "LOCK_WAIT", 0), store.lock(guest_id):
+            response = self.client.post(
+                reverse("guestcart-list"),
+                {"product": self.apple.id, "amount": 1},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(store.get(guest_id), {self.apple.id: 1})
+
+    def test_expired_snapshots_are_ignored_and_deleted(self):
+        """
+        Снимки старше срока хранения корзины не восстанавливаются
+        и удаляются командой clear_guest_carts.
+        """
+        expired = timezone.now() - timedelta(seconds=CacheTimeout.GUEST_CART.value + 1)
+        GuestCart.objects.create(guest_id="expired", items={str(self.apple.id): 1})
+        GuestCart.objects.create(guest_id="fresh", items={str(self.pear.id): 2})
+        GuestCart.objects.filter(guest_id="expired").update(date_updated=expired)
+
+        store = guest_cart.GuestCartStore()
+        store.cache.clear()
+        self.assertEqual(store.get("expired"), {})
+        out = StringIO()
+        call_command("clear_guest_carts", stdout=out)
+        self.assertIn("Удалено 1", out.getvalue())
+        self.assertEqual(
+            list(GuestCart.objects.values_list("guest_id", flat=True)), ["fresh"]
+        )
+
+    def test_batch(self):
+        """
+        Пакет операций применяется к гостевой корзине.
+        """
+        response = self.client.post(
+            reverse("guestcart-batch"),
+            {
+                "operations": [
+                    {"op": "add", "product": self.apple.id, "amount": 2},
+                    {"op": "set", "product": self.pear.id, "amount": 3},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_price"], "350.00")
+        self.assertIn(guest_cart.GUEST_CART_HEADER, response)
+
+    def test_login_merges_guest_cart(self):
+        """
+        Вход с заголовком гостевой корзины переносит ее в корзину
+        пользователя, складывая количество.
+        """
+        product_cart = ProductCart.objects.create(user=self.user)
+        ShoppingCartProduct.objects.create(
+            product_cart=product_cart, product=self.apple, amount=1
+        )
+        signed_id = self.add(self.apple, 2)[guest_cart.GUEST_CART_HEADER]
+        self.add(self.pear, 4)
+        guest_cart.flush_pending()
+
+        response = self.client.post(
+            reverse("login"),
+            {"username": self.user.username, "password": "Passwordpass1"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            dict(
+                product_cart.shopping_cart_products.values_list("product_id", "amount")
+            ),
+            {self.apple.id: 3, self.pear.id: 4},
+        )
+        product_cart.refresh_from_db()
+        self.assertEqual(product_cart.total_price, 500)
+        guest_id = guest_cart.unsign_guest_cart_id(signed_id)
+        self.assertFalse(GuestCart.objects.filter(guest_id=guest_id).exists())
+        response = self.client.get(reverse("guestcart-list"))
+        self.assertEqual(response.data, [])
+
+    def test_merge_waits_for_cart_lock(self):
+        """
+        Перенос корзины при входе выполняется под блокировкой корзины:
+        пока корзину изменяет другой запрос, она остается гостевой.
+        """
+        signed_id = self.add(self.apple, 2)[guest_cart.GUEST_CART_HEADER]
+        guest_id = guest_cart.unsign_guest_cart_id(signed_id)
+        store = guest_cart.GuestCartStore()
+        with patch.object(guest_cart, "LOCK_WAIT", 0), store.lock(guest_id):
+            response = self.client.post(
+                reverse("login"),
+                {"username": self.user.username, "password": "Passwordpass1"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(ShoppingCartProduct.objects.exists())
+        self.assertEqual(store.get(guest_id), {self.apple.id: 2})
@@ -0,0 +1,314 @@
+import hashlib
+from io import BytesIO, StringIO
+from unittest import mock
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+from pytest import mark
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from food_shop import images
+from food_shop.models import Category, Product, ProductImage, Subcategory
+
+
+def make_image_file(name="source.jpg", size=(1200, 900), image_format="JPEG"):
+    """
+    Создает загружаемый файл изображения заданного размера.
+    """
+    buffer = BytesIO()
+    Image.new("RGB", size, color=(200, 30, 30)).save(buffer, format=image_format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@pytest.fixture
+def media_settings(settings, tmp_path):
+    """
+    Фикстура, сохраняющая медиафайлы во временный каталог
+    и включающая синхронную обработку изображений.
+    """
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.IMAGE_PROCESSING_EAGER = True
+    return settings
+
+
+@pytest.fixture
+def subcategory():
+    """
+    Фикстура подкатегории для продуктов с изображениями.
+    """
+    category = Category.objects.create(name="Test_Category_Fruits")
+    return Subcategory.objects.create(
+        name="Test_Subcategory_Berries", category=category
+    )
+
+
+def image_size(field_file):
+    with field_file.open("rb") as f:
+        return Image.open(f).size
+
+
+@mark.django_db
+class TestProductImagePipeline:
+    """Тесты фоновой обработки изображений продукта."""
+
+    def test_all_sizes_from_single_decode(
+        self, media_settings, subcategory, django_capture_on_commit_callbacks
+    ):
+        """
+        Все размеры строятся из одного декодирования большого фото,
+        статусы всех полей - "Готово".
+        """
+        with mock.patch.object(images.Image, "open", wraps=Image.open) as image_open:
+            with django_capture_on_commit_callbacks(execute=True):
+                product = Product.objects.create(
+                    name="Test_Product_Клубника",
+                    subcategory=subcategory,
+                    price=300,
+                    icon_big=make_image_file(),
+                )
+        assert image_open.call_count == 1
+
+        product.refresh_from_db()
+        assert max(image_size(product.icon_big)) == 600
+        assert max(image_size(product.icon_middle)) == 400
+        assert max(image_size(product.icon_small)) == 200
+        assert set(product.images.values_list("status", flat=True)) == {
+            ProductImage.Status.DONE
+        }
+
+    def test_processing_starts_after_commit(
+        self, media_settings, subcategory, django_capture_on_commit_callbacks
+    ):
+        """
+        До фиксации транзакции изображения только поставлены в очередь.
+        """
+        with mock.patch.object(images, "submit_product_images") as submit:
+            with django_capture_on_commit_callbacks(execute=False) as callbacks:
+                product = Product.objects.create(
+                    name="Test_Product_Клубника",
+                    subcategory=subcategory,
+                    price=300,
+                    icon_big=make_image_file(),
+                )
+            submit.assert_not_called()
+            assert set(product.images.values_list("status", flat=True)) == {
+                ProductImage.Status.PENDING
+            }
+            assert max(image_size(product.icon_big)) == 1200
+            for callback in callbacks:
+                callback()
+        submit.assert_called_once_with(product.pk)
+
+    def test_broken_image_marked_failed(
+        self, media_settings, subcategory, django_capture_on_commit_callbacks
+    ):
+        """
+        Ошибка декодирования отмечается статусом "Ошибка" с текстом ошибки,
+        команда process_product_images повторяет обработку.
+        """
+        with django_capture_on_commit_callbacks(execute=True):
+            product = Product.objects.create(
+                name="Test_Product_Клубника",
+                subcategory=subcategory,
+                price=300,
+                icon_big=SimpleUploadedFile("broken.jpg", b"not an image"),
+            )
+        image = product.images.get(field_name="icon_big")
+        assert image.status == ProductImage.Status.FAILED
+        assert image.error
+
+        call_command("process_product_images", "--retry-failed")
+        image.refresh_from_db()
+        assert image.status == ProductImage.Status.FAILED
+
+
+@mark.django_db(transaction=True)
+def test_worker_pool_processes_images(media_settings, subcategory):
+    """
+    В асинхронном режиме обработка выполняется в пуле потоков.
+    """
+    media_settings.IMAGE_PROCESSING_EAGER = False
+    with mock.patch.object(images, "submit_product_images"):
+        product = Product.objects.create(
+            name="Test_Product_Клубника",
+            subcategory=subcategory,
+            price=300,
+            icon_middle=make_image_file(
+                size=(500, 500), image_format="PNG", name="source.png"
+            ),
+        )
+
+    images.submit_product_images(product.id).result(timeout=30)
+
+    product.refresh_from_db()
+    assert max(image_size(product.icon_big)) == 500
+    assert max(image_size(product.icon_small)) == 200
+    assert set(product.images.values_list("status", flat=True)) == {
+        ProductImage.Status.DONE
+    }
+
+
+def make_exif_image_file(name="exif.jpg"):
+    """
+    Создает JPEG с EXIF (ориентация и модель камеры).
+    """
+    image = Image.new("RGB", (1200, 900), color=(30, 200, 30))
+    exif = Image.Exif()
+    exif[0x0110] = "Test camera"
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", exif=exif.tobytes())
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@mark.django_db
+class TestProductImageVariants:
+    """Тесты дополнительных форматов и компактного кодирования."""
+
+    def test_webp_variants_without_metadata(
+        self, media_settings, subcategory, django_capture_on_commit_callbacks
+    ):
+        """
+        Для каждого размера сохраняется WebP, метаданные удаляются,
+        неподдерживаемые форматы пропускаются.
+        """
+        media_settings.IMAGE_VARIANT_FORMATS = ["WEBP", "UNSUPPORTED"]
+        with django_capture_on_commit_callbacks(execute=True):
+            product = Product.objects.create(
+                name="Test_Product_Клубника",
+                subcategory=subcategory,
+                price=300,
+                icon_big=make_exif_image_file(),
+            )
+        product.refresh_from_db()
+        assert set(product.icon_variants) == set(images.ICON_SIZES)
+        for field_name, max_size in images.ICON_SIZES.items():
+            name = product.icon_variants[field_name]["webp"]
+            with getattr(product, field_name).storage.open(name) as f:
+                variant = Image.open(f)
+                assert variant.format == "WEBP"
+                assert max(variant.size) == max_size
+            with getattr(product, field_name).open("rb") as f:
+                assert not Image.open(f).getexif()
+
+    def test_serializer_exposes_variants(
+        self, media_settings, subcategory, django_capture_on_commit_callbacks
+    ):
+        """
+        Ссылки на варианты есть в списке и в карточке продукта.
+        """
+        media_settings.IMAGE_VARIANT_FORMATS = ["WEBP"]
+        with django_capture_on_commit_callbacks(execute=True):
+            product = Product.objects.create(
+                name="Test_Product_Клубника",
+                subcategory=subcategory,
+                price=300,
+                icon_big=make_image_file(),
+            )
+        client = APIClient()
+        detail = client.get(reverse("product-detail", kwargs={"pk": product.pk}))
+        listed = client.get(reverse("product-list"))
+        variants = detail.data["icon_variants"]
+        assert variants["icon_small"]["webp"].startswith("http://testserver/")
+        assert variants["icon_small"]["webp"].endswith(".webp")
+        assert listed.data["results"][0]["icon_variants"] == variants
+
+    def test_tuned_jpeg_is_progressive(self):
+        """
+        JPEG кодируется прогрессивно.
+        """
+        image = Image.new("RGB", (300, 200), color=(10, 20, 30))
+        encoded = Image.open(BytesIO(images.encode_image(image, "JPEG")))
+        assert encoded.info.get("progressive")
+
+    def test_benchmark_reports_savings(self, media_settings):
+        """
+        Бенчмарк печатает размеры по полям для синтетического каталога.
+        """
+        call_command("seed_catalog", products=3, images=2, stdout=StringIO())
+        out = StringIO()
+        call_command("benchmark_image_formats", stdout=out)
+        lines = out.getvalue().splitlines()
+        assert lines[0].startswith("Продуктов с фото: 2")
+        assert [line.split()[0] for line in lines[2:]] == list(images.ICON_SIZES)
+
+
+@mark.django_db
+class TestProductImageChangeTracking:
+    """Тесты повторной обработки только измененных изображений."""
+
+    @pytest.fixture
+    def product(self, media_settings, subcategory, django_capture_on_commit_callbacks):
+        """
+        Продукт с обработанными изображениями, загруженный из БД.
+        """
+        media_settings.IMAGE_VARIANT_FORMATS = []
+        with django_capture_on_commit_callbacks(execute=True):
+            product = Product.objects.create(
+                name="Test_Product_Клубника",
+                subcategory=subcategory,
+                price=300,
+                icon_big=make_image_file(),
+            )
+        return Product.objects.get(pk=product.pk)
+
+    def test_price_edit_does_no_image_work(
+        self, product, django_capture_on_commit_callbacks
+    ):
+        """
+        Изменение цены не ставит изображения в очередь и не читает файлы.
+        """
+        with (
+            mock.patch.object(images.Image, "open") as image_open,
+            mock.patch.object(images, "submit_product_images") as submit,
+        ):
+            with django_capture_on_commit_callbacks(execute=True):
+                product.price = 350
+                product.save()
+        submit.assert_not_called()
+        image_open.assert_not_called()
+
+    def test_unchanged_files_are_not_rewritten(self, product):
+        """
+        Повторная обработка без замены файлов ничего не перезаписывает.
+        """
+        product.images.update(status=ProductImage.Status.PENDING)
+        with mock.patch.object(images, "save_derivative") as save_derivative:
+            images.process_product_images(product.pk)
+        save_derivative.assert_not_called()
+        assert set(product.images.values_list("status", flat=True)) == {
+            ProductImage.Status.DONE
+        }
+
+    def test_hash_and_dimensions_recorded(self, product):
+        """
+        Для каждого поля записаны хэш файла и его размеры.
+        """
+        for image in product.images.all():
+            field_file = getattr(product, image.field_name)
+            with field_file.open("rb") as f:
+                assert image.content_hash == hashlib.sha256(f.read()).hexdigest()
+            assert (image.width, image.height) == image_size(field_file)
+
+    def test_only_replaced_field_and_smaller_rebuilt(
+        self, product, django_capture_on_commit_callbacks
+    ):
+        """
+        Замена среднего фото пересобирает среднее и маленькое,
+        большое не трогается; исходник в пределах размера не перекодируется.
+        """
+        big_name = product.icon_big.name
+        upload = make_image_file(size=(300, 300), name="middle.jpg")
+        upload_hash = hashlib.sha256(upload.read()).hexdigest()
+        upload.seek(0)
+        with django_capture_on_commit_callbacks(execute=True):
+            product.icon_middle = upload
+            product.save()
+        product.refresh_from_db()
+        assert product.icon_big.name == big_name
+        middle = product.images.get(field_name="icon_middle")
+        assert middle.content_hash == upload_hash
+        assert (middle.width, middle.height) == (300, 300)
+        assert max(image_size(product.icon_small)) == 200
@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 from autoslug import AutoSlugField
 from django.core.exceptions import ValidationError
@@ -9,14 +11,18 @@ from django.db.models import (
     ForeignKey,
     PositiveSmallIntegerField
 )
-from django.test import TestCase
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
 from gunicorn.config import User
 from pytest import mark
 from pytest_django.asserts import assertRaisesMessage
 
 from core.constants import LenghtField
+from food_shop.slugs import allocate_slugs
 from users.models import MyUser
 from food_shop.models import (
+    CatalogNode,
     Category,
     Subcategory,
     Product,
@@ -278,3 +284,267 @@ class TestShoppingCartProductModel(TestCase):
                         f" {product.name} в количестве {shopping_cart_product.amount} "
                         f" {product.measurement_unit}")
         assert str(shopping_cart_product) == expected_str
+
+
+@pytest.mark.django_db
+class TestCatalogNodeModel(TestCase):
+    """Тесты для иерархического каталога(CatalogNode)."""
+
+    def setUp(self):
+        """
+        Создает категорию с подкатегорией и продуктом.
+        """
+        self.category = Category.objects.create(name="Test_Category_Fruits")
+        self.subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_Berries",
+            category=self.category,
+        )
+        self.product = Product.objects.create(
+            name="Test_Product_Клубника",
+            subcategory=self.subcategory,
+            price=300,
+        )
+
+    def test_nodes_created_for_category_and_subcategory(self):
+        """
+        Категория становится корнем дерева, подкатегория - дочерним узлом.
+        """
+        category_node = CatalogNode.objects.get(category=self.category)
+        subcategory_node = CatalogNode.objects.get(subcategory=self.subcategory)
+        assert category_node.is_root_node()
+        assert subcategory_node.parent == category_node
+        assert subcategory_node.name == self.subcategory.name
+
+    def test_subtree_products_single_query(self):
+        """
+        Продукты поддерева с промежуточным узлом выбираются одним запросом.
+        """
+        category_node = CatalogNode.objects.get(category=self.category)
+        intermediate = CatalogNode.objects.create(
+            name="Test_Node_Garden", parent=category_node
+        )
+        subcategory_node = CatalogNode.objects.get(subcategory=self.subcategory)
+        subcategory_node.parent = intermediate
+        subcategory_node.save()
+        category_node.refresh_from_db()
+
+        with self.assertNumQueries(1):
+            products = list(category_node.get_products())
+        assert products == [self.product]
+
+        other_category = Category.objects.create(name="Test_Category_Vegetables")
+        other_node = CatalogNode.objects.get(category=other_category)
+        assert not other_node.get_products().exists()
+
+    def test_breadcrumbs_single_query(self):
+        """
+        Цепочка предков узла выбирается одним запросом.
+        """
+        subcategory_node = CatalogNode.objects.get(subcategory=self.subcategory)
+        with self.assertNumQueries(1):
+            names = [
+                node.name
+                for node in subcategory_node.get_ancestors(include_self=True)
+            ]
+        assert names == [self.category.name, self.subcategory.name]
+
+    def test_subcategory_moved_to_new_category(self):
+        """
+        Смена категории подкатегории переносит ее узел в новое дерево,
+        а переименование обновляет название узла.
+        """
+        other_category = Category.objects.create(name="Test_Category_Vegetables")
+        self.subcategory.category = other_category
+        self.subcategory.name = "Test_Subcategory_Roots"
+        self.subcategory.save()
+
+        subcategory_node = CatalogNode.objects.get(subcategory=self.subcategory)
+        assert subcategory_node.parent.category == other_category
+        assert subcategory_node.name == "Test_Subcategory_Roots"
+
+    def test_delete_subcategory_keeps_tree_consistent(self):
+        """
+        Удаление подкатегории удаляет ее узел без разрывов в nested set.
+        """
+        self.subcategory.delete()
+        category_node = CatalogNode.objects.get(category=self.category)
+        assert not CatalogNode.objects.filter(
+            subcategory__isnull=False
+        ).exists()
+        assert (category_node.lft, category_node.rght) == (1, 2)
+
+    def test_sync_catalog_restores_missing_nodes(self):
+        """
+        Синхронизация создает узлы для категорий и подкатегорий,
+        добавленных в обход сигналов.
+        """
+        CatalogNode.objects.all().delete()
+        CatalogNode.objects.sync_catalog()
+        subcategory_node = CatalogNode.objects.get(subcategory=self.subcategory)
+        assert subcategory_node.parent.category == self.category
+        assert list(subcategory_node.parent.get_products()) == [self.product]
+
+
+class TestCartConcurrentIncrements(TransactionTestCase):
+    """
+    Стресс-тест атомарного добавления продукта в корзину из
+    нескольких потоков (у каждого потока свое соединение с БД).
+    """
+
+    THREADS = 8
+    ADDS_PER_THREAD = 10
+
+    def setUp(self):
+        user = MyUser.objects.create_user(
+            username="Usertest_concurrent",
+            email="usertest_concurrent@example.com",
+            password="Passwordpass1"
+        )
+        category = Category.objects.create(name="Test_Category_Concurrent")
+        subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_Concurrent", category=category
+        )
+        self.product = Product.objects.create(
+            name="Test_Product_Concurrent", subcategory=subcategory, price=10
+        )
+        self.product_cart = ProductCart.objects.create(user=user)
+
+    def run_concurrently(self, amount):
+        """
+        Запускает THREADS потоков, каждый из которых ADDS_PER_THREAD раз
+        добавляет продукт в корзину; старт синхронизирован барьером.
+        """
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                cart = ProductCart.objects.get(pk=self.product_cart.pk)
+                for _ in range(self.ADDS_PER_THREAD):
+                    cart.add_product(self.product, amount)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_adds_lose_no_increments(self):
+        """
+        Параллельные добавления дают одну позицию с полной суммой.
+        """
+        self.run_concurrently(amount=3)
+
+        expected = self.THREADS * self.ADDS_PER_THREAD * 3
+        item = ShoppingCartProduct.objects.get(product_cart=self.product_cart)
+        self.assertEqual(item.amount, expected)
+        self.product_cart.refresh_from_db()
+        self.assertEqual(self.product_cart.total_amount, expected)
+        self.assertEqual(self.product_cart.total_price, expected * 10)
+        self.assertEqual(self.product_cart.item_count, 1)
+
+    def test_concurrent_adds_clamped_to_max(self):
+        """
+        Количество не превышает MAX_AMOUNT_PRODUCT, итоги согласованы.
+        """
+        self.run_concurrently(amount=20)
+
+        max_amount = LenghtField.MAX_AMOUNT_PRODUCT.value
+        item = ShoppingCartProduct.objects.get(product_cart=self.product_cart)
+        self.assertEqual(item.amount, max_amount)
+        self.product_cart.refresh_from_db()
+        self.assertEqual(self.product_cart.total_amount, max_amount)
+
+
+@pytest.mark.django_db
+class TestSlugAllocation:
+    """Тесты назначения слагов одним запросом на пачку."""
+
+    def test_suffixes_for_repeated_names(self):
+        """Одинаковые названия получают суффиксы -2, -3."""
+        slugs = [Category.objects.create(name="Фрукты").slug for _ in range(3)]
+        assert slugs == ["frukty", "frukty-2", "frukty-3"]
+
+    def test_bulk_create_allocates_unique_slugs(self, django_assert_max_num_queries):
+        """Слаги пачки назначаются не более чем двумя запросами."""
+        Category.objects.create(name="Овощи")
+        categories = [Category(name="Овощи") for _ in range(5)]
+        categories.append(Category(name="Ягоды"))
+        with django_assert_max_num_queries(2):
+            allocate_slugs(categories)
+        assert [category.slug for category in categories] == [
+            "ovoschi-2",
+            "ovoschi-3",
+            "ovoschi-4",
+            "ovoschi-5",
+            "ovoschi-6",
+            "jagody",
+        ]
+        Category.objects.bulk_create(categories)
+        assert Category.objects.filter(slug__startswith="ovoschi").count() == 6
+
+    def test_update_does_not_probe_slug(self, django_assert_num_queries):
+        """При обновлении сохраненный слаг не перепроверяется."""
+        category = Category.objects.create(name="Молоко")
+        category.name = "Молоко"
+        with django_assert_num_queries(0):
+            field = Category._meta.get_field("slug")
+            assert field.pre_save(category, add=False) == "moloko"
+
+    def test_long_slug_is_cropped_with_suffix(self):
+        """Суффикс умещается в max_length слага."""
+        name = "Я" * LenghtField.MAX_LEN_SLUG.value
+        first = Category.objects.create(name=name)
+        second = Category.objects.create(name=name)
+        assert len(second.slug) <= LenghtField.MAX_LEN_SLUG.value
+        assert second.slug.endswith("-2")
+        assert second.slug != first.slug
+
+
+class TestCatalogTreeMigration(TransactionTestCase):
+    """
+    Тест миграции 0007: перенос категорий и подкатегорий в дерево
+    узлов при совпадающих слагах.
+    """
+
+    BEFORE = [("food_shop", "0006_product_date_add_id_idx")]
+    AFTER = [("food_shop", "0007_catalognode")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_colliding_slugs_get_suffixes(self):
+        """
+        Слаг подкатегории, совпадающий со слагом категории или с уже
+        назначенным суффиксом, получает свободный суффикс, а узел
+        категории сохраняет слаг категории.
+        """
+        apps = self.migrate(self.BEFORE)
+        category = apps.get_model("food_shop", "Category").objects.create(
+            name="Ягоды", slug="yagody"
+        )
+        subcategories = apps.get_model("food_shop", "Subcategory").objects
+        subcategories.create(name="Ягоды", slug="yagody", category=category)
+        subcategories.create(
+            name="Ягоды садовые", slug="yagody-2", category=category
+        )
+
+        apps = self.migrate(self.AFTER)
+        nodes = apps.get_model("food_shop", "CatalogNode").objects.order_by("lft")
+        assert [(node.name, node.slug, node.level) for node in nodes] == [
+            ("Ягоды", "yagody", 0),
+            ("Ягоды", "yagody-2", 1),
+            ("Ягоды садовые", "yagody-2-2", 1),
+        ]
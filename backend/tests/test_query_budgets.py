@@ -0,0 +1,346 @@
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from api.v1.views import (
+    CatalogNodeViewSet,
+    CategoryViewSet,
+    GuestCartViewSet,
+    ProductViewSet,
+    ShoppingCartProductViewSet,
+    SubcategoryViewSet,
+)
+from core.middleware import QueryCountHeadersMiddleware
+from core.query_budget import (
+    QueryBudgetExceededError,
+    assert_query_budget,
+    count_queries,
+)
+from food_shop import guest_cart
+from food_shop.models import (
+    CatalogNode,
+    Category,
+    Product,
+    ProductCart,
+    ShoppingCartProduct,
+    Subcategory,
+)
+from users.models import MyUser
+
+SIZES = (1, 5, 20)
+
+
+class TestQueryBudgets(APITestCase):
+    """
+    Тесты бюджетов SQL-запросов действий ViewSet: число запросов не
+    превышает query_budgets и не растет вместе с объемом данных.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = MyUser.objects.create_user(
+            username="Budget_user",
+            email="budget@example.com",
+            password="Passwordpass1",
+        )
+        cls.category = Category.objects.create(name="Бюджет категория")
+        cls.subcategory = Subcategory.objects.create(
+            name="Бюджет подкатегория", category=cls.category
+        )
+        cls.product = Product.objects.create(
+            name="Бюджет продукт", subcategory=cls.subcategory, price=100
+        )
+        cls.node = CatalogNode.objects.get(subcategory=cls.subcategory)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product_cart, _ = ProductCart.objects.get_or_create(user=self.user)
+
+    def grow_catalog(self, size):
+        """Доводит число категорий, подкатегорий и продуктов до size."""
+        for index in range(Category.objects.count(), size):
+            category = Category.objects.create(name=f"Категория {index}")
+            Subcategory.objects.create(name=f"Подкатегория {index}", category=category)
+        for index in range(Product.objects.count(), size):
+            Product.objects.create(
+                name=f"Продукт {index}",
+                subcategory=self.subcategory,
+                price=Decimal(10 + index),
+            )
+
+    def grow_cart(self, size):
+        """Доводит число позиций корзины пользователя до size."""
+        self.grow_catalog(size + 1)
+        self.product_cart.merge_items(
+            {
+                product_id: 1
+                for product_id in Product.objects.exclude(
+                    id=self.product.id
+                ).values_list("id", flat=True)[:size]
+            }
+        )
+
+    def cart_item(self):
+        return ShoppingCartProduct.objects.get_or_create(
+            product_cart=self.product_cart,
+            product=self.product,
+            defaults={"amount": 2},
+        )[0]
+
+    def check(self, view, action, method, url, data=None, grow=None):
+        def request():
+            response = getattr(self.client, method)(url, data, format="json")
+            self.assertLess(response.status_code, 400, response.content)
+            return response
+
+        assert_query_budget(
+            view, action, request, grow=grow or self.grow_catalog, sizes=SIZES
+        )
+
+    def test_catalog_budgets(self):
+        """Списки и карточки каталога."""
+        cases = (
+            (CategoryViewSet, "list", reverse("category-list")),
+            (
+                CategoryViewSet,
+                "retrieve",
+                reverse("category-detail", kwargs={"pk": self.category.pk}),
+            ),
+            (SubcategoryViewSet, "list", reverse("subcategory-list")),
+            (
+                SubcategoryViewSet,
+                "retrieve",
+                reverse("subcategory-detail", kwargs={"pk": self.subcategory.pk}),
+            ),
+            (ProductViewSet, "list", reverse("product-list")),
+            (ProductViewSet, "list", reverse("product-list") + "?search=продукт"),
+            (
+                ProductViewSet,
+                "list",
+                reverse("product-list") + "?pagination=cursor",
+            ),
+            (
+                ProductViewSet,
+                "retrieve",
+                reverse("product-detail", kwargs={"pk": self.product.pk}),
+            ),
+            (CatalogNodeViewSet, "list", reverse("catalog-list")),
+            (
+                CatalogNodeViewSet,
+                "retrieve",
+                reverse("catalog-detail", kwargs={"pk": self.node.pk}),
+            ),
+            (
+                CatalogNodeViewSet,
+                "products",
+                reverse("catalog-products", kwargs={"pk": self.node.pk}),
+            ),
+            (
+                CatalogNodeViewSet,
+                "breadcrumbs",
+                reverse("catalog-breadcrumbs", kwargs={"pk": self.node.pk}),
+            ),
+        )
+        for view, action, url in cases:
+            with self.subTest(url=url):
+                self.check(view, action, "get", url)
+
+    def test_shopping_cart_budgets(self):
+        """Действия корзины при росте числа позиций."""
+        item_url = lambda: reverse(  # noqa: E731
+            "shoppingcartproduct-detail", kwargs={"pk": self.cart_item().pk}
+        )
+        view = ShoppingCartProductViewSet
+        self.check(
+            view,
+            "list",
+            "get",
+            reverse("shoppingcartproduct-list"),
+            grow=self.grow_cart,
+        )
+        self.check(
+            view,
+            "create",
+            "post",
+            reverse("shoppingcartproduct-list"),
+            {"product": self.product.pk, "amount": 1},
+            grow=self.grow_cart,
+        )
+        self.check(view, "retrieve", "get", item_url(), grow=self.grow_cart)
+        self.check(
+            view,
+            "partial_update",
+            "patch",
+            item_url(),
+            {"amount": 3},
+            grow=self.grow_cart,
+        )
+        self.check(
+            view,
+            "reduce_product",
+            "post",
+            reverse("shoppingcartproduct-reduce-product"),
+            {"product": self.product.pk, "amount": 1},
+            grow=lambda size: (self.grow_cart(size), self.cart_item()),
+        )
+        self.check(
+            view,
+            "batch",
+            "post",
+            reverse("shoppingcartproduct-batch"),
+            {"operations": [{"op": "set", "product": self.product.pk, "amount": 2}]},
+            grow=self.grow_cart,
+        )
+        self.check(
+            view,
+            "composition_basket_sum",
+            "get",
+            reverse("shoppingcartproduct-composition-basket-sum"),
+            grow=self.grow_cart,
+        )
+
+        for size in SIZES:
+            self.grow_cart(size)
+            url = item_url()
+            assert_query_budget(
+                view, "destroy", lambda: self.client.delete(url), sizes=(size,)
+            )
+        self.check(
+            view,
+            "clear_product_cart",
+            "delete",
+            reverse("shoppingcartproduct-clear-product-cart"),
+            grow=self.grow_cart,
+        )
+
+    @override_settings(GUEST_CART_FLUSH_INTERVAL=3600)
+    @patch.object(guest_cart, "_flusher", object())
+    def test_guest_cart_does_not_query_database(self):
+        """
+        С фоновой записью снимков гостевая корзина работает без
+        запросов к БД (поток записи в тесте не запускается).
+        """
+        client = APIClient()
+        response = client.post(
+            reverse("guestcart-list"),
+            {"product": self.product.pk, "amount": 1},
+            format="json",
+        )
+        client.credentials(HTTP_X_GUEST_CART_ID=response["X-Guest-Cart-Id"])
+        self.client = client
+        no_growth = lambda size: None  # noqa: E731
+        cases = (
+            ("list", "get", reverse("guestcart-list"), None),
+            (
+                "create",
+                "post",
+                reverse("guestcart-list"),
+                {"product": self.product.pk, "amount": 1},
+            ),
+            (
+                "partial_update",
+                "patch",
+                reverse("guestcart-detail", kwargs={"pk": self.product.pk}),
+                {"amount": 5},
+            ),
+            (
+                "reduce_product",
+                "post",
+                reverse("guestcart-reduce-product"),
+                {"product": self.product.pk, "amount": 1},
+            ),
+            (
+                "batch",
+                "post",
+                reverse("guestcart-batch"),
+                {
+                    "operations": [
+                        {"op": "add", "product": self.product.pk, "amount": 1}
+                    ]
+                },
+            ),
+            (
+                "composition_basket_sum",
+                "get",
+                reverse("guestcart-composition-basket-sum"),
+                None,
+            ),
+        )
+        for action, method, url, data in cases:
+            with self.subTest(action=action):
+                self.check(GuestCartViewSet, action, method, url, data, grow=no_growth)
+
+    def test_budget_exceeded_raises(self):
+        """Превышение бюджета и рост числа запросов - ошибки."""
+        with self.assertRaises(QueryBudgetExceededError):
+            assert_query_budget(
+                ProductViewSet,
+                "retrieve",
+                lambda: list(Product.objects.all()) + list(Category.objects.all()),
+                sizes=(1,),
+            )
+        with self.assertRaises(QueryBudgetExceededError):
+            assert_query_budget(ProductViewSet, "destroy", lambda: None)
+
+
+class TestQueryCountHeadersMiddleware(APITestCase):
+    """Тесты заголовков числа SQL-запросов и времени в БД."""
+
+    def test_headers(self):
+        """Заголовки содержат число запросов, время в БД и бюджет."""
+        factory = RequestFactory()
+        view = ProductViewSet.as_view({"get": "list"})
+
+        def get_response(request):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.execute("SELECT 2")
+            return HttpResponse(json.dumps({}))
+
+        middleware = QueryCountHeadersMiddleware(get_response)
+        request = factory.get("/api/v1/product/")
+        middleware.process_view(request, view, (), {})
+        response = middleware(request)
+        self.assertEqual(response["X-Query-Count"], "2")
+        self.assertGreaterEqual(float(response["X-DB-Time"]), 0)
+        self.assertEqual(
+            response["X-Query-Budget"], str(ProductViewSet.query_budgets["list"])
+        )
+
+
+class TestAdminChangelistQueries(APITestCase):
+    """Список позиций корзин в админке без N+1 в __str__."""
+
+    def test_cart_items_changelist(self):
+        """Число запросов не растет с числом позиций."""
+        admin = MyUser.objects.create_superuser(
+            username="Budget_admin", email="admin@example.com", password="pass"
+        )
+        self.client.force_login(admin)
+        category = Category.objects.create(name="Админ категория")
+        subcategory = Subcategory.objects.create(
+            name="Админ подкатегория", category=category
+        )
+        url = reverse("admin:food_shop_shoppingcartproduct_changelist")
+        counts = []
+        for index in range(3):
+            user = MyUser.objects.create_user(
+                username=f"Budget_user_{index}",
+                email=f"budget{index}@example.com",
+                password="Passwordpass1",
+            )
+            product = Product.objects.create(
+                name=f"Админ продукт {index}", subcategory=subcategory, price=10
+            )
+            ProductCart.objects.create(user=user).add_product(product, 1)
+            response, queries = count_queries(lambda: self.client.get(url))
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(len(set(counts)), 1, counts)
@@ -1,12 +1,27 @@
+import itertools
+import json
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from gunicorn.config import User
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
 
-
+from api.v1.filters import ProductFilter, SubcategoryFilter
+from api.v1.serializers import ProductSerializer
+from api.v1.views import ProductViewSet, SubcategoryViewSet
+from core.cache import get_cache_version
+from core.constants import CacheNamespace
 from food_shop.models import (
-    Category, Subcategory, Product, ProductCart, ShoppingCartProduct)
+    CatalogNode, Category, Subcategory, Product, ProductCart, ShoppingCartProduct)
+from food_shop.search import (
+    SQLITE_TRIGGERS,
+    ensure_search_triggers,
+    get_search_triggers,
+)
 from users.models import MyUser
 
 
@@ -192,3 +207,1194 @@ class ShoppingCartProductViewSet(APITestCase):
         # Отправляем запрос без аутентификации пользователя!
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestProductCursorPagination(APITestCase):
+    """
+    Тесты keyset(курсорной) пагинации списка продуктов.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Создает продукты, часть из которых имеет одинаковую дату добавления,
+        чтобы проверить разрешение коллизий по id.
+        """
+        category = Category.objects.create(name="Test_Category_Fruits")
+        subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_Berries",
+            category=category,
+        )
+        cls.products = [
+            Product.objects.create(
+                name=f"Test_Product_{number}",
+                subcategory=subcategory,
+                price=100,
+            )
+            for number in range(7)
+        ]
+        Product.objects.filter(
+            id__in=[product.id for product in cls.products[:4]]
+        ).update(date_add=cls.products[0].date_add)
+
+    def test_cursor_pages_cover_all_products_in_order(self):
+        """
+        Обход всех страниц по ссылкам next возвращает каждый продукт
+        ровно один раз в порядке (-date_add, -id) и без поля count.
+        """
+        url = reverse("product-list") + "?pagination=cursor&limit=2"
+        received = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            received.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+
+        expected = list(
+            Product.objects.order_by("-date_add", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(received, expected)
+
+    def test_cursor_previous_link(self):
+        """
+        Ссылка previous возвращает предыдущую страницу.
+        """
+        url = reverse("product-list") + "?pagination=cursor&limit=3"
+        first_page = self.client.get(url).data
+        second_page = self.client.get(first_page["next"]).data
+        previous_page = self.client.get(second_page["previous"]).data
+        self.assertEqual(previous_page["results"], first_page["results"])
+
+    def test_cursor_page_without_count_query(self):
+        """
+        Страница курсорной пагинации выполняется без запроса COUNT(*).
+        """
+        url = reverse("product-list") + "?pagination=cursor&limit=2"
+        next_url = self.client.get(url).data["next"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(next_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for query in queries.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"])
+            self.assertNotIn("OFFSET", query["sql"])
+
+    def test_invalid_cursor(self):
+        """
+        Некорректный курсор - ответ 404 Not Found.
+        """
+        url = reverse("product-list") + "?cursor=invalid"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_search_rejected(self):
+        """
+        Курсорная пагинация не применяется к результатам поиска,
+        отсортированным по релевантности: ответ 400, а не страница
+        в порядке даты.
+        """
+        for params in ("pagination=cursor", "cursor=invalid"):
+            with self.subTest(params=params):
+                url = f"{reverse('product-list')}?{params}&search=Test_Product"
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn("pagination", response.data)
+        response = self.client.get(
+            reverse("product-list"), {"search": "Test_Product"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_page_number_pagination_by_default(self):
+        """
+        Без параметра pagination сохраняется постраничная пагинация.
+        """
+        response = self.client.get(reverse("product-list"))
+        self.assertEqual(response.data["count"], len(self.products))
+
+
+class TestCategoryTreeCache(APITestCase):
+    """
+    Тесты кэширования дерева категорий(CategoryViewSet).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Создает категорию с подкатегорией.
+        """
+        cls.category = Category.objects.create(name="Test_Category_Fruits")
+        cls.subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_Berries",
+            category=cls.category,
+        )
+
+    def test_category_list_cache_hit_without_queries(self):
+        """
+        Повторный запрос списка категорий не обращается к БД.
+        """
+        url = reverse("category-list")
+        first_response = self.client.get(url)
+        with self.assertNumQueries(0):
+            second_response = self.client.get(url)
+        self.assertEqual(second_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_response.data, first_response.data)
+
+    def test_category_detail_cache_hit_without_queries(self):
+        """
+        Повторный запрос категории по id не обращается к БД.
+        """
+        url = reverse("category-detail", kwargs={"pk": self.category.id})
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data["name"], self.category.name)
+
+    def test_cache_invalidated_on_subcategory_save(self):
+        """
+        Изменение подкатегории сбрасывает кэш списка и деталей категории.
+        """
+        list_url = reverse("category-list")
+        detail_url = reverse("category-detail", kwargs={"pk": self.category.id})
+        self.client.get(list_url)
+        self.client.get(detail_url)
+
+        self.subcategory.name = "Test_Subcategory_Citrus"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subcategory.save()
+
+        response = self.client.get(list_url)
+        self.assertEqual(
+            response.data["results"][0]["subcategories"][0]["name"],
+            "Test_Subcategory_Citrus",
+        )
+        response = self.client.get(detail_url)
+        self.assertEqual(
+            response.data["subcategories"][0]["name"], "Test_Subcategory_Citrus"
+        )
+
+    def test_cache_invalidated_on_category_delete(self):
+        """
+        Удаление категории сбрасывает кэш списка категорий.
+        """
+        url = reverse("category-list")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.data["count"], 0)
+
+    def test_cache_not_refilled_before_commit(self):
+        """
+        Версия кэша меняется только после фиксации транзакции: чтение
+        внутри транзакции не кэширует данные под новой версией.
+        """
+        url = reverse("category-list")
+        self.client.get(url)
+        version = get_cache_version(CacheNamespace.CATEGORY_TREE)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.subcategory.name = "Test_Subcategory_Citrus"
+                self.subcategory.save()
+                self.assertEqual(
+                    get_cache_version(CacheNamespace.CATEGORY_TREE), version
+                )
+        self.assertNotEqual(
+            get_cache_version(CacheNamespace.CATEGORY_TREE), version
+        )
+        response = self.client.get(url)
+        self.assertEqual(
+            response.data["results"][0]["subcategories"][0]["name"],
+            "Test_Subcategory_Citrus",
+        )
+
+
+class TestCatalogNodeViewSet(APITestCase):
+    """
+    Тесты эндпоинтов иерархического каталога(CatalogNodeViewSet).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Создает категорию с подкатегорией и продуктом.
+        """
+        cls.category = Category.objects.create(name="Test_Category_Fruits")
+        cls.subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_Berries",
+            category=cls.category,
+        )
+        cls.product = Product.objects.create(
+            name="Test_Product_Клубника",
+            subcategory=cls.subcategory,
+            price=300,
+        )
+        cls.category_node = CatalogNode.objects.get(category=cls.category)
+        cls.subcategory_node = CatalogNode.objects.get(subcategory=cls.subcategory)
+
+    def test_catalog_subtree_products(self):
+        """
+        GET-запрос "catalog-products" возвращает продукты поддерева.
+        """
+        url = reverse("catalog-products", kwargs={"pk": self.category_node.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["name"], self.product.name)
+
+    def test_catalog_breadcrumbs(self):
+        """
+        GET-запрос "catalog-breadcrumbs" возвращает путь от корня до узла.
+        """
+        url = reverse(
+            "catalog-breadcrumbs", kwargs={"pk": self.subcategory_node.id}
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [node["id"] for node in response.data],
+            [self.category_node.id, self.subcategory_node.id],
+        )
+
+
+class TestShoppingCartTotals(APITestCase):
+    """
+    Тесты денормализованных итогов продуктовой корзины.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Пользователь с корзиной и два продукта с разной ценой.
+        """
+        cls.user = MyUser.objects.create_user(
+            username="Usertest_totals",
+            email="usertest_totals@example.com",
+            password="Passwordpass1"
+        )
+        cls.category = Category.objects.create(name="Test_Category_Totals")
+        cls.subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_Totals",
+            category=cls.category,
+        )
+        cls.apple = Product.objects.create(
+            name="Test_Product_Яблоко",
+            subcategory=cls.subcategory,
+            price=100,
+        )
+        cls.pear = Product.objects.create(
+            name="Test_Product_Груша",
+            subcategory=cls.subcategory,
+            price=50,
+        )
+        cls.product_cart = ProductCart.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, product, amount):
+        return self.client.post(
+            reverse("shoppingcartproduct-list"),
+            {"product": product.id, "amount": amount},
+            format="json",
+        )
+
+    def assert_totals(self, amount, price, items):
+        self.product_cart.refresh_from_db()
+        self.assertEqual(
+            (
+                self.product_cart.total_amount,
+                self.product_cart.total_price,
+                self.product_cart.item_count,
+            ),
+            (amount, price, items),
+        )
+
+    def test_create_increments_totals(self):
+        """
+        Добавление продуктов увеличивает итоги корзины.
+        """
+        self.add(self.apple, 2)
+        self.add(self.pear, 1)
+        self.add(self.apple, 3)
+        self.assert_totals(6, 550, 2)
+
+    def test_update_and_destroy_adjust_totals(self):
+        """
+        Изменение количества и удаление позиции корректируют итоги.
+        """
+        self.add(self.apple, 2)
+        self.add(self.pear, 4)
+        item = ShoppingCartProduct.objects.get(product=self.apple)
+        url = reverse("shoppingcartproduct-detail", kwargs={"pk": item.id})
+        self.client.patch(url, {"amount": 5}, format="json")
+        self.assert_totals(9, 700, 2)
+
+        self.client.delete(url)
+        self.assert_totals(4, 200, 1)
+
+    def test_update_product_adjusts_totals(self):
+        """
+        Замена продукта позиции пересчитывает стоимость по новой цене.
+        """
+        self.add(self.apple, 2)
+        item = ShoppingCartProduct.objects.get(product=self.apple)
+        url = reverse("shoppingcartproduct-detail", kwargs={"pk": item.id})
+        response = self.client.patch(url, {"product": self.pear.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assert_totals(2, 100, 1)
+
+    def test_update_to_product_in_cart_rejected(self):
+        """
+        Замена продукта на уже лежащий в корзине отклоняется (400),
+        позиции и итоги не меняются.
+        """
+        self.add(self.apple, 2)
+        self.add(self.pear, 4)
+        item = ShoppingCartProduct.objects.get(product=self.apple)
+        url = reverse("shoppingcartproduct-detail", kwargs={"pk": item.id})
+        response = self.client.patch(
+            url, {"product": self.pear.id, "amount": 1}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("product", response.data)
+        item.refresh_from_db()
+        self.assertEqual((item.product_id, item.amount), (self.apple.id, 2))
+        self.assert_totals(6, 400, 2)
+
+    def test_reduce_product_removes_empty_item(self):
+        """
+        reduce_product уменьшает итоги и удаляет позицию при нуле.
+        """
+        self.add(self.apple, 3)
+        url = reverse("shoppingcartproduct-reduce-product")
+        self.client.post(url, {"product": self.apple.id, "amount": 1}, format="json")
+        self.assert_totals(2, 200, 1)
+
+        self.client.post(url, {"product": self.apple.id, "amount": 5}, format="json")
+        self.assert_totals(0, 0, 0)
+        self.assertFalse(ShoppingCartProduct.objects.exists())
+
+    def test_reduce_product_ignores_other_users_cart(self):
+        """
+        reduce_product не изменяет корзины других пользователей.
+        """
+        self.add(self.apple, 3)
+        other = MyUser.objects.create_user(
+            username="Usertest_other",
+            email="usertest_other@example.com",
+            password="Passwordpass2"
+        )
+        self.client.force_authenticate(other)
+        response = self.client.post(
+            reverse("shoppingcartproduct-reduce-product"),
+            {"product": self.apple.id, "amount": 1},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assert_totals(3, 300, 1)
+
+    def test_clear_product_cart_resets_totals(self):
+        """
+        Очистка корзины обнуляет итоги.
+        """
+        self.add(self.apple, 3)
+        self.client.delete(reverse("shoppingcartproduct-clear-product-cart"))
+        self.assert_totals(0, 0, 0)
+
+    def test_price_change_refreshes_totals(self):
+        """
+        Изменение цены продукта пересчитывает итоги корзин с ним.
+        """
+        self.add(self.apple, 3)
+        apple = Product.objects.get(id=self.apple.id)
+        apple.price = 120
+        apple.save()
+        self.assert_totals(3, 360, 1)
+
+        apple.delete()
+        self.assert_totals(0, 0, 0)
+
+    def test_summary_is_single_query(self):
+        """
+        Сводка корзины читается одним запросом из полей итогов.
+        """
+        self.add(self.apple, 2)
+        self.add(self.pear, 1)
+        url = reverse("shoppingcartproduct-composition-basket-sum")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data["Общее количество продуктов"], 3)
+        self.assertEqual(response.data["Общая сумма продуктов"], "250.00 рублей")
+        self.assertEqual(response.data["Количество позиций"], 2)
+
+
+class TestShoppingCartBatch(APITestCase):
+    """
+    Тесты пакетного изменения продуктовой корзины.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Пользователь с корзиной и набор продуктов по 10 рублей.
+        """
+        cls.user = MyUser.objects.create_user(
+            username="Usertest_batch",
+            email="usertest_batch@example.com",
+            password="Passwordpass1"
+        )
+        category = Category.objects.create(name="Test_Category_Batch")
+        subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_Batch", category=category
+        )
+        cls.products = [
+            Product.objects.create(
+                name=f"Test_Product_Batch_{index}",
+                subcategory=subcategory,
+                price=10,
+            )
+            for index in range(30)
+        ]
+        cls.product_cart = ProductCart.objects.create(user=cls.user)
+        cls.url = reverse("shoppingcartproduct-batch")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_batch_applies_operations_in_order(self):
+        """
+        Операции применяются по порядку, ответ содержит корзину и итоги.
+        """
+        first, second, third = self.products[:3]
+        ShoppingCartProduct.objects.create(
+            product_cart=self.product_cart, product=third, amount=5
+        )
+        operations = [
+            {"op": "add", "product": first.id, "amount": 2},
+            {"op": "add", "product": first.id, "amount": 3},
+            {"op": "set", "product": second.id, "amount": 4},
+            {"op": "reduce", "product": second.id, "amount": 1},
+            {"op": "remove", "product": third.id},
+        ]
+        response = self.client.post(
+            self.url, {"operations": operations}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {item["product"]: item["amount"] for item in response.data["products"]},
+            {first.id: 5, second.id: 3},
+        )
+        self.assertEqual(response.data["total_amount"], 8)
+        self.assertEqual(response.data["total_price"], "80.00")
+        self.assertEqual(response.data["item_count"], 2)
+
+    def test_batch_query_count_does_not_depend_on_size(self):
+        """
+        Число запросов к БД одинаково для пакета из 3 и из 30 позиций.
+        """
+        def sync(products, amount):
+            operations = [
+                {"op": "set", "product": product.id, "amount": amount}
+                for product in products
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    self.url, {"operations": operations}, format="json"
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        small = sync(self.products[:3], 1)
+        ShoppingCartProduct.objects.all().delete()
+        large = sync(self.products, 1)
+        self.assertEqual(small, large)
+        self.assertEqual(sync(self.products, 2), large)
+
+    def test_batch_is_atomic_on_invalid_operation(self):
+        """
+        Пакет с несуществующим продуктом отклоняется целиком.
+        """
+        operations = [
+            {"op": "add", "product": self.products[0].id, "amount": 1},
+            {"op": "add", "product": 999999, "amount": 1},
+        ]
+        response = self.client.post(
+            self.url, {"operations": operations}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ShoppingCartProduct.objects.exists())
+
+    def test_batch_requires_amount(self):
+        """
+        Операции, кроме remove, требуют количество.
+        """
+        response = self.client.post(
+            self.url,
+            {"operations": [{"op": "add", "product": self.products[0].id}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestProductSearch(APITestCase):
+    """
+    Тесты полнотекстового поиска продуктов (?search=).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Продукты со слагами, транслитерированными из названий.
+        """
+        category = Category.objects.create(name="Test_Category_Search")
+        subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_Search", category=category
+        )
+        cls.strawberry = Product.objects.create(
+            name="Клубника садовая", subcategory=subcategory, price=300
+        )
+        cls.jam = Product.objects.create(
+            name="Варенье клубничное", subcategory=subcategory, price=200
+        )
+        cls.carrot = Product.objects.create(
+            name="Морковь", subcategory=subcategory, price=40
+        )
+        cls.url = reverse("product-list")
+
+    def search(self, query):
+        response = self.client.get(self.url, {"search": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [product["id"] for product in response.data["results"]]
+
+    def test_search_cyrillic_and_transliterated(self):
+        """
+        Продукт находится и по кириллице, и по транслиту.
+        """
+        self.assertEqual(self.search("клубника"), [self.strawberry.id])
+        self.assertEqual(self.search("KLUBNIKA"), [self.strawberry.id])
+
+    def test_search_matches_prefixes_ranked(self):
+        """
+        Слова ищутся как префиксы, более релевантные продукты выше.
+        """
+        self.assertEqual(
+            set(self.search("клубн")), {self.strawberry.id, self.jam.id}
+        )
+        self.assertEqual(self.search("клубн садов")[0], self.strawberry.id)
+        self.assertEqual(self.search("ананас"), [])
+
+    def test_search_index_follows_updates(self):
+        """
+        Индекс обновляется при переименовании и удалении продукта.
+        """
+        self.carrot.name = "Морковь мытая"
+        self.carrot.save()
+        self.assertEqual(self.search("мытая"), [self.carrot.id])
+
+        self.carrot.delete()
+        self.assertEqual(self.search("морковь"), [])
+
+    def test_search_uses_fulltext_index(self):
+        """
+        Поиск выполняется через индекс FTS5, а не сканированием таблицы.
+        """
+        if connection.vendor != "sqlite":
+            self.skipTest("Проверка плана запроса для SQLite.")
+        queryset = Product.objects.search("клубника")
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("VIRTUAL TABLE INDEX", plan)
+        self.assertNotIn("SCAN food_shop_product ", f"{plan} ")
+
+    def test_search_triggers_exist_after_migrate(self):
+        """
+        После migrate у таблицы продуктов есть все три триггера индекса.
+        """
+        if connection.vendor != "sqlite":
+            self.skipTest("Триггеры FTS5 есть только на SQLite.")
+        self.assertEqual(get_search_triggers(connection), set(SQLITE_TRIGGERS))
+
+    def test_missing_search_triggers_are_restored(self):
+        """
+        Удаленный (например, перестройкой таблицы) триггер создается
+        заново, а изменения, пропущенные индексом, попадают в него.
+        """
+        if connection.vendor != "sqlite":
+            self.skipTest("Триггеры FTS5 есть только на SQLite.")
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER food_shop_product_fts_update")
+        self.carrot.name = "Морковь мытая"
+        self.carrot.save()
+        self.assertEqual(self.search("мытая"), [])
+
+        self.assertEqual(
+            ensure_search_triggers(connection), ["food_shop_product_fts_update"]
+        )
+        self.assertEqual(ensure_search_triggers(connection), [])
+        self.assertEqual(self.search("мытая"), [self.carrot.id])
+        self.carrot.name = "Морковь свежая"
+        self.carrot.save()
+        self.assertEqual(self.search("свежая"), [self.carrot.id])
+
+    def test_search_many_matches_bounded(self):
+        """
+        При тысячах совпадений число запросов не растет, релевантность
+        считается один раз на строку (без коррелированного подзапроса),
+        а результаты упорядочены по убыванию релевантности.
+        """
+        with CaptureQueriesContext(connection) as small:
+            self.search("клубника")
+        subcategory = self.strawberry.subcategory
+        Product.objects.bulk_create(
+            Product(
+                name=f"Клубника сорт {index}" + " клубника" * (index % 3),
+                subcategory=subcategory,
+                price=100,
+            )
+            for index in range(3000)
+        )
+        queryset = Product.objects.search("клубника")
+        if connection.vendor == "sqlite":
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+            self.assertNotIn("CORRELATED", plan)
+
+        with CaptureQueriesContext(connection) as large:
+            found = self.search("клубника")
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(len(found), len(set(found)))
+        ranks = list(
+            queryset.order_by("-search_rank", "-id").values_list(
+                "search_rank", flat=True
+            )
+        )
+        self.assertEqual(len(ranks), 3001)
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertGreater(ranks[0], ranks[-1])
+
+
+class TestProductFilters(APITestCase):
+    """
+    Тесты фильтров продуктов и подкатегорий.
+    """
+
+    FILTER_VALUES = {
+        "price_min": "50",
+        "price_max": "250",
+        "subcategory": "1",
+        "category": "1",
+        "measurement_unit": "kg",
+        "added_since": "2024-01-01T00:00:00Z",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Две категории с подкатегориями и продуктами разной цены.
+        """
+        cls.fruits = Category.objects.create(name="Test_Category_Fruits")
+        cls.dairy = Category.objects.create(name="Test_Category_Dairy")
+        cls.berries = Subcategory.objects.create(
+            name="Test_Subcategory_Berries", category=cls.fruits
+        )
+        cls.milk = Subcategory.objects.create(
+            name="Test_Subcategory_Milk", category=cls.dairy
+        )
+        cls.strawberry = Product.objects.create(
+            name="Test_Product_Клубника", subcategory=cls.berries, price=300
+        )
+        cls.cherry = Product.objects.create(
+            name="Test_Product_Вишня", subcategory=cls.berries, price=150
+        )
+        cls.kefir = Product.objects.create(
+            name="Test_Product_Кефир",
+            subcategory=cls.milk,
+            price=90,
+            measurement_unit="lt",
+        )
+
+    def filter_products(self, **params):
+        response = self.client.get(reverse("product-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {product["id"] for product in response.data["results"]}
+
+    def test_product_filters(self):
+        """
+        Фильтры по цене, категории, подкатегории, единице и дате.
+        """
+        self.assertEqual(
+            self.filter_products(price_min=100, price_max=200), {self.cherry.id}
+        )
+        self.assertEqual(
+            self.filter_products(category=self.fruits.id),
+            {self.strawberry.id, self.cherry.id},
+        )
+        self.assertEqual(
+            self.filter_products(subcategory=self.milk.id), {self.kefir.id}
+        )
+        self.assertEqual(
+            self.filter_products(measurement_unit="lt", price_max=100),
+            {self.kefir.id},
+        )
+        self.assertEqual(
+            self.filter_products(added_since="2999-01-01T00:00:00Z"), set()
+        )
+
+    def test_subcategory_filter_by_category(self):
+        """
+        Подкатегории фильтруются по категории.
+        """
+        response = self.client.get(
+            reverse("subcategory-list"), {"category": self.dairy.id}
+        )
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [self.milk.id]
+        )
+
+    def get_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_filter_combinations_use_indexes(self):
+        """
+        Все сочетания фильтров продуктов читают продукты по индексу
+        (без полного сканирования таблицы). С фильтром на равенство
+        по подкатегории или единице измерения страница читается
+        из составного индекса в порядке даты (без сортировки во временном
+        B-дереве); категория и диапазон цены сортируют только найденные
+        по индексу строки.
+        """
+        if connection.vendor != "sqlite":
+            self.skipTest("Проверка плана запроса для SQLite.")
+
+        for size in range(1, len(self.FILTER_VALUES) + 1):
+            for combination in itertools.combinations(self.FILTER_VALUES, size):
+                data = {name: self.FILTER_VALUES[name] for name in combination}
+                plan = self.get_plan(
+                    ProductFilter(data, queryset=ProductViewSet.queryset).qs[:10]
+                )
+                with self.subTest(filters=combination, plan=plan):
+                    self.assertFalse(
+                        [
+                            step for step in plan
+                            if step.startswith("SCAN food_shop_product")
+                            and "INDEX" not in step
+                        ]
+                    )
+                    if {"subcategory", "measurement_unit"} & set(combination):
+                        self.assertFalse(
+                            [step for step in plan if "TEMP B-TREE" in step]
+                        )
+
+    def test_subcategory_filter_uses_index(self):
+        """
+        Подкатегории категории читаются по индексу в порядке названия.
+        """
+        if connection.vendor != "sqlite":
+            self.skipTest("Проверка плана запроса для SQLite.")
+
+        plan = self.get_plan(
+            SubcategoryFilter(
+                {"category": "1"}, queryset=SubcategoryViewSet.queryset
+            ).qs[:10]
+        )
+        self.assertFalse(
+            [
+                step for step in plan
+                if step.startswith("SCAN food_shop_subcategory")
+                or "TEMP B-TREE" in step
+            ],
+            plan,
+        )
+
+    def test_cursor_pages_keep_date_ordering(self):
+        """
+        С любым фильтром курсорная пагинация идет от новых продуктов
+        к старым.
+        """
+        blueberry = Product.objects.create(
+            name="Test_Product_Голубика",
+            subcategory=Subcategory.objects.create(
+                name="Test_Subcategory_Blue", category=self.fruits
+            ),
+            price=200,
+        )
+        expected = [blueberry.id, self.cherry.id, self.strawberry.id]
+        for params in (
+            {"category": self.fruits.id},
+            {"price_min": 100},
+            {"price_min": 100, "price_max": 400},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(
+                    reverse("product-list"),
+                    {**params, "pagination": "cursor", "limit": 1},
+                )
+                received = []
+                while response.data["next"]:
+                    received.extend(
+                        item["id"] for item in response.data["results"]
+                    )
+                    response = self.client.get(response.data["next"])
+                received.extend(item["id"] for item in response.data["results"])
+                self.assertEqual(received, expected)
+
+
+class TestCatalogConditionalGet(APITestCase):
+    """
+    Тесты ETag/Last-Modified и ответов 304 для эндпоинтов каталога.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Категория, подкатегория и продукт.
+        """
+        cls.category = Category.objects.create(name="Test_Category_ETag")
+        cls.subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_ETag", category=cls.category
+        )
+        cls.product = Product.objects.create(
+            name="Test_Product_ETag", subcategory=cls.subcategory, price=100
+        )
+
+    def test_responses_carry_validators(self):
+        """
+        Ответы каталога содержат ETag и Last-Modified.
+        """
+        for name in ("category-list", "subcategory-list", "product-list"):
+            with self.subTest(url=name):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertTrue(response["ETag"].startswith('"'))
+                self.assertIn("Last-Modified", response)
+
+    def test_if_none_match_returns_304_without_queries(self):
+        """
+        Совпавший If-None-Match дает 304 без запросов к БД.
+        """
+        url = reverse("product-detail", kwargs={"pk": self.product.id})
+        etag = self.client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)
+
+    def test_if_modified_since_returns_304(self):
+        """
+        If-Modified-Since не раньше Last-Modified дает 304.
+        """
+        url = reverse("subcategory-list")
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_after_catalog_change(self):
+        """
+        Изменение продукта меняет ETag списков каталога.
+        """
+        url = reverse("category-list")
+        etag = self.client.get(url)["ETag"]
+        self.product.price = 120
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_unchanged_before_commit(self):
+        """
+        До фиксации транзакции ETag не меняется: новый ETag не может
+        достаться старому телу ответа.
+        """
+        url = reverse("product-detail", kwargs={"pk": self.product.id})
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.product.price = 120
+                self.product.save()
+                self.assertEqual(self.client.get(url)["ETag"], etag)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["price"], "120.00")
+
+    def test_etag_depends_on_query(self):
+        """
+        Разные страницы и фильтры имеют разные ETag.
+        """
+        url = reverse("product-list")
+        self.assertNotEqual(
+            self.client.get(url)["ETag"],
+            self.client.get(url, {"price_min": 50})["ETag"],
+        )
+
+
+class TestProductValuesFastPath(APITestCase):
+    """
+    Тесты быстрого пути list/retrieve продуктов через values().
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Продукты с изображениями и без, подкатегория с иконкой.
+        """
+        category = Category.objects.create(name="Test_Category_Values")
+        subcategory = Subcategory.objects.create(
+            name="Test_Subcategory_Values", category=category
+        )
+        Subcategory.objects.filter(id=subcategory.id).update(
+            icon="subcategory/berries.png"
+        )
+        for index in range(5):
+            Product.objects.create(
+                name=f"Test_Product_Values_{index}",
+                subcategory=subcategory,
+                price=f"{index + 1}9.90",
+                measurement_unit="pcs",
+            )
+        Product.objects.filter(name__endswith="_1").update(
+            icon_small="products_small/p1.png",
+            icon_middle="products_middle/p1.png",
+            icon_big="products_big/p1.png",
+        )
+
+    def render_slow(self, instance, request, many=False):
+        """
+        Эталонный JSON через ProductSerializer и экземпляры моделей.
+        """
+        data = ProductSerializer(
+            instance, many=many, context={"request": request}
+        ).data
+        return JSONRenderer().render(data)
+
+    def test_list_is_byte_identical(self):
+        """
+        Список продуктов совпадает с выводом ProductSerializer байт в байт.
+        """
+        response = self.client.get(reverse("product-list"), {"limit": 10})
+        products = Product.objects.select_related("subcategory__category")
+        self.assertEqual(
+            JSONRenderer().render(response.data["results"]),
+            self.render_slow(products, response.wsgi_request, many=True),
+        )
+
+    def test_retrieve_is_byte_identical(self):
+        """
+        Детальная информация совпадает с выводом ProductSerializer.
+        """
+        product = Product.objects.get(name__endswith="_1")
+        response = self.client.get(
+            reverse("product-detail", kwargs={"pk": product.id})
+        )
+        self.assertEqual(
+            response.content, self.render_slow(product, response.wsgi_request)
+        )
+
+    def test_list_is_single_query(self):
+        """
+        Страница курсорной пагинации читается одним запросом.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("product-list"), {"pagination": "cursor", "limit": 2}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+    def test_retrieve_missing_product(self):
+        """
+        Несуществующий продукт дает 404.
+        """
+        response = self.client.get(reverse("product-detail", kwargs={"pk": 0}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestSlugLookups(APITestCase):
+    """
+    Тесты адресации категорий, подкатегорий и продуктов по слагу.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Категория, подкатегория и продукт со слагами.
+        """
+        cls.category = Category.objects.create(name="Фрукты")
+        cls.subcategory = Subcategory.objects.create(
+            name="Ягоды", category=cls.category
+        )
+        cls.product = Product.objects.create(
+            name="Клубника", subcategory=cls.subcategory, price=300
+        )
+
+    def test_retrieve_by_slug_matches_retrieve_by_id(self):
+        """
+        Ответ по слагу совпадает с ответом по идентификатору.
+        """
+        for basename, instance in (
+            ("category", self.category),
+            ("subcategory", self.subcategory),
+            ("product", self.product),
+        ):
+            with self.subTest(basename=basename):
+                by_id = self.client.get(
+                    reverse(f"{basename}-detail", kwargs={"pk": instance.pk})
+                )
+                by_slug = self.client.get(
+                    reverse(f"{basename}-detail", kwargs={"pk": instance.slug})
+                )
+                self.assertEqual(by_slug.status_code, status.HTTP_200_OK)
+                self.assertEqual(by_slug.data, by_id.data)
+
+    def test_slug_lookup_costs_the_same_as_id_lookup(self):
+        """
+        С прогретым кэшем слагов запрос по слагу - один запрос к БД.
+        """
+        by_slug = reverse("product-detail", kwargs={"pk": self.product.slug})
+        self.client.get(by_slug)
+        with self.assertNumQueries(1):
+            self.client.get(
+                reverse("product-detail", kwargs={"pk": self.product.pk})
+            )
+        with self.assertNumQueries(1):
+            self.client.get(by_slug)
+
+    def test_nested_product_path(self):
+        """
+        Продукт и подкатегория доступны по цепочке слагов.
+        """
+        url = reverse(
+            "category-product",
+            kwargs={
+                "pk": self.category.slug,
+                "subcategory_slug": self.subcategory.slug,
+                "product_slug": self.product.slug,
+            },
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], self.product.id)
+        response = self.client.get(
+            reverse(
+                "category-subcategory",
+                kwargs={
+                    "pk": self.category.slug,
+                    "subcategory_slug": self.subcategory.slug,
+                },
+            )
+        )
+        self.assertEqual(response.data["id"], self.subcategory.id)
+
+    def test_nested_path_checks_parents(self):
+        """
+        Продукт из другой подкатегории по вложенному пути не находится.
+        """
+        other = Subcategory.objects.create(name="Цитрусы", category=self.category)
+        url = reverse(
+            "category-product",
+            kwargs={
+                "pk": self.category.slug,
+                "subcategory_slug": other.slug,
+                "product_slug": self.product.slug,
+            },
+        )
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+    def test_stale_cache_after_slug_change(self):
+        """
+        После смены слага старый слаг не находится, новый - находится.
+        """
+        old_url = reverse("product-detail", kwargs={"pk": self.product.slug})
+        self.client.get(old_url)
+        Product.objects.filter(pk=self.product.pk).update(slug="zemljanika")
+        self.assertEqual(
+            self.client.get(old_url).status_code, status.HTTP_404_NOT_FOUND
+        )
+        response = self.client.get(
+            reverse("product-detail", kwargs={"pk": "zemljanika"})
+        )
+        self.assertEqual(response.data["id"], self.product.id)
+
+
+class TestCatalogExport(APITestCase):
+    """
+    Тесты потоковой выгрузки каталога через API.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Администратор, обычный пользователь и два продукта.
+        """
+        cls.admin = MyUser.objects.create_superuser(
+            username="Export_admin", email="export@example.com", password="pass"
+        )
+        cls.user = MyUser.objects.create_user(
+            username="Export_user", email="user@example.com", password="pass"
+        )
+        category = Category.objects.create(name="Фрукты")
+        subcategory = Subcategory.objects.create(name="Ягоды", category=category)
+        cls.products = [
+            Product.objects.create(name=name, subcategory=subcategory, price=100)
+            for name in ("Клубника", "Малина")
+        ]
+        cls.url = reverse("product-export")
+
+    def test_export_is_admin_only(self):
+        """
+        Выгрузка недоступна анонимам и обычным пользователям.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_streams_ndjson(self):
+        """
+        NDJSON отдается потоком, по строке на продукт.
+        """
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["name"] for line in lines], ["Клубника", "Малина"]
+        )
+
+    def test_export_csv_after_id(self):
+        """
+        CSV с after_id продолжает выгрузку без заголовка.
+        """
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(
+            self.url,
+            {"export_format": "csv", "after_id": self.products[0].id},
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith(f"{self.products[1].id},Малина,"))
+
+    def test_export_rejects_unknown_format(self):
+        """
+        Неизвестный формат - ошибка 400.
+        """
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.url, {"export_format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
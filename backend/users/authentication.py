@@ -0,0 +1,50 @@
+import hashlib
+
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+from core.constants import CacheTimeout
+
+AUTH_CACHE_ALIAS = "auth"
+
+
+def get_token_cache_key(key):
+    """
+    Ключ кэша для токена. В ключ попадает хэш, а не сам токен.
+    :param key: Ключ токена.
+    :return: Ключ кэша (str).
+    """
+
+    return f"auth_token:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def invalidate_tokens(*keys):
+    """
+    Удаляет из кэша записи указанных токенов.
+    :param keys: Ключи токенов.
+    """
+
+    if keys:
+        caches[AUTH_CACHE_ALIAS].delete_many([get_token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кэшированием пары токен - пользователь.
+    При попадании в кэш запрос Token JOIN MyUser не выполняется.
+    Записи живут CacheTimeout.AUTH_TOKEN секунд в отдельном кэше
+    с ограниченным числом записей и удаляются сигналами users.signals
+    при удалении токена (в том числе при выходе через djoser)
+    и при любом изменении пользователя (например, деактивации).
+    """
+
+    def authenticate_credentials(self, key):
+        auth_cache = caches[AUTH_CACHE_ALIAS]
+        cache_key = get_token_cache_key(key)
+        cached = auth_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+        auth_cache.set(cache_key, (user, token), CacheTimeout.AUTH_TOKEN.value)
+        return user, token
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+from .models import MyUser
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """
+    Сигнал, удаляющий токен из кэша аутентификации после его удаления
+    (выход из системы через djoser token/logout/).
+
+    Параметры:
+    sender (Model): Модель, которая отправляет сигнал.
+    instance (Token): Удаленный токен.
+    **kwargs: Произвольные именованные аргументы.
+    """
+
+    invalidate_tokens(instance.key)
+
+
+@receiver(post_save, sender=MyUser)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """
+    Сигнал, удаляющий токены пользователя из кэша аутентификации
+    после изменения пользователя (деактивация, смена пароля или прав),
+    чтобы следующий запрос получил актуального пользователя.
+
+    Параметры:
+    sender (Model): Модель, которая отправляет сигнал.
+    instance (MyUser): Сохраненный пользователь.
+    created (bool): Пользователь создан, а не изменен.
+    **kwargs: Произвольные именованные аргументы.
+    """
+
+    if not created:
+        invalidate_tokens(
+            *Token.objects.filter(user=instance).values_list("key", flat=True)
+        )